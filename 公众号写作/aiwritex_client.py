@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+AIWriteX HTTP 客户端 - 发布、账号等 API 调用统一走这里
+
+特性:
+    - 共享 requests.Session，keep-alive 连接池复用
+    - 可重试错误按指数退避 + 随机抖动重试
+    - 每次调用有总截止时间（含所有重试），不会无限拖长
+    - 按接口统计延迟直方图
+
+重试策略:
+    - 连接没建立起来（连接超时、无法建立连接）、429/502/503: 所有请求都重试
+      （请求没有发出去，或服务端明确拒绝）
+    - 其它连接错误（服务端收到请求后断开连接等）、读超时、500/504: 只有
+      幂等请求（GET）才重试——服务端可能已经处理了请求，重放 POST 会重复发布
+    - 单次调用可以传 retries=0 彻底关闭重试（比如发布）
+"""
+
+import time
+import random
+import threading
+from collections import defaultdict
+
+# 默认重试参数
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+DEFAULT_MAX_BACKOFF = 8.0
+DEFAULT_POOL_SIZE = 10
+
+# 单次尝试的超时上限（截止时间更短时取截止时间）
+DEFAULT_ATTEMPT_TIMEOUT = 30.0
+
+# 延迟直方图的桶上界（秒）
+LATENCY_BUCKETS = [0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60]
+
+SAFE_RETRY_STATUSES = {429, 502, 503}
+IDEMPOTENT_RETRY_STATUSES = SAFE_RETRY_STATUSES | {500, 504}
+
+
+class DeadlineExceeded(Exception):
+    """调用总时长超过截止时间"""
+
+
+def _never_sent(error) -> bool:
+    """连接错误是否发生在请求发出之前（连接超时、无法建立连接）
+
+    服务端收到请求后断开连接（RemoteDisconnected、ProtocolError）同样表现为
+    ConnectionError，这种情况请求可能已被处理，不能算在内
+    """
+    import requests
+    from urllib3.exceptions import NewConnectionError
+
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    reason = error.args[0] if error.args else None
+    reason = getattr(reason, "reason", reason)   # MaxRetryError 包着真正的原因
+    return isinstance(reason, NewConnectionError)
+
+
+class AIWriteXClient:
+    """带连接池和重试的 AIWriteX API 客户端（线程安全）"""
+
+    def __init__(self, base_url: str, max_retries: int = DEFAULT_MAX_RETRIES,
+                 backoff: float = DEFAULT_BACKOFF, max_backoff: float = DEFAULT_MAX_BACKOFF,
+                 pool_size: int = DEFAULT_POOL_SIZE):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.base_url = base_url.rstrip("/")
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._histograms = defaultdict(lambda: [0] * (len(LATENCY_BUCKETS) + 1))
+        self._lock = threading.Lock()
+
+    def request(self, method: str, path: str, deadline: float = 60,
+                idempotent: bool = None, retries: int = None, **kwargs):
+        """发起请求并按策略重试，返回最后一次的 Response
+
+        deadline: 本次调用（含重试和退避等待）的总时长上限，秒
+        idempotent: 是否可以安全重放，默认 GET/HEAD 为 True
+        retries: 本次调用的最大重试次数，默认用客户端的 max_retries；0 为不重试
+        """
+        import requests
+
+        max_retries = self.max_retries if retries is None else retries
+        if idempotent is None:
+            idempotent = method.upper() in ("GET", "HEAD")
+        retry_statuses = IDEMPOTENT_RETRY_STATUSES if idempotent else SAFE_RETRY_STATUSES
+
+        url = f"{self.base_url}{path}"
+        end = time.monotonic() + deadline
+        attempt = 0
+
+        while True:
+            remaining = end - time.monotonic()
+            if remaining <= 0:
+                raise DeadlineExceeded(f"{method} {path} 超过截止时间 {deadline}s")
+
+            start = time.monotonic()
+            retryable_error = None
+            try:
+                response = self.session.request(
+                    method, url, timeout=min(remaining, DEFAULT_ATTEMPT_TIMEOUT), **kwargs)
+            except requests.exceptions.ConnectionError as e:
+                # 连接没建立起来时请求肯定没发出去，总能重试；否则（比如服务端
+                # 收到请求后断开）可能已被处理，非幂等请求不能重放
+                if not idempotent and not _never_sent(e):
+                    raise
+                retryable_error = e
+            except requests.exceptions.ReadTimeout as e:
+                # 服务端可能已经处理了请求，非幂等请求不能重放
+                if not idempotent:
+                    raise
+                retryable_error = e
+            finally:
+                self._observe(method, path, time.monotonic() - start)
+
+            if retryable_error is None and response.status_code not in retry_statuses:
+                return response
+
+            attempt += 1
+            if attempt > max_retries:
+                if retryable_error is not None:
+                    raise retryable_error
+                return response
+
+            # 指数退避 + full jitter；服务端给了 Retry-After 时以它为准
+            delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** (attempt - 1)))
+            if retryable_error is None:
+                retry_after = response.headers.get("Retry-After", "")
+                if retry_after.isdigit():
+                    delay = float(retry_after)
+            if time.monotonic() + delay >= end:
+                if retryable_error is not None:
+                    raise retryable_error
+                return response
+            time.sleep(delay)
+
+    def get(self, path: str, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path: str, **kwargs):
+        return self.request("POST", path, **kwargs)
+
+    def _observe(self, method: str, path: str, seconds: float):
+        idx = len(LATENCY_BUCKETS)
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                idx = i
+                break
+        with self._lock:
+            self._histograms[f"{method} {path}"][idx] += 1
+
+    def latency_report(self):
+        """各接口的延迟直方图: {接口: {"<=0.1s": 次数, ...}}"""
+        labels = [f"<={b}s" for b in LATENCY_BUCKETS] + [f">{LATENCY_BUCKETS[-1]}s"]
+        with self._lock:
+            return {
+                name: {label: n for label, n in zip(labels, counts) if n}
+                for name, counts in self._histograms.items()
+            }
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(base_url: str):
+    """获取进程内共享的客户端（同一 base_url 复用同一个连接池）"""
+    with _clients_lock:
+        if base_url not in _clients:
+            _clients[base_url] = AIWriteXClient(base_url)
+        return _clients[base_url]
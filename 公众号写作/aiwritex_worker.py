@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+AIWriteX 常驻润色进程 - 避免每篇文章都冷启动一次 main.py
+
+工作方式:
+    1. 主进程在 127.0.0.1 上监听，拉起 worker 子进程（独立进程组）并等它连回来
+    2. worker 把 AIWriteX 的 main.py 当作模块导入：只执行顶层的 import 和
+       初始化（模型、客户端等），模块对象一直保留
+    3. 之后每个任务通过连接传入标题和正文，worker 设置好 sys.argv 后调用
+       已初始化模块里的入口函数（默认 main()），顶层初始化不再重复
+    4. 完成 N 个任务或内存超过阈值后 worker 主动退出，下个任务自动换新进程
+
+退化情况（ready 消息里带说明，主进程启动时提示一次）:
+    - main.py 没有 if __name__ == "__main__" 保护：导入就会跑完整任务，
+      不预热
+    - 导入失败，或找不到入口函数
+    以上情况每个任务用 runpy 完整运行 main.py，顶层初始化每次都会重做，
+    只有 main.py import 的模块常驻。
+
+任务超时时杀掉 worker 所在的整个进程组，它拉起的子进程一并结束。
+冷/热启动耗时分别统计，便于比较常驻带来的收益。
+"""
+
+import io
+import os
+import ast
+import sys
+import time
+import runpy
+import importlib.util
+import secrets
+import argparse
+import threading
+import subprocess
+from pathlib import Path
+from contextlib import redirect_stdout, redirect_stderr
+from multiprocessing.connection import Listener, Client
+
+from process_supervisor import _popen_group_kwargs, kill_group
+
+# 默认回收策略
+DEFAULT_MAX_JOBS = 20
+DEFAULT_MAX_RSS_MB = 2048
+
+# 等待 worker 连回来的时间
+CONNECT_TIMEOUT = 60
+
+AUTHKEY_ENV = "AIWRITEX_WORKER_AUTHKEY"
+
+# main.py 里每个任务调用的入口函数
+ENTRY_FUNCTION = "main"
+
+
+def _rss_mb():
+    """当前进程常驻内存（MB），取不到返回 0（此时不按内存回收）
+
+    不用 ru_maxrss：那是历史峰值，一旦超过阈值就会每个任务都回收
+    """
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 1024 / 1024
+    except ImportError:
+        pass
+
+    try:
+        # Linux：第二列是当前常驻页数
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except (OSError, ValueError, IndexError, AttributeError):
+        return 0.0
+
+
+# ---------------------------------------------------------------------------
+# worker 子进程
+# ---------------------------------------------------------------------------
+
+def _has_main_guard(source: str):
+    """模块顶层是否有 if __name__ == "__main__" 保护"""
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return False
+    for node in tree.body:
+        if isinstance(node, ast.If):
+            test = ast.unparse(node.test)
+            if "__name__" in test and "__main__" in test:
+                return True
+    return False
+
+
+def _load_main(main_py: Path, entry: str):
+    """预热：把 main.py 作为模块导入（只执行顶层代码），返回 (入口函数, 说明)
+
+    入口函数为 None 表示不能常驻，每个任务改为完整运行 main.py
+    """
+    fallback = "每个任务完整运行 main.py，顶层初始化不常驻"
+    if not _has_main_guard(main_py.read_text(encoding="utf-8")):
+        return None, f"main.py 没有 if __name__ == '__main__' 保护，不预热；{fallback}"
+
+    spec = importlib.util.spec_from_file_location("aiwritex_main", main_py)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    log = io.StringIO()
+    try:
+        with redirect_stdout(log), redirect_stderr(log):
+            spec.loader.exec_module(module)
+    except (Exception, SystemExit) as e:
+        sys.modules.pop(spec.name, None)
+        tail = log.getvalue().strip().splitlines()[-3:]
+        detail = f"{type(e).__name__}: {e}" + (f"（{' / '.join(tail)}）" if tail else "")
+        return None, f"预热导入 main.py 失败 {detail}；{fallback}"
+
+    entry_fn = getattr(module, entry, None)
+    if not callable(entry_fn):
+        return None, f"main.py 没有入口函数 {entry}()；{fallback}"
+    return entry_fn, f"常驻：复用已初始化的 main.py，每个任务调用 {entry}()"
+
+
+def _run_main(main_py: Path, argv, entry_fn=None):
+    """在当前进程内运行 AIWriteX，返回 (returncode, stdout, stderr)
+
+    有 entry_fn 时调用预热好的入口函数，否则用 runpy 完整运行 main.py
+    """
+    stdout, stderr = io.StringIO(), io.StringIO()
+    old_argv = sys.argv
+    sys.argv = [str(main_py)] + argv
+    returncode = 0
+
+    try:
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            if entry_fn is not None:
+                result = entry_fn()
+                if isinstance(result, int) and not isinstance(result, bool):
+                    returncode = result
+            else:
+                runpy.run_path(str(main_py), run_name="__main__")
+    except SystemExit as e:
+        returncode = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    except Exception as e:
+        stderr.write(f"{type(e).__name__}: {e}\n")
+        returncode = 1
+    finally:
+        sys.argv = old_argv
+
+    return returncode, stdout.getvalue(), stderr.getvalue()
+
+
+def serve(address, authkey: bytes, aiwritex_root: Path, max_jobs: int, max_rss_mb: float,
+          entry: str = ENTRY_FUNCTION):
+    """worker 主循环"""
+    start = time.perf_counter()
+    main_py = aiwritex_root / "main.py"
+
+    os.chdir(aiwritex_root)
+    sys.path.insert(0, str(aiwritex_root))
+
+    # 预热：导入 main.py（import、模型/客户端初始化），保留模块供每个任务调用
+    entry_fn, warmup = _load_main(main_py, entry)
+
+    conn = Client(address, authkey=authkey)
+    conn.send({"type": "ready", "pid": os.getpid(), "resident": entry_fn is not None,
+               "warmup": warmup, "startup_seconds": time.perf_counter() - start})
+
+    # main.py 只接受 --input 文件，这里每个 worker 复用同一个输入文件
+    input_file = aiwritex_root / "temp" / f"worker_{os.getpid()}.md"
+    input_file.parent.mkdir(parents=True, exist_ok=True)
+
+    jobs_done = 0
+    try:
+        while True:
+            try:
+                msg = conn.recv()
+            except EOFError:
+                break
+            if msg.get("type") == "stop":
+                break
+
+            job_start = time.perf_counter()
+            input_file.write_text(msg["content"], encoding="utf-8")
+
+            env_backup = dict(os.environ)
+            os.environ.update(msg.get("env", {}))
+            try:
+                returncode, out, err = _run_main(
+                    main_py, ["--input", str(input_file), "--title", msg["title"]], entry_fn)
+            finally:
+                os.environ.clear()
+                os.environ.update(env_backup)
+
+            jobs_done += 1
+            rss = _rss_mb()
+            recycle = jobs_done >= max_jobs or (max_rss_mb and rss > max_rss_mb)
+
+            conn.send({
+                "type": "result",
+                "returncode": returncode,
+                "stdout": out,
+                "stderr": err,
+                "seconds": time.perf_counter() - job_start,
+                "warm": jobs_done > 1,
+                "rss_mb": rss,
+                "recycle": bool(recycle),
+            })
+            if recycle:
+                break
+    finally:
+        conn.close()
+        try:
+            input_file.unlink()
+        except OSError:
+            pass
+
+
+# ---------------------------------------------------------------------------
+# 主进程侧
+# ---------------------------------------------------------------------------
+
+class WarmWorker:
+    """一个常驻 worker 的句柄，同一时间只处理一个任务"""
+
+    def __init__(self, aiwritex_root: Path, max_jobs: int = DEFAULT_MAX_JOBS,
+                 max_rss_mb: float = DEFAULT_MAX_RSS_MB, entry: str = ENTRY_FUNCTION):
+        self.aiwritex_root = Path(aiwritex_root)
+        self.max_jobs = max_jobs
+        self.max_rss_mb = max_rss_mb
+        self.entry = entry
+        self.process = None
+        self.conn = None
+        self.resident = None    # 最近一次预热是否成功常驻
+        self.warmup = ""        # 预热说明
+        self.cold_starts = []   # 每次拉起 worker 到首个任务完成的耗时
+        self.warm_runs = []     # 复用 worker 的任务耗时
+        self._pending_spawn = 0.0
+        self._lock = threading.Lock()
+
+    def _spawn(self):
+        authkey = secrets.token_bytes(32)
+        spawn_start = time.perf_counter()
+
+        with Listener(("127.0.0.1", 0), authkey=authkey) as listener:
+            host, port = listener.address
+            cmd = [
+                sys.executable, str(Path(__file__).resolve()),
+                "--address", f"{host}:{port}",
+                "--root", str(self.aiwritex_root),
+                "--max-jobs", str(self.max_jobs),
+                "--max-rss-mb", str(self.max_rss_mb),
+                "--entry", self.entry,
+            ]
+            env = dict(os.environ, **{AUTHKEY_ENV: authkey.hex()})
+            # 独立进程组：超时时连同 AIWriteX 拉起的子进程一起杀掉
+            self.process = subprocess.Popen(
+                cmd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                **_popen_group_kwargs())
+
+            # accept() 本身不支持超时，放到线程里等
+            accepted = {}
+            t = threading.Thread(target=lambda: accepted.update(conn=listener.accept()),
+                                 daemon=True)
+            t.start()
+            t.join(CONNECT_TIMEOUT)
+            if "conn" not in accepted:
+                kill_group(self.process)
+                raise RuntimeError("AIWriteX worker 启动超时")
+
+        self.conn = accepted["conn"]
+        ready = self.conn.recv()
+        self._pending_spawn = time.perf_counter() - spawn_start
+
+        # 常驻与否变化时提示（通常只在第一次启动时）
+        if ready["resident"] is not self.resident and not ready["resident"]:
+            print(f"⚠️ AIWriteX worker: {ready['warmup']}")
+        self.resident, self.warmup = ready["resident"], ready["warmup"]
+
+    def _alive(self):
+        return self.process is not None and self.process.poll() is None and self.conn
+
+    def polish(self, title: str, content: str, env: dict = None, timeout: float = 300):
+        """提交一个润色任务，返回 (returncode, stdout, stderr)"""
+        with self._lock:
+            if not self._alive():
+                self._spawn()
+
+            self.conn.send({"type": "job", "title": title, "content": content,
+                            "env": env or {}})
+
+            if not self.conn.poll(timeout):
+                self.close(kill=True)
+                raise subprocess.TimeoutExpired("aiwritex_worker", timeout)
+
+            try:
+                reply = self.conn.recv()
+            except EOFError:
+                self.close(kill=True)
+                return 1, "", "AIWriteX worker 意外退出"
+
+            if reply["warm"]:
+                self.warm_runs.append(reply["seconds"])
+            else:
+                self.cold_starts.append(self._pending_spawn + reply["seconds"])
+
+            if reply["recycle"]:
+                self.close()
+
+            return reply["returncode"], reply["stdout"], reply["stderr"]
+
+    def close(self, kill: bool = False):
+        """关闭 worker"""
+        if self.conn:
+            try:
+                if not kill:
+                    self.conn.send({"type": "stop"})
+            except OSError:
+                pass
+            self.conn.close()
+            self.conn = None
+
+        if self.process:
+            if kill:
+                kill_group(self.process)
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                kill_group(self.process)
+                self.process.wait()
+            self.process = None
+
+
+class WorkerPool:
+    """固定数量的常驻 worker，供批量模式并发使用"""
+
+    def __init__(self, size: int, aiwritex_root: Path, **kwargs):
+        import queue
+        self.workers = [WarmWorker(aiwritex_root, **kwargs) for _ in range(max(1, size))]
+        self._idle = queue.Queue()
+        for w in self.workers:
+            self._idle.put(w)
+
+    def polish(self, title: str, content: str, env: dict = None, timeout: float = 300):
+        worker = self._idle.get()
+        try:
+            return worker.polish(title, content, env, timeout)
+        finally:
+            self._idle.put(worker)
+
+    def latency_report(self):
+        """汇总冷/热启动耗时"""
+        cold = [s for w in self.workers for s in w.cold_starts]
+        warm = [s for w in self.workers for s in w.warm_runs]
+        avg = lambda xs: sum(xs) / len(xs) if xs else 0.0
+        return {
+            "cold_count": len(cold), "cold_avg_seconds": avg(cold),
+            "warm_count": len(warm), "warm_avg_seconds": avg(warm),
+            "warmup": sorted({w.warmup for w in self.workers if w.warmup}),
+        }
+
+    def close(self, kill: bool = False):
+        for w in self.workers:
+            w.close(kill)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AIWriteX 常驻润色进程（由 polish_and_publish.py 拉起）")
+    parser.add_argument("--address", required=True, help="主进程监听地址 host:port")
+    parser.add_argument("--root", required=True, help="AIWriteX 根目录")
+    parser.add_argument("--max-jobs", type=int, default=DEFAULT_MAX_JOBS)
+    parser.add_argument("--max-rss-mb", type=float, default=DEFAULT_MAX_RSS_MB)
+    parser.add_argument("--entry", default=ENTRY_FUNCTION, help="main.py 中每个任务调用的入口函数")
+    args = parser.parse_args()
+
+    host, port = args.address.rsplit(":", 1)
+    authkey = bytes.fromhex(os.environ.pop(AUTHKEY_ENV))
+    serve((host, int(port)), authkey, Path(args.root), args.max_jobs, args.max_rss_mb,
+          args.entry)
+
+
+if __name__ == "__main__":
+    main()
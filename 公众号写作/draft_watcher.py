@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+草稿监听 - 保存 Markdown 后自动重新润色（polish_and_publish.py --watch）
+
+工作方式:
+    1. 监听草稿目录（不递归）。Linux 下用 inotify，安装了 watchdog 时用
+       watchdog，其它情况每秒轮询一次 mtime/大小
+    2. 同一文件的连续保存合并：最后一次变化后静默 DEBOUNCE_SECONDS 才处理
+    3. 只在内容哈希（规范化空白后）真正变化时才润色
+    4. 同一文件的新任务开始前，取消它还在跑的旧任务
+
+启动时已有的草稿只记录哈希，不会全部重新润色。
+"""
+
+import os
+import sys
+import time
+import select
+import struct
+import threading
+from pathlib import Path
+
+from output_manifest import hash_content
+from polish_cache import normalize_markdown
+
+# 最后一次变化后等待多久再处理（秒）
+DEBOUNCE_SECONDS = 1.5
+
+# 轮询模式的扫描间隔（秒）
+POLL_INTERVAL = 1.0
+
+# inotify 事件掩码（见 <sys/inotify.h>）
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def _content_hash(content: str):
+    return hash_content(normalize_markdown(content))
+
+
+# ---------------------------------------------------------------------------
+# 文件变化来源
+# ---------------------------------------------------------------------------
+
+class _PollingSource:
+    """按 (mtime, 大小) 轮询目录"""
+
+    name = "polling"
+
+    def __init__(self, directory: Path, suffix: str, notify):
+        self.directory = directory
+        self.suffix = suffix
+        self.notify = notify
+        self._snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+        try:
+            entries = list(os.scandir(self.directory))
+        except OSError:
+            return snapshot
+        for entry in entries:
+            if entry.name.endswith(self.suffix) and entry.is_file():
+                st = entry.stat()
+                snapshot[entry.path] = (st.st_mtime_ns, st.st_size)
+        return snapshot
+
+    def run(self, stop: threading.Event):
+        while not stop.wait(POLL_INTERVAL):
+            current = self._scan()
+            for path, sig in current.items():
+                if self._snapshot.get(path) != sig:
+                    self.notify(Path(path))
+            self._snapshot = current
+
+    def close(self):
+        pass
+
+
+class _InotifySource:
+    """Linux inotify（通过 ctypes 调用 libc，无额外依赖）"""
+
+    name = "inotify"
+
+    def __init__(self, directory: Path, suffix: str, notify):
+        import ctypes
+
+        self.directory = directory
+        self.suffix = suffix
+        self.notify = notify
+
+        libc = ctypes.CDLL(None, use_errno=True)
+        self.fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 失败")
+        mask = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"无法监听 {directory}")
+
+    def run(self, stop: threading.Event):
+        while not stop.is_set():
+            ready, _, _ = select.select([self.fd], [], [], 0.5)
+            if not ready:
+                continue
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                continue
+
+            offset = 0
+            while offset < len(data):
+                _, _, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+                offset += length
+                if name.endswith(self.suffix):
+                    self.notify(self.directory / name)
+
+    def close(self):
+        os.close(self.fd)
+
+
+class _WatchdogSource:
+    """watchdog（Windows/macOS 上的原生文件事件）"""
+
+    name = "watchdog"
+
+    def __init__(self, directory: Path, suffix: str, notify):
+        from watchdog.observers import Observer
+        from watchdog.events import FileSystemEventHandler
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                if event.is_directory:
+                    return
+                path = getattr(event, "dest_path", "") or event.src_path
+                if path.endswith(suffix):
+                    notify(Path(path))
+
+        self.observer = Observer()
+        self.observer.schedule(Handler(), str(directory), recursive=False)
+
+    def run(self, stop: threading.Event):
+        self.observer.start()
+        stop.wait()
+
+    def close(self):
+        self.observer.stop()
+        self.observer.join()
+
+
+def open_source(directory: Path, suffix: str, notify, polling: bool = False):
+    """选择可用的文件变化来源：inotify > watchdog > 轮询"""
+    if not polling:
+        candidates = [_WatchdogSource]
+        if sys.platform.startswith("linux"):
+            candidates.insert(0, _InotifySource)
+        for cls in candidates:
+            try:
+                return cls(directory, suffix, notify)
+            except (ImportError, OSError, AttributeError):
+                continue
+    return _PollingSource(directory, suffix, notify)
+
+
+# ---------------------------------------------------------------------------
+# 调度
+# ---------------------------------------------------------------------------
+
+class DraftWatcher:
+    """监听草稿目录并调度润色任务
+
+    polish: polish(path, content, cancel) -> 输出路径或 None；cancel 是
+            threading.Event，同一文件有更新的保存时会被置位
+    """
+
+    def __init__(self, directory: Path, polish, suffix: str = ".md",
+                 debounce: float = DEBOUNCE_SECONDS, jobs: int = 2,
+                 polling: bool = False, log=print):
+        self.directory = Path(directory)
+        self.polish = polish
+        self.suffix = suffix
+        self.debounce = debounce
+        self.polling = polling
+        self.log = log
+
+        self._slots = threading.Semaphore(max(1, jobs))
+        self._lock = threading.Lock()
+        self._pending = {}   # 路径 -> 最后一次事件时间
+        self._hashes = {}    # 路径 -> 最近一次已处理（或已存在）内容的哈希
+        self._running = {}   # 路径 -> (哈希, cancel 事件)
+        self._stop = threading.Event()
+        self.polished = 0
+        self.skipped = 0
+        self.cancelled = 0
+
+        for path in self.directory.glob(f"*{suffix}"):
+            try:
+                self._hashes[path] = _content_hash(path.read_text(encoding="utf-8"))
+            except (OSError, UnicodeDecodeError):
+                pass
+
+    def _notify(self, path: Path):
+        with self._lock:
+            self._pending[path] = time.monotonic()
+
+    def _due(self):
+        now = time.monotonic()
+        with self._lock:
+            due = [p for p, t in self._pending.items() if now - t >= self.debounce]
+            for p in due:
+                del self._pending[p]
+        return due
+
+    def _dispatch(self, path: Path):
+        try:
+            content = path.read_text(encoding="utf-8")
+        except (OSError, UnicodeDecodeError):
+            return   # 被删除或正在写入，下次事件再处理
+        digest = _content_hash(content)
+
+        with self._lock:
+            running = self._running.get(path)
+            if running and running[0] == digest:
+                return
+            if not running and self._hashes.get(path) == digest:
+                self.skipped += 1
+                return
+            if running:
+                running[1].set()
+                self.cancelled += 1
+                self.log(f"🔁 {path.name} 有新的修改，取消进行中的润色")
+            cancel = threading.Event()
+            self._running[path] = (digest, cancel)
+
+        threading.Thread(target=self._run_job, args=(path, content, digest, cancel),
+                         daemon=True).start()
+
+    def _run_job(self, path: Path, content: str, digest: str, cancel: threading.Event):
+        output = None
+        try:
+            with self._slots:
+                if cancel.is_set():
+                    return
+                self.log(f"✏️ {path.name} 已修改，开始润色")
+                start = time.perf_counter()
+                output = self.polish(path, content, cancel)
+        except Exception as e:
+            self.log(f"❌ {path.name}: {e}")
+        finally:
+            with self._lock:
+                if self._running.get(path, (None, None))[1] is cancel:
+                    del self._running[path]
+                    if output:
+                        self._hashes[path] = digest
+
+        if output and not cancel.is_set():
+            self.polished += 1
+            self.log(f"✅ {path.name} → {output} ({time.perf_counter() - start:.1f}s)")
+
+    def run(self):
+        """阻塞运行，直到 stop() 或 Ctrl-C"""
+        source = open_source(self.directory, self.suffix, self._notify, self.polling)
+        thread = threading.Thread(target=source.run, args=(self._stop,), daemon=True)
+        thread.start()
+        self.log(f"👀 正在监听 {self.directory} ({source.name})，Ctrl-C 退出")
+
+        try:
+            while not self._stop.wait(0.2):
+                for path in self._due():
+                    self._dispatch(path)
+        finally:
+            self._stop.set()
+            with self._lock:
+                for _, cancel in self._running.values():
+                    cancel.set()
+            thread.join(timeout=2)
+            source.close()
+
+    def stop(self):
+        self._stop.set()
@@ -2,53 +2,19 @@
 """
 Claude Prompt进化史 - 图片下载脚本
 用于从免费图库批量下载所需的配图
+
+文件名、来源 URL、说明和体积上限都在同目录的 images.json 里（photo 模板），
+经 image_manifest 构建：下载走 HTTP 缓存并发进行，超出体积上限的重新压缩，
+没有变化的图片直接跳过（见 images.lock.json）
 """
 
 import os
-import requests
-import time
-from urllib.parse import urlparse
-from pathlib import Path
-
-# 图片下载链接
-IMAGE_URLS = {
-    "01-main-image.jpg": "https://images.unsplash.com/photo-1560472354-b33ff0c44a43?w=1200&h=630&fit=crop",  # 沟通对话
-    "02-talking-to-air.jpg": "https://images.unsplash.com/photo-1516321318423-f06f85e504b3?w=1200&h=630&fit=crop",  # 沮丧沟通
-    "03-information-overload.jpg": "https://images.unsplash.com/photo-1551288049-bebda4e38f71?w=1200&h=630&fit=crop",  # 信息过载
-    "04-aha-moment.jpg": "https://images.unsplash.com/photo-1507003211169-0a1dd7228f2d?w=1200&h=630&fit=crop",  # 灯泡时刻
-    "05-house-framework.jpg": "https://images.unsplash.com/photo-1541888946145-d3c458132c8c?w=1200&h=630&fit=crop",  # 建筑框架
-    "06-perfect-understanding.jpg": "https://images.unsplash.com/photo-1521737604893-d14cc237f11d?w=1200&h=630&fit=crop",  # 团队合作
-}
-
-def download_image(url: str, filename: str, target_dir: str):
-    """下载单张图片"""
-    try:
-        # 创建目标目录
-        Path(target_dir).mkdir(parents=True, exist_ok=True)
-
-        # 完整文件路径
-        file_path = os.path.join(target_dir, filename)
-
-        # 检查文件是否已存在
-        if os.path.exists(file_path):
-            print(f"✓ {filename} 已存在，跳过下载")
-            return
-
-        print(f"正在下载 {filename}...")
-
-        # 下载图片
-        response = requests.get(url, stream=True)
-        response.raise_for_status()
-
-        # 保存文件
-        with open(file_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
+import sys
 
-        print(f"✓ {filename} 下载成功")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from image_manifest import build, load_manifest
 
-    except Exception as e:
-        print(f"✗ {filename} 下载失败: {str(e)}")
+MANIFEST = os.path.join(os.path.dirname(os.path.abspath(__file__)), "images.json")
 
 def main():
     """主函数"""
@@ -58,20 +24,14 @@ def main():
     print(f"目标目录: {target_dir}")
     print("-" * 50)
 
-    for filename, url in IMAGE_URLS.items():
-        download_image(url, filename, target_dir)
-        # 添加延迟，避免请求过于频繁
-        time.sleep(0.5)
+    result = build(MANIFEST)
 
     print("-" * 50)
-    print("所有图片下载完成！")
+    failed = result["failed"]
+    print("所有图片下载完成！" if not failed else f"{len(failed)} 张图片下载失败")
     print("\n图片说明:")
-    print("1. 01-main-image.jpg - 两个人对话场景")
-    print("2. 02-talking-to-air.jpg - 沟通障碍/沮丧")
-    print("3. 03-information-overload.jpg - 信息过载")
-    print("4. 04-aha-moment.jpg - 灵感瞬间")
-    print("5. 05-house-framework.jpg - 建筑框架")
-    print("6. 06-perfect-understanding.jpg - 完美配合")
+    for i, spec in enumerate(load_manifest(MANIFEST)[1], 1):
+        print(f"{i}. {spec['output']} - {spec.get('description', '')}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
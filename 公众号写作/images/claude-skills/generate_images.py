@@ -1,12 +1,15 @@
 """
 Claude Code Skills 文章配图生成器
 """
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
 import os
+import sys
 
-# 创建输出目录
-output_dir = r"d:\code\ai\document\公众号写作\images\claude-skills"
-os.makedirs(output_dir, exist_ok=True)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from render_core import get_font
+
+# 输出目录：脚本所在目录
+output_dir = os.path.dirname(os.path.abspath(__file__))
 
 # 配色方案
 COLORS = {
@@ -40,12 +43,8 @@ def create_main_image():
         draw.ellipse([cx-r, cy-r, cx+r, cy+r], outline=COLORS['medium_blue'], width=3)
 
     # 中心文字
-    try:
-        title_font = ImageFont.truetype("arial.ttf", 60)
-        subtitle_font = ImageFont.truetype("arial.ttf", 30)
-    except:
-        title_font = ImageFont.load_default()
-        subtitle_font = ImageFont.load_default()
+    title_font = get_font("sans", 60)
+    subtitle_font = get_font("sans", 30)
 
     draw.text((cx, cy - 50), "SKILLS", fill=COLORS['white'], font=title_font, anchor="mm")
     draw.text((cx, cy + 30), "Claude Code", fill=COLORS['light_blue'], font=subtitle_font, anchor="mm")
@@ -61,8 +60,7 @@ def create_main_image():
         draw.line([(x1, y1), (x2, y2)], fill=COLORS['accent'], width=4)
         draw.ellipse([x2-8, y2-8, x2+8, y2+8], fill=COLORS['white'])
 
-    img.save(os.path.join(output_dir, "01-main.jpg"))
-    print("[OK] Created main image")
+    return img
 
 def create_architecture_diagram():
     """渐进式披露架构示意图"""
@@ -70,12 +68,8 @@ def create_architecture_diagram():
     img = Image.new('RGB', (width, height), COLORS['light_gray'])
     draw = ImageDraw.Draw(img)
 
-    try:
-        font = ImageFont.truetype("arial.ttf", 24)
-        title_font = ImageFont.truetype("arial.ttf", 28)
-    except:
-        font = ImageFont.load_default()
-        title_font = ImageFont.load_default()
+    font = get_font("sans", 24)
+    title_font = get_font("sans", 28)
 
     # 标题
     draw.text((50, 30), "Skills Progressive Disclosure Architecture", fill=COLORS['dark_blue'], font=title_font)
@@ -113,8 +107,7 @@ def create_architecture_diagram():
     draw.text((100, y3 + 165), "└── scripts/ (Executable scripts)", fill=COLORS['white'], font=font)
     draw.text((70, y3 + 200), "Cost: Only when accessed", fill=COLORS['light_gray'], font=font)
 
-    img.save(os.path.join(output_dir, "02-architecture.jpg"))
-    print("[OK] Created architecture diagram")
+    return img
 
 def create_file_structure():
     """Skill文件结构图"""
@@ -122,12 +115,8 @@ def create_file_structure():
     img = Image.new('RGB', (width, height), COLORS['dark_blue'])
     draw = ImageDraw.Draw(img)
 
-    try:
-        font = ImageFont.truetype("consolas.ttf", 20)
-        title_font = ImageFont.truetype("arial.ttf", 28)
-    except:
-        font = ImageFont.load_default()
-        title_font = ImageFont.load_default()
+    font = get_font("mono", 20)
+    title_font = get_font("sans", 28)
 
     draw.text((50, 30), "Skill File Structure", fill=COLORS['white'], font=title_font)
 
@@ -148,8 +137,7 @@ def create_file_structure():
         draw.text((80, start_y), item[0], fill=color, font=font)
         start_y += 40
 
-    img.save(os.path.join(output_dir, "03-file-structure.jpg"))
-    print("[OK] Created file structure diagram")
+    return img
 
 def create_comparison_table():
     """Skills对比表格图"""
@@ -157,12 +145,8 @@ def create_comparison_table():
     img = Image.new('RGB', (width, height), COLORS['white'])
     draw = ImageDraw.Draw(img)
 
-    try:
-        font = ImageFont.truetype("arial.ttf", 18)
-        header_font = ImageFont.truetype("arial.ttf", 22)
-    except:
-        font = ImageFont.load_default()
-        header_font = ImageFont.load_default()
+    font = get_font("sans", 18)
+    header_font = get_font("sans", 22)
 
     # 标题
     draw.text((50, 20), "Skills vs Other Approaches", fill=COLORS['dark_blue'], font=header_font)
@@ -196,8 +180,7 @@ def create_comparison_table():
             draw.text((x_positions[i], y), cell, fill=color, font=font)
         y += 50
 
-    img.save(os.path.join(output_dir, "04-comparison.jpg"))
-    print("[OK] Created comparison table")
+    return img
 
 def create_ending_image():
     """结尾配图"""
@@ -210,12 +193,8 @@ def create_ending_image():
         y = 50 + i * 70
         draw.rectangle([0, y, width, y+20], fill=(40, 50, 150))
 
-    try:
-        font = ImageFont.truetype("arial.ttf", 40)
-        sub_font = ImageFont.truetype("arial.ttf", 24)
-    except:
-        font = ImageFont.load_default()
-        sub_font = ImageFont.load_default()
+    font = get_font("sans", 40)
+    sub_font = get_font("sans", 24)
 
     # 文字
     draw.text((600, 150), "Start Building Your Skills", fill=COLORS['white'], font=font, anchor="mm")
@@ -223,14 +202,14 @@ def create_ending_image():
     draw.text((600, 250), "This week: Explore GitHub skills", fill=COLORS['light_blue'], font=sub_font, anchor="mm")
     draw.text((600, 290), "This month: Build your skills library", fill=COLORS['light_blue'], font=sub_font, anchor="mm")
 
-    img.save(os.path.join(output_dir, "05-ending.jpg"))
-    print("[OK] Created ending image")
+    return img
 
 if __name__ == "__main__":
+    # 输出文件名、体积上限见同目录的 images.json，只重新生成有变化的图片
+    from image_manifest import build
+
     print("Generating Claude Code Skills article images...")
-    create_main_image()
-    create_architecture_diagram()
-    create_file_structure()
-    create_comparison_table()
-    create_ending_image()
+    result = build(output_dir)
     print(f"\nAll images saved to: {output_dir}")
+    if result["failed"]:
+        sys.exit(1)
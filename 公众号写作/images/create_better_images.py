@@ -5,32 +5,16 @@
 """
 
 import os
-from PIL import Image, ImageDraw, ImageFont
+from PIL import ImageDraw
 import random
 import math
 
+from gradients import linear_gradient
+from render_core import get_font, draw_text, draw_centered_text, draw_centered_lines
+
 def create_gradient_image(size, start_color, end_color, direction='vertical'):
     """创建渐变背景"""
-    width, height = size
-    image = Image.new('RGB', size)
-    draw = ImageDraw.Draw(image)
-
-    if direction == 'vertical':
-        for y in range(height):
-            ratio = y / height
-            r = int(start_color[0] * (1 - ratio) + end_color[0] * ratio)
-            g = int(start_color[1] * (1 - ratio) + end_color[1] * ratio)
-            b = int(start_color[2] * (1 - ratio) + end_color[2] * ratio)
-            draw.line([(0, y), (width, y)], fill=(r, g, b))
-    else:
-        for x in range(width):
-            ratio = x / width
-            r = int(start_color[0] * (1 - ratio) + end_color[0] * ratio)
-            g = int(start_color[1] * (1 - ratio) + end_color[1] * ratio)
-            b = int(start_color[2] * (1 - ratio) + end_color[2] * ratio)
-            draw.line([(x, 0), (x, height)], fill=(r, g, b))
-
-    return image
+    return linear_gradient(size, [start_color, end_color], direction)
 
 def add_tech_pattern(image, pattern_type='grid'):
     """添加科技感图案"""
@@ -60,8 +44,8 @@ def add_tech_pattern(image, pattern_type='grid'):
                 outline=(255, 255, 255, 20)
             )
 
-def create_tech_image(filename, title, subtitle="", colors=None):
-    """创建科技感图片"""
+def render_tech_image(title, subtitle="", colors=None):
+    """绘制科技感图片，返回 Image"""
     if colors is None:
         colors = {
             'primary': (0, 116, 217),    # 蓝色
@@ -71,59 +55,37 @@ def create_tech_image(filename, title, subtitle="", colors=None):
             'light': (236, 240, 241)      # 浅灰
         }
 
-    # 创建画布
-    img = Image.new('RGB', (1200, 600), colors['dark'])
-    draw = ImageDraw.Draw(img)
-
-    # 添加渐变背景
-    gradient = create_gradient_image(
+    # 创建画布：渐变背景铺满整幅，直接在它上面画
+    img = create_gradient_image(
         (1200, 600),
         (30, 40, 50),
         (60, 80, 100),
         'vertical'
     )
-    img.paste(gradient, (0, 0))
+    draw = ImageDraw.Draw(img)
 
     # 添加科技图案
     add_tech_pattern(img, 'grid')
 
-    # 尝试加载字体
-    try:
-        font_title = ImageFont.truetype('arial.ttf', 60)
-        font_subtitle = ImageFont.truetype('arial.ttf', 30)
-        font_small = ImageFont.truetype('arial.ttf', 20)
-    except:
-        font_title = ImageFont.load_default()
-        font_subtitle = ImageFont.load_default()
-        font_small = ImageFont.load_default()
-
-    # 绘制标题背景
+    # 字体
+    font_title = get_font("cjk", 60)
+    font_subtitle = get_font("cjk", 30)
+    font_small = get_font("sans", 20)
+
+    # 绘制标题背景：半透明矩形直接混合到画布上，不另建 RGBA 图层
     title_height = 120
-    title_bg = Image.new('RGBA', (1200, title_height), (0, 0, 0, 100))
-    img.paste(title_bg, (0, 240), title_bg)
+    ImageDraw.Draw(img, 'RGBA').rectangle([(0, 240), (1199, 240 + title_height - 1)],
+                                          fill=(0, 0, 0, 100))
 
     # 绘制主标题
     if '\n' in title:
-        lines = title.split('\n')
-        y_pos = 260
-        for line in lines:
-            text_bbox = draw.textbbox((0, 0), line, font=font_title)
-            text_width = text_bbox[2] - text_bbox[0]
-            x = (1200 - text_width) // 2
-            draw.text((x, y_pos), line, fill=colors['light'], font=font_title)
-            y_pos += 70
+        draw_centered_lines(draw, title, 260, font_title, colors['light'], line_height=70)
     else:
-        text_bbox = draw.textbbox((0, 0), title, font=font_title)
-        text_width = text_bbox[2] - text_bbox[0]
-        x = (1200 - text_width) // 2
-        draw.text((x, 280), title, fill=colors['light'], font=font_title)
+        draw_centered_text(draw, title, 280, font_title, colors['light'])
 
     # 绘制副标题
     if subtitle:
-        text_bbox = draw.textbbox((0, 0), subtitle, font=font_subtitle)
-        text_width = text_bbox[2] - text_bbox[0]
-        x = (1200 - text_width) // 2
-        draw.text((x, 400), subtitle, fill=colors['primary'], font=font_subtitle)
+        draw_centered_text(draw, subtitle, 400, font_subtitle, colors['primary'])
 
     # 添加装饰元素
     draw.rectangle([(50, 50), (150, 150)], outline=colors['primary'], width=3)
@@ -138,39 +100,25 @@ def create_tech_image(filename, title, subtitle="", colors=None):
     ]
     y_pos = 50
     for line in code_lines:
-        draw.text((50, y_pos), line, fill=(255, 255, 255, 80), font=font_small)
+        draw_text(draw, (50, y_pos), line, font_small, (255, 255, 255, 80))
         y_pos += 25
 
-    # 保存图片
-    filepath = os.path.join(os.path.dirname(__file__), filename)
-    img.save(filepath, 'JPEG', quality=95)
-    print(f"创建科技感图片: {filepath}")
-    return filepath
+    return img
 
-def create_chart_image(filename, title, data):
-    """创建图表图片"""
+def render_chart_image(title, data):
+    """绘制图表图片，返回 Image"""
     width, height = 1200, 600
-    img = Image.new('RGB', (width, height), (255, 255, 255))
-    draw = ImageDraw.Draw(img)
 
     # 背景
-    gradient = create_gradient_image((width, height), (240, 240, 240), (255, 255, 255), 'vertical')
-    img.paste(gradient, (0, 0))
-
-    try:
-        font_title = ImageFont.truetype('arial.ttf', 48)
-        font_label = ImageFont.truetype('arial.ttf', 24)
-        font_data = ImageFont.truetype('arial.ttf', 32)
-    except:
-        font_title = ImageFont.load_default()
-        font_label = ImageFont.load_default()
-        font_data = ImageFont.load_default()
+    img = create_gradient_image((width, height), (240, 240, 240), (255, 255, 255), 'vertical')
+    draw = ImageDraw.Draw(img)
+
+    font_title = get_font("cjk", 48)
+    font_label = get_font("cjk", 24)
+    font_data = get_font("cjk", 32)
 
     # 标题
-    text_bbox = draw.textbbox((0, 0), title, font=font_title)
-    text_width = text_bbox[2] - text_bbox[0]
-    x = (width - text_width) // 2
-    draw.text((x, 40), title, fill=(0, 116, 217), font=font_title)
+    draw_centered_text(draw, title, 40, font_title, (0, 116, 217))
 
     # 绘制柱状图
     bar_width = 150
@@ -196,85 +144,28 @@ def create_chart_image(filename, title, data):
 
         # 数值
         value_text = f"{item['value']}x"
-        text_bbox = draw.textbbox((0, 0), value_text, font=font_data)
-        text_width = text_bbox[2] - text_bbox[0]
-        text_x = x + (bar_width - text_width) // 2
-        draw.text((text_x, y - 40), value_text, fill=(0, 0, 0), font=font_data)
+        draw_centered_text(draw, value_text, y - 40, font_data, (0, 0, 0),
+                           width=bar_width, left=x)
 
         # 标签
-        text_bbox = draw.textbbox((0, 0), item['label'], font=font_label)
-        text_width = text_bbox[2] - text_bbox[0]
-        text_x = x + (bar_width - text_width) // 2
-        draw.text((text_x, start_y + 20), item['label'], fill=(0, 0, 0), font=font_label)
-
-    # 保存
-    filepath = os.path.join(os.path.dirname(__file__), filename)
-    img.save(filepath, 'JPEG', quality=95)
-    print(f"创建图表图片: {filepath}")
-    return filepath
-
-# 创建图片配置
-images = [
-    {
-        'filename': 'claude-code-agents-main.jpg',
-        'title': 'Claude Code Agents',
-        'subtitle': 'AI编程助手，重新定义开发效率',
-        'type': 'tech'
-    },
-    {
-        'filename': 'claude-code-architecture.jpg',
-        'title': 'Agent架构',
-        'subtitle': '上下文持久化 + 多代理协作 + MCP协议',
-        'type': 'tech'
-    },
-    {
-        'filename': 'oauth-project-structure.jpg',
-        'title': 'OAuth项目结构',
-        'subtitle': 'FastAPI + PostgreSQL + Redis',
-        'type': 'tech'
-    },
-    {
-        'filename': 'agent-workflow.jpg',
-        'title': '多Agent协作',
-        'subtitle': '架构师 + 后端 + 前端 + 测试 + 安全',
-        'type': 'tech'
-    },
-    {
-        'filename': 'code-comparison.jpg',
-        'title': '开发效率对比',
-        'subtitle': '432倍效率提升',
-        'type': 'chart',
-        'data': [
-            {'label': '传统开发', 'value': 432},
-            {'label': 'Claude Code', 'value': 1}
-        ]
-    },
-    {
-        'filename': 'claude-code-collaboration.jpg',
-        'title': '人机协作',
-        'subtitle': '人类负责创意，AI负责实现',
-        'type': 'tech'
-    }
-]
+        draw_centered_text(draw, item['label'], start_y + 20, font_label, (0, 0, 0),
+                           width=bar_width, left=x)
+
+    return img
+
+# 图片清单（标题、副标题、图表数据、体积上限）见同目录的 images.tech.json
+MANIFEST = os.path.join(os.path.dirname(os.path.abspath(__file__)), "images.tech.json")
 
 def main():
     print("开始创建有视觉冲击力的配图...\n")
 
-    for img_config in images:
-        if img_config['type'] == 'tech':
-            create_tech_image(
-                img_config['filename'],
-                img_config['title'],
-                img_config['subtitle']
-            )
-        elif img_config['type'] == 'chart':
-            create_chart_image(
-                img_config['filename'],
-                img_config['title'],
-                img_config['data']
-            )
-
-    print("\n所有图片创建完成！")
+    # 只重新生成有变化的图片，结果记入 images.tech.lock.json
+    from image_manifest import build
+    result = build(MANIFEST)
+    if result["failed"]:
+        print(f"\n{len(result['failed'])} 张图片生成失败")
+    else:
+        print("\n所有图片创建完成！")
     print("\n新图片特点：")
     print("1. 渐变背景，更有层次感")
     print("2. 科技感网格图案")
@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+下载器本地自检 - 改动 downloader.py 前后跑一遍
+
+在 127.0.0.1 上起一个 ThreadingHTTPServer（HTTP/1.1，支持 keep-alive），
+把仓库里已有的配图当作样本提供下载，全程离线。路径决定服务器的行为:
+
+    /img/<文件名>      正常响应：Content-Length、ETag、Last-Modified，
+                       支持 Range + If-Range（206 / 416）
+    /slow/<文件名>     同上，先等 delay 秒，便于观察并发
+    /cut/<文件名>      第一次只发前面一部分就断开连接，之后正常
+    /gzip/<文件名>     无视 Accept-Encoding，总是 gzip 压缩
+    /stream/<文件名>   不给 Content-Length，发完关闭连接
+    /text/<文件名>     Content-Type 声明为 text/html
+
+服务器记录请求数、TCP 连接数、同时处理的最大请求数以及每个请求的
+Range / Accept-Encoding 头，check 据此核对:
+
+    per-host   每个主机的并发不超过 per_host，且连接被复用
+    resume     中断后留下 .part，再次下载用 Range 续传；文件已变化时从头下载
+    size-cap   声明长度超限、边读边超限、类型不符都在写出文件前失败
+    encoding   请求 identity 编码；服务器仍然压缩时也能下载完整
+    report     批量下载全部样本，核对字节数并打印吞吐量汇总
+
+用法:
+    python download_bench.py check                  # 全部自检
+    python download_bench.py check resume size-cap
+    python download_bench.py serve --port 8000      # 只起样本服务器，手动调试用
+"""
+
+import sys
+import gzip
+import time
+import hashlib
+import argparse
+import tempfile
+import threading
+from pathlib import Path
+from email.utils import formatdate
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+IMAGES_DIR = Path(__file__).resolve().parent
+if str(IMAGES_DIR) not in sys.path:
+    sys.path.insert(0, str(IMAGES_DIR))
+
+from downloader import Downloader, DownloadJob, CHUNK_SIZE, PART_SUFFIX
+
+# /slow/ 每个请求的延迟（秒）与自检用的单主机并发
+DEFAULT_DELAY = 0.2
+DEFAULT_PER_HOST = 2
+
+FIXTURE_TYPES = {".jpg": "image/jpeg", ".png": "image/png"}
+KINDS = ("img", "slow", "cut", "gzip", "stream", "text")
+LAST_MODIFIED = formatdate(1700000000, usegmt=True)
+
+
+def load_fixtures(directory: Path = IMAGES_DIR):
+    """{文件名: 内容}，用目录下已有的 JPEG 作样本"""
+    return {path.name: path.read_bytes() for path in sorted(directory.glob("*.jpg"))}
+
+
+def _etag(body: bytes):
+    return f'"{hashlib.sha1(body).hexdigest()[:16]}"'
+
+
+class _FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        kind, _, name = self.path.lstrip("/").partition("/")
+        body = server.fixtures.get(name)
+        if kind not in KINDS or body is None:
+            self.send_error(404)
+            return
+
+        with server.lock:
+            server.requests += 1
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+            server.ranges.append(self.headers.get("Range"))
+            server.encodings.append(self.headers.get("Accept-Encoding"))
+        try:
+            if kind == "slow":
+                time.sleep(server.delay)
+            self._send(kind, name, body)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def _range_start(self, body: bytes):
+        """Range 生效时返回起始字节，否则 None（If-Range 不匹配时按整个文件发送）"""
+        value = self.headers.get("Range", "")
+        if not value.startswith("bytes=") or not value.endswith("-"):
+            return None
+        if_range = self.headers.get("If-Range")
+        if if_range and if_range not in (_etag(body), LAST_MODIFIED):
+            return None
+        start = value[len("bytes="):-1]
+        return int(start) if start.isdigit() else None
+
+    def _send(self, kind: str, name: str, body: bytes):
+        content_type = "text/html; charset=utf-8" if kind == "text" \
+            else FIXTURE_TYPES.get(Path(name).suffix, "application/octet-stream")
+        headers = {"Content-Type": content_type, "ETag": _etag(body),
+                   "Last-Modified": LAST_MODIFIED, "Accept-Ranges": "bytes"}
+        status, payload = 200, body
+
+        if kind == "gzip":
+            payload = gzip.compress(body)
+            headers["Content-Encoding"] = "gzip"
+        elif kind != "stream":
+            start = self._range_start(body)
+            if start is not None and start >= len(body):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(body)}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            if start is not None:
+                status, payload = 206, body[start:]
+                headers["Content-Range"] = f"bytes {start}-{len(body) - 1}/{len(body)}"
+
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        if kind == "stream":
+            self.send_header("Connection", "close")
+            self.close_connection = True
+        else:
+            self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+
+        with self.server.lock:
+            cut = kind == "cut" and name not in self.server.cut_done
+            self.server.cut_done.add(name)
+        if cut:
+            # 只发整块的一部分再断开，客户端至少能写出一块到 .part
+            self.wfile.write(payload[:max(CHUNK_SIZE, len(payload) // 2 // CHUNK_SIZE * CHUNK_SIZE)])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(payload)
+
+
+class FixtureServer(ThreadingHTTPServer):
+    """后台线程里运行的样本服务器，可用作 with 语句"""
+
+    daemon_threads = True
+
+    def __init__(self, fixtures: dict, delay: float = DEFAULT_DELAY, port: int = 0):
+        super().__init__(("127.0.0.1", port), _FixtureHandler)
+        self.fixtures = dict(fixtures)
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.connections = 0
+        self.active = 0
+        self.max_active = 0
+        self.ranges = []
+        self.encodings = []
+        self.cut_done = set()
+        self._thread = None
+
+    def handle_error(self, request, client_address):
+        # 客户端关闭空闲的 keep-alive 连接、或读到一半主动放弃，都属正常
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    def url(self, kind: str, name: str):
+        return f"http://127.0.0.1:{self.server_port}/{kind}/{name}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+# ---------------------------------------------------------------------------
+# 自检
+# ---------------------------------------------------------------------------
+
+def _leftovers(dest: Path):
+    return [p.name for p in (dest.with_name(dest.name + PART_SUFFIX),
+                             dest.with_name(dest.name + PART_SUFFIX + ".json")) if p.exists()]
+
+
+def check_per_host(fixtures, per_host: int, delay: float):
+    """两个主机各 3*per_host 个慢请求：各自并发恰好到 per_host，连接数不超过 per_host"""
+    problems = []
+    names = list(fixtures)
+    count = per_host * 3
+    with FixtureServer(fixtures, delay) as a, FixtureServer(fixtures, delay) as b, \
+            Downloader(workers=per_host * 4, per_host=per_host, log=None) as dl:
+        jobs = [DownloadJob(f"{label}-{i}", [server.url("slow", names[i % len(names)])])
+                for label, server in (("a", a), ("b", b)) for i in range(count)]
+        start = time.perf_counter()
+        results = dl.fetch_all(jobs)
+        seconds = time.perf_counter() - start
+
+        for r in results:
+            if not r.ok or r.content != fixtures[r.job.urls[0].rsplit("/", 1)[1]]:
+                problems.append(f"{r.name} 下载失败或内容不符: {r.error}")
+        for label, server in (("a", a), ("b", b)):
+            if server.max_active > per_host:
+                problems.append(f"主机 {label} 同时 {server.max_active} 个请求，上限 {per_host}")
+            elif server.max_active < per_host:
+                problems.append(f"主机 {label} 最多只有 {server.max_active} 个并发请求，没有用满 {per_host}")
+            if server.connections > per_host:
+                problems.append(f"主机 {label} {server.requests} 个请求开了 {server.connections} 个连接，"
+                                f"没有复用")
+        # 两个主机互不占名额：总耗时应接近单个主机的 count / per_host 轮
+        rounds = count / per_host
+        if seconds > delay * rounds * 1.8:
+            problems.append(f"耗时 {seconds:.2f}s，预期约 {delay * rounds:.2f}s，主机之间可能互相阻塞")
+    return problems, f"{len(jobs)} 个请求 {seconds:.2f}s，连接 {a.connections}+{b.connections}"
+
+
+def check_resume(fixtures):
+    """断开后 .part 续传；续传前文件变化则 If-Range 失效，从头下载"""
+    problems = []
+    name, body = max(fixtures.items(), key=lambda item: len(item[1]))
+    with tempfile.TemporaryDirectory() as tmp, FixtureServer(fixtures) as server, \
+            Downloader(log=None) as dl:
+        dest = Path(tmp) / name
+        part = dest.with_name(dest.name + PART_SUFFIX)
+        first = dl.fetch(DownloadJob(name, [server.url("cut", name)], str(dest)))
+        offset = part.stat().st_size if part.exists() else 0
+        if first.ok or dest.exists():
+            problems.append("连接中断却报告下载成功")
+        if not offset:
+            problems.append("中断后没有留下 .part")
+
+        second = dl.fetch(DownloadJob(name, [server.url("cut", name)], str(dest)))
+        if not second.ok or second.status != 206:
+            problems.append(f"续传失败: 状态 {second.status}，{second.error}")
+        if server.ranges[-1] != f"bytes={offset}-":
+            problems.append(f"续传请求的 Range 为 {server.ranges[-1]}，预期 bytes={offset}-")
+        if not dest.exists() or dest.read_bytes() != body:
+            problems.append("续传后的文件与原文件不一致")
+        if dl.stats()["resumed"] != 1:
+            problems.append(f"统计的续传数为 {dl.stats()['resumed']}，预期 1")
+        if _leftovers(dest):
+            problems.append(f"续传完成后残留 {_leftovers(dest)}")
+
+        # 文件在两次下载之间变了：If-Range 不匹配，服务器返回 200 整个新文件
+        dest.unlink()
+        changed = "changed-" + name
+        server.fixtures[changed] = body
+        dl.fetch(DownloadJob(changed, [server.url("cut", changed)], str(dest)))
+        server.fixtures[changed] = body[::-1]
+        third = dl.fetch(DownloadJob(changed, [server.url("cut", changed)], str(dest)))
+        if not third.ok or third.status != 200 or dest.read_bytes() != body[::-1]:
+            problems.append(f"文件变化后没有从头下载: 状态 {third.status}，{third.error}")
+    return problems, f"{name} 断在 {offset / 1024:.0f}KB，续传 {(len(body) - offset) / 1024:.0f}KB"
+
+
+def check_size_cap(fixtures):
+    """超过上限或类型不符的响应都应失败，且不留下任何文件"""
+    problems = []
+    name, body = min(fixtures.items(), key=lambda item: len(item[1]))
+    cases = {
+        "img": ("文件过大", len(body) - 1),         # 看 Content-Length 就拒绝
+        "stream": ("超过大小上限", len(body) - 1),  # 没有长度，读到一半才发现
+        "text": ("Content-Type 不符", None),
+    }
+    with tempfile.TemporaryDirectory() as tmp, FixtureServer(fixtures) as server:
+        for kind, (expected, max_bytes) in cases.items():
+            dest = Path(tmp) / f"{kind}-{name}"
+            with Downloader(log=None, max_bytes=max_bytes) as dl:
+                r = dl.fetch(DownloadJob(kind, [server.url(kind, name)], str(dest)))
+            if r.ok or expected not in r.error:
+                problems.append(f"/{kind}/: 预期“{expected}”，实际 {'成功' if r.ok else r.error}")
+            if dest.exists() or _leftovers(dest):
+                problems.append(f"/{kind}/: 失败后残留文件")
+    return problems, f"上限 {len(body) - 1} 字节"
+
+
+def check_encoding(fixtures):
+    """请求头是 identity；服务器仍然 gzip 时，写文件和取内容都应完整"""
+    problems = []
+    name, body = next(iter(fixtures.items()))
+    with tempfile.TemporaryDirectory() as tmp, FixtureServer(fixtures) as server, \
+            Downloader(log=None) as dl:
+        dest = Path(tmp) / name
+        to_file = dl.fetch(DownloadJob(name, [server.url("gzip", name)], str(dest)))
+        in_memory = dl.fetch(DownloadJob(name, [server.url("gzip", name)]))
+        if not to_file.ok or dest.read_bytes() != body:
+            problems.append(f"gzip 响应写文件失败: {to_file.error}")
+        if not in_memory.ok or in_memory.content != body:
+            problems.append(f"gzip 响应取内容失败: {in_memory.error}")
+        if _leftovers(dest):
+            problems.append(f"gzip 响应残留 {_leftovers(dest)}")
+        if set(server.encodings) != {"identity"}:
+            problems.append(f"Accept-Encoding 为 {sorted(set(map(str, server.encodings)))}，预期 identity")
+    return problems, f"{name} {len(body) / 1024:.0f}KB"
+
+
+def check_report(fixtures, per_host: int):
+    """批量下载全部样本，核对统计数字并打印汇总"""
+    problems = []
+    total = sum(len(body) for body in fixtures.values())
+    with tempfile.TemporaryDirectory() as tmp, FixtureServer(fixtures) as server, \
+            Downloader(per_host=per_host, log=None) as dl:
+        jobs = [DownloadJob(name, [server.url("img", name)], str(Path(tmp) / name))
+                for name in fixtures]
+        results = dl.fetch_all(jobs)
+        for r in results:
+            if not r.ok or Path(r.path).read_bytes() != fixtures[r.name]:
+                problems.append(f"{r.name} 下载失败或内容不符: {r.error}")
+        s = dl.stats()
+        if s["bytes"] != total or s["network_bytes"] != total:
+            problems.append(f"统计字节数 {s['bytes']} / 网络 {s['network_bytes']}，预期 {total}")
+        if s["requests"] != len(jobs):
+            problems.append(f"统计请求数 {s['requests']}，预期 {len(jobs)}")
+        if not s["throughput_mb_s"] > 0:
+            problems.append("吞吐量为 0")
+        dl.print_stats()
+    return problems, f"{len(jobs)} 个文件 {total / 1024:.0f}KB"
+
+
+CHECKS = {
+    "per-host": lambda f, args: check_per_host(f, args.per_host, args.delay),
+    "resume": lambda f, args: check_resume(f),
+    "size-cap": lambda f, args: check_size_cap(f),
+    "encoding": lambda f, args: check_encoding(f),
+    "report": lambda f, args: check_report(f, args.per_host),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="用本地 HTTP 样本服务器自检下载器")
+    parser.add_argument("command", choices=["check", "serve"])
+    parser.add_argument("checks", nargs="*", help=f"自检项，默认全部（{', '.join(CHECKS)}）")
+    parser.add_argument("--per-host", type=int, default=DEFAULT_PER_HOST, help="单主机并发")
+    parser.add_argument("--delay", type=float, default=DEFAULT_DELAY, help="/slow/ 的延迟（秒）")
+    parser.add_argument("--port", type=int, default=8000, help="serve 监听的端口")
+    args = parser.parse_args()
+
+    fixtures = load_fixtures()
+    if not fixtures:
+        parser.error(f"{IMAGES_DIR} 下没有可用的样本图片")
+
+    if args.command == "serve":
+        server = FixtureServer(fixtures, args.delay, args.port)
+        print(f"🌐 样本服务器 http://127.0.0.1:{server.server_port}/<{'|'.join(KINDS)}>/<文件名>")
+        for name in fixtures:
+            print(f"   {name}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+        return
+
+    unknown = [c for c in args.checks if c not in CHECKS]
+    if unknown:
+        parser.error(f"未知自检项: {', '.join(unknown)}")
+
+    failures = []
+    for name in args.checks or list(CHECKS):
+        problems, summary = CHECKS[name](fixtures, args)
+        print(f"{'✓' if not problems else '✗'} {name:<10}{summary}")
+        failures.extend(f"{name}: {p}" for p in problems)
+
+    if failures:
+        print("\n❌ 下载器自检失败:")
+        for f in failures:
+            print(f"   {f}")
+        sys.exit(1)
+    print("\n✅ 下载器自检通过")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,11 +4,18 @@
 下载真实场景图片，类似claude-prompt-guide的风格
 """
 
-import requests
 import os
 import json
 from urllib.parse import quote
 
+from downloader import Downloader, DownloadJob
+from http_cache import HttpCache
+from render_core import get_font, text_layout, draw_centered_text
+from jpeg_budget import save_jpeg
+
+# 单张图片体积上限（KB），按预算自动选择 JPEG 质量
+MAX_KB = 100
+
 # Pexels API (免费，需要注册获取API key)
 # 如果没有API key，可以使用下面的列表中的备用图片URL
 
@@ -70,47 +77,22 @@ REALISTIC_IMAGES = [
     }
 ]
 
-def download_image(url, filename):
-    """下载单个图片"""
-    try:
-        # 添加请求头，模拟浏览器访问
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-
-        response = requests.get(url, headers=headers, timeout=15)
-        if response.status_code == 200:
-            filepath = os.path.join(os.path.dirname(__file__), filename)
-            with open(filepath, 'wb') as f:
-                f.write(response.content)
-
-            # 检查文件大小
-            file_size = os.path.getsize(filepath) / 1024  # KB
-            print(f"下载成功: {filename} ({file_size:.1f}KB)")
-            return True
-        else:
-            print(f"下载失败: {filename} - HTTP {response.status_code}")
-    except Exception as e:
-        print(f"下载错误: {filename} - {str(e)}")
-    return False
-
-def download_with_fallback(image_info):
-    """使用备用URL下载图片"""
-    print(f"\n正在下载: {image_info['description']}")
-    print(f"文件名: {image_info['filename']}")
-
-    for i, url in enumerate(image_info['urls'], 1):
-        print(f"尝试 URL {i}/{len(image_info['urls'])}...")
-        if download_image(url, image_info['filename']):
-            return True
-        print("失败，尝试下一个URL...")
-
-    print(f"所有URL都失败了: {image_info['filename']}")
-    return False
+def download_all(images):
+    """并发下载全部图片（每张图依次尝试备用URL），返回下载失败的条目"""
+    jobs = [
+        DownloadJob(info['filename'], info['urls'],
+                    dest=os.path.join(os.path.dirname(__file__), info['filename']))
+        for info in images
+    ]
+    with Downloader(cache=HttpCache()) as downloader:
+        results = downloader.fetch_all(jobs)
+        downloader.print_stats()
+
+    return [info for info, result in zip(images, results) if not result.ok]
 
 def create_placeholder_realistic(filename, title):
     """创建占位图（当所有URL都失败时）"""
-    from PIL import Image, ImageDraw, ImageFont
+    from PIL import Image, ImageDraw
     import random
 
     width, height = 1200, 600
@@ -133,36 +115,26 @@ def create_placeholder_realistic(filename, title):
         y = random.randint(0, height-1)
         draw.point((x, y), fill=(255, 255, 255, random.randint(20, 60)))
 
-    # 尝试加载字体
-    try:
-        font_title = ImageFont.truetype('arial.ttf', 48)
-        font_subtitle = ImageFont.truetype('arial.ttf', 24)
-    except:
-        font_title = ImageFont.load_default()
-        font_subtitle = ImageFont.load_default()
+    # 字体
+    font_title = get_font("cjk", 48)
+    font_subtitle = get_font("cjk", 24)
 
     # 绘制标题
-    text_bbox = draw.textbbox((0, 0), title, font=font_title)
-    text_width = text_bbox[2] - text_bbox[0]
-    x = (width - text_width) // 2
+    layout = text_layout(title, font_title)
+    x = (width - layout.width) // 2
     y = height // 2 - 50
 
-    # 添加阴影效果
-    draw.text((x+2, y+2), title, fill=(0, 0, 0, 128), font=font_title)
-    draw.text((x, y), title, fill=(255, 255, 255), font=font_title)
+    # 添加阴影效果（同一个字形位图盖印两次）
+    layout.draw(draw, (x+2, y+2), (0, 0, 0, 128))
+    layout.draw(draw, (x, y), (255, 255, 255))
 
     # 添加副标题
     subtitle = "图片下载中，请稍后..."
-    text_bbox = draw.textbbox((0, 0), subtitle, font=font_subtitle)
-    text_width = text_bbox[2] - text_bbox[0]
-    x = (width - text_width) // 2
-    y = height // 2 + 20
-
-    draw.text((x, y), subtitle, fill=(200, 200, 200), font=font_subtitle)
+    draw_centered_text(draw, subtitle, height // 2 + 20, font_subtitle, (200, 200, 200))
 
     # 保存图片
     filepath = os.path.join(os.path.dirname(__file__), filename)
-    img.save(filepath, 'JPEG', quality=85)
+    save_jpeg(img, filepath, max_kb=MAX_KB)
     print(f"创建占位图: {filename}")
 
 def main():
@@ -170,18 +142,16 @@ def main():
     print("注：这些图片来自Pexels免费图库")
     print("如果下载失败，将创建占位图\n")
 
-    success_count = 0
     total_count = len(REALISTIC_IMAGES)
-
-    for image_info in REALISTIC_IMAGES:
-        if download_with_fallback(image_info):
-            success_count += 1
-        else:
-            # 如果所有URL都失败，创建占位图
-            create_placeholder_realistic(
-                image_info['filename'],
-                image_info['description']
-            )
+    failed = download_all(REALISTIC_IMAGES)
+    success_count = total_count - len(failed)
+
+    # 如果所有URL都失败，创建占位图
+    for image_info in failed:
+        create_placeholder_realistic(
+            image_info['filename'],
+            image_info['description']
+        )
 
     print(f"\n下载完成！")
     print(f"成功: {success_count}/{total_count}")
@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+并发图片下载 - 各下载脚本共用
+
+特性:
+    - 线程池并发下载，每个主机一个 keep-alive Session（连接复用）
+    - 每个主机单独限流，避免同一图库并发过高被限速
+    - 一个任务可以给多个备用 URL，按顺序尝试直到成功
+    - 可选磁盘缓存（http_cache.HttpCache）：有效期内不发请求，过期后条件
+      请求验证，304 时沿用缓存
+    - 流式下载：分块写入 <dest>.part，完成并核对长度后才改名为 dest，
+      中断不会留下半截文件；再次下载时用 HTTP Range 从断点续传
+    - 请求 identity 编码，长度核对与续传都按原始字节计算；服务器仍然压缩
+      响应时跳过长度核对，也不续传
+    - 大小上限（max_bytes）与 Content-Type 校验（默认只接受 image/*），
+      不符合的响应在读完之前就中止
+    - 汇总下载字节数、耗时与吞吐量
+
+用法:
+    from downloader import Downloader, DownloadJob
+
+    dl = Downloader()
+    results = dl.fetch_all([
+        DownloadJob("a.jpg", [url1, url2], dest="images/a.jpg"),
+        DownloadJob("b.jpg", [url3]),            # 不写文件，结果里带 content
+    ])
+    dl.print_stats()
+
+URL 不做任何假设，测试时可以指向本地 HTTP 服务（见 download_bench.py）。
+"""
+
+import os
+import json
+import time
+import threading
+from pathlib import Path
+from collections import namedtuple
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# 默认并发：总线程数 / 单主机并发
+DEFAULT_WORKERS = 8
+DEFAULT_PER_HOST = 4
+DEFAULT_TIMEOUT = 15
+
+# 单个文件大小上限；只接受的 Content-Type 前缀（None 表示不校验）
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+DEFAULT_ACCEPT_TYPES = ("image/",)
+
+CHUNK_SIZE = 64 * 1024
+PART_SUFFIX = ".part"
+
+# 不要 gzip：图片本身已压缩，而 Content-Length 和 Range 都按传输编码后的字节
+# 计算，与 iter_content 解码后的字节对不上（长度核对、大小上限和续传都会出错）
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                  "(KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Accept-Encoding": "identity",
+}
+
+# name: 任务名（用于日志）；urls: 备用 URL 列表；dest: 保存路径，为 None 时只返回内容
+DownloadJob = namedtuple("DownloadJob", "name urls dest", defaults=(None,))
+
+
+class DownloadError(Exception):
+    """响应不可用：类型不符、超过大小上限、长度不完整"""
+
+
+def is_complete_image(path):
+    """文件存在且能完整解码（截断的 JPEG 会在 load 时报错）"""
+    from PIL import Image
+
+    try:
+        with Image.open(path) as img:
+            img.load()
+        return True
+    except (OSError, SyntaxError, ValueError):
+        return False
+
+
+def _encoded(response):
+    """服务器仍然压缩了响应体（无视 identity）时，头里的长度是压缩后的"""
+    return response.headers.get("Content-Encoding", "identity").strip().lower() != "identity"
+
+
+class DownloadResult:
+    """单个任务的下载结果"""
+
+    def __init__(self, job: DownloadJob):
+        self.job = job
+        self.name = job.name
+        self.ok = False
+        self.url = None          # 最终成功的 URL
+        self.status = None
+        self.content = None      # dest 为 None 时的内容
+        self.path = None
+        self.bytes = 0
+        self.seconds = 0.0
+        self.errors = []         # 每个失败 URL 的原因
+
+    @property
+    def error(self):
+        return self.errors[-1] if self.errors else ""
+
+
+class Downloader:
+    """按主机复用连接、限流的并发下载器（线程安全）"""
+
+    def __init__(self, workers: int = DEFAULT_WORKERS, per_host: int = DEFAULT_PER_HOST,
+                 timeout: float = DEFAULT_TIMEOUT, headers: dict = None, log=print,
+                 cache=None, max_bytes: int = DEFAULT_MAX_BYTES,
+                 accept_types=DEFAULT_ACCEPT_TYPES):
+        self.workers = workers
+        self.per_host = per_host
+        self.timeout = timeout
+        self.headers = dict(DEFAULT_HEADERS, **(headers or {}))
+        self.log = log
+        self.cache = cache
+        self.max_bytes = max_bytes
+        self.accept_types = tuple(accept_types) if accept_types else None
+
+        self._sessions = {}
+        self._slots = {}
+        self._lock = threading.Lock()
+
+        self.total_bytes = 0
+        self.network_bytes = 0
+        self.total_requests = 0
+        self.resumed = 0
+        self.busy_seconds = 0.0
+        self.wall_seconds = 0.0
+
+    def _host(self, url: str):
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+    def _session(self, host: str):
+        """(Session, 信号量)，每个主机一份"""
+        with self._lock:
+            if host not in self._sessions:
+                session = requests.Session()
+                session.headers.update(self.headers)
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.per_host)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._sessions[host] = session
+                self._slots[host] = threading.BoundedSemaphore(self.per_host)
+            return self._sessions[host], self._slots[host]
+
+    @contextmanager
+    def _request(self, url: str, headers: dict = None):
+        """流式请求；读取响应体期间一直占着该主机的并发名额"""
+        session, slot = self._session(self._host(url))
+        with slot:
+            response = session.get(url, timeout=self.timeout, headers=headers, stream=True)
+            with self._lock:
+                self.total_requests += 1
+            try:
+                response.raise_for_status()
+                yield response
+            finally:
+                response.close()
+
+    def _check(self, response, offset: int = 0):
+        """读响应体之前校验类型和声明的长度"""
+        if self.accept_types:
+            content_type = response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+            if not content_type.startswith(self.accept_types):
+                raise DownloadError(f"Content-Type 不符: {content_type or '未声明'}")
+        length = "" if _encoded(response) else response.headers.get("Content-Length", "")
+        if self.max_bytes and length.isdigit() and offset + int(length) > self.max_bytes:
+            raise DownloadError(f"文件过大: {(offset + int(length)) / 1024 / 1024:.1f}MB，"
+                                f"上限 {self.max_bytes / 1024 / 1024:.1f}MB")
+
+    def _chunks(self, response, offset: int = 0):
+        """分块读取响应体，累计超过上限立即中止"""
+        received = offset
+        for chunk in response.iter_content(CHUNK_SIZE):
+            received += len(chunk)
+            with self._lock:
+                self.network_bytes += len(chunk)
+            if self.max_bytes and received > self.max_bytes:
+                raise DownloadError(f"超过大小上限 {self.max_bytes / 1024 / 1024:.1f}MB")
+            yield chunk
+
+    def _expect_length(self, response, offset: int, received: int):
+        """Content-Length 存在时核对收到的字节数（响应体被压缩时无法核对）"""
+        length = "" if _encoded(response) else response.headers.get("Content-Length", "")
+        if length.isdigit() and received != offset + int(length):
+            raise DownloadError(f"下载不完整: {received}/{offset + int(length)} 字节")
+
+    def _get_content(self, url: str):
+        """返回 (内容, 状态码)；有缓存时先查缓存，必要时条件请求"""
+        cached = self.cache.lookup(url) if self.cache else None
+        if cached and cached.fresh:
+            self.cache.touch(cached)
+            return cached.content, "cached"
+
+        with self._request(url, cached.validators() if cached else None) as response:
+            if response.status_code == 304 and cached:
+                self.cache.touch(cached, response.headers, revalidated=True)
+                return cached.content, 304
+            self._check(response)
+            content = b"".join(self._chunks(response))
+            self._expect_length(response, 0, len(content))
+
+        if self.cache:
+            self.cache.store(url, content, response.headers)
+        return content, response.status_code
+
+    def _resume_offset(self, url: str, part: Path):
+        """(已下载字节数, If-Range 校验值)；不能续传时返回 (0, None)"""
+        try:
+            meta = json.loads(part.with_name(part.name + ".json").read_text(encoding="utf-8"))
+            size = part.stat().st_size
+        except (OSError, ValueError):
+            return 0, None
+        validator = meta.get("etag") or meta.get("last_modified")
+        if meta.get("url") != url or not validator or size == 0:
+            return 0, None
+        return size, validator
+
+    def _discard_part(self, part: Path):
+        for path in (part, part.with_name(part.name + ".json")):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+    def _download_to(self, url: str, dest: str, resume: bool = True):
+        """流式下载到 dest，返回 (字节数, 状态码)
+
+        先写 <dest>.part（旁边的 .part.json 记录 URL 和校验值），完整后原子改名；
+        中途断开时保留 .part，下次用 Range + If-Range 续传
+        """
+        dest = Path(dest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        part = dest.with_name(dest.name + PART_SUFFIX)
+
+        cached = self.cache.lookup(url) if self.cache else None
+        if cached and cached.fresh:
+            size = cached.copy_to(dest)
+            self.cache.touch(cached)
+            self._discard_part(part)
+            return size, "cached"
+
+        offset, validator = self._resume_offset(url, part) if resume else (0, None)
+        if offset:
+            headers = {"Range": f"bytes={offset}-", "If-Range": validator}
+        else:
+            headers = cached.validators() if cached else None
+
+        try:
+            received, status, headers = self._stream_to(url, part, headers, offset, cached, dest)
+        except requests.HTTPError as e:
+            # 断点超出文件长度（416）：临时文件已无效，丢弃后从头下载
+            if offset and e.response is not None and e.response.status_code == 416:
+                self._discard_part(part)
+                return self._download_to(url, dest, resume=False)
+            raise
+        if status == 304:
+            return received, status
+
+        os.replace(part, dest)
+        self._discard_part(part)
+        if self.cache:
+            self.cache.store_file(url, dest, headers)
+        return received, status
+
+    def _stream_to(self, url: str, part: Path, headers, offset: int, cached, dest: Path):
+        """发请求并把响应体写进 part，返回 (字节数, 状态码, 响应头)
+
+        304 时直接从缓存拷贝到 dest
+        """
+        with self._request(url, headers) as response:
+            if response.status_code == 304 and cached:
+                size = cached.copy_to(dest)
+                self.cache.touch(cached, response.headers, revalidated=True)
+                self._discard_part(part)
+                return size, 304, response.headers
+
+            # 服务器不支持续传或文件已变化（If-Range 不匹配）时返回 200，从头下载
+            content_range = response.headers.get("Content-Range", "")
+            if response.status_code != 206 or not content_range.startswith(f"bytes {offset}-"):
+                offset = 0
+            self._check(response, offset)
+
+            if offset:
+                with self._lock:
+                    self.resumed += 1
+            elif _encoded(response):
+                # 已写入的是解码后的字节，与服务器按压缩字节计算的 Range 对不上，不续传
+                self._discard_part(part)
+            else:
+                meta = {"url": url, "etag": response.headers.get("ETag"),
+                        "last_modified": response.headers.get("Last-Modified")}
+                part.with_name(part.name + ".json").write_text(json.dumps(meta), encoding="utf-8")
+
+            received = offset
+            try:
+                with open(part, "ab" if offset else "wb") as f:
+                    for chunk in self._chunks(response, offset):
+                        f.write(chunk)
+                        received += len(chunk)
+            except DownloadError:
+                self._discard_part(part)   # 超过上限，不值得续传
+                raise
+            self._expect_length(response, offset, received)
+            return received, response.status_code, response.headers
+
+    def fetch(self, job: DownloadJob):
+        """下载单个任务（依次尝试备用 URL），返回 DownloadResult"""
+        result = DownloadResult(job)
+        start = time.perf_counter()
+
+        for url in job.urls:
+            try:
+                if job.dest:
+                    result.bytes, status = self._download_to(url, job.dest)
+                    result.path = job.dest
+                else:
+                    result.content, status = self._get_content(url)
+                    result.bytes = len(result.content)
+            except (requests.RequestException, DownloadError, OSError) as e:
+                result.errors.append(f"{url}: {e}")
+                continue
+
+            result.ok, result.url, result.status = True, url, status
+            break
+
+        result.seconds = time.perf_counter() - start
+        with self._lock:
+            self.total_bytes += result.bytes
+            self.busy_seconds += result.seconds
+        return result
+
+    def fetch_all(self, jobs):
+        """并发下载全部任务，按任务顺序返回结果"""
+        jobs = list(jobs)
+        if not jobs:
+            return []
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(jobs))) as pool:
+            results = []
+            for result in pool.map(self.fetch, jobs):
+                self._report_one(result)
+                results.append(result)
+        self.wall_seconds += time.perf_counter() - start
+        return results
+
+    def _report_one(self, result: DownloadResult):
+        if not self.log:
+            return
+        if result.ok:
+            self.log(f"✓ {result.name} ({result.bytes / 1024:.1f}KB, {result.seconds:.2f}s)")
+        else:
+            self.log(f"✗ {result.name} 下载失败: {result.error}")
+
+    def stats(self):
+        """累计下载量与吞吐量"""
+        wall = self.wall_seconds or self.busy_seconds
+        stats = {
+            "requests": self.total_requests,
+            "resumed": self.resumed,
+            "bytes": self.total_bytes,
+            "network_bytes": self.network_bytes,
+            "wall_seconds": wall,
+            "throughput_mb_s": self.total_bytes / 1024 / 1024 / wall if wall else 0.0,
+        }
+        if self.cache:
+            stats["cache"] = self.cache.stats()
+        return stats
+
+    def print_stats(self):
+        s = self.stats()
+        print(f"\n📥 下载 {s['bytes'] / 1024 / 1024:.2f}MB / {s['requests']} 个请求，"
+              f"耗时 {s['wall_seconds']:.2f}s，吞吐 {s['throughput_mb_s']:.2f}MB/s")
+        if s["resumed"]:
+            print(f"   断点续传 {s['resumed']} 个文件")
+        if self.cache:
+            c = s["cache"]
+            print(f"   缓存: 命中 {c['hits']} / 验证后沿用 {c['revalidated']} / 未命中 {c['misses']}，"
+                  f"网络传输 {s['network_bytes'] / 1024:.1f}KB")
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+渐变背景 - 各配图脚本共用
+
+颜色用 NumPy 一次算出，再用 Image.fromarray 转成图片，不再逐行调用
+draw.line / draw.rectangle。支持:
+    - 线性渐变（纵向 / 横向），两色或多色
+    - 径向渐变
+
+颜色插值与原先逐行循环的公式一致（同样的浮点运算、同样向下取整），
+输出逐像素相同。
+
+基准测试:
+    python gradients.py
+"""
+
+import time
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+
+def _normalize_stops(stops):
+    """[颜色, ...] 或 [(位置, 颜色), ...] → (位置数组, 颜色数组)
+
+    只给颜色时按等间距分布在 0~1 上
+    """
+    stops = list(stops)
+    if len(stops) < 2:
+        raise ValueError("渐变至少需要两个颜色")
+
+    if isinstance(stops[0][1], (tuple, list)):
+        positions = [p for p, _ in stops]
+        colors = [c for _, c in stops]
+    else:
+        n = len(stops) - 1
+        positions = [i / n for i in range(len(stops))]
+        colors = stops
+
+    return np.asarray(positions, dtype=np.float64), np.asarray(colors, dtype=np.float64)[:, :3]
+
+
+def color_ramp(ratio, stops):
+    """按 ratio（0~1 的数组）在色标间插值，返回 ratio.shape + (3,) 的 uint8 数组"""
+    positions, colors = _normalize_stops(stops)
+    ratio = np.asarray(ratio, dtype=np.float64)
+
+    # 每个 ratio 落在哪一段：positions[k] <= ratio < positions[k+1]
+    k = np.clip(np.searchsorted(positions, ratio, side="right") - 1, 0, len(positions) - 2)
+    t = ((ratio - positions[k]) / (positions[k + 1] - positions[k]))[..., None]
+    rgb = colors[k] * (1 - t) + colors[k + 1] * t
+
+    # 与 int() 一致：向零取整
+    return np.clip(rgb, 0, 255).astype(np.uint8)
+
+
+def linear_gradient(size, stops, direction="vertical"):
+    """线性渐变
+
+    size: (宽, 高)
+    stops: [颜色, ...] 等间距色标，或 [(位置, 颜色), ...]
+    direction: 'vertical' 从上到下，其它值从左到右
+    """
+    width, height = size
+    if direction == "vertical":
+        ramp = color_ramp(np.arange(height) / height, stops)[:, None, :]
+    else:
+        ramp = color_ramp(np.arange(width) / width, stops)[None, :, :]
+
+    # 只生成一行/一列像素，再由 Pillow 在 C 里拉伸到整幅；渐变方向上尺寸
+    # 不变，NEAREST 是逐像素拷贝，结果与整幅数组完全相同，但省掉一次整幅
+    # 数组的内存拷贝
+    strip = Image.fromarray(np.ascontiguousarray(ramp), "RGB")
+    return strip.resize((width, height), Image.Resampling.NEAREST)
+
+
+def radial_gradient(size, stops, center=None, radius=None):
+    """径向渐变，中心为第一个色标
+
+    center: 圆心，默认画布中心
+    radius: 到最后一个色标的距离，默认圆心到最远角的距离
+    """
+    width, height = size
+    cx, cy = center if center is not None else (width / 2, height / 2)
+    if radius is None:
+        radius = max(np.hypot(x - cx, y - cy) for x in (0, width) for y in (0, height))
+
+    ys = np.arange(height, dtype=np.float64)[:, None]
+    xs = np.arange(width, dtype=np.float64)[None, :]
+    ratio = np.minimum(np.hypot(xs - cx, ys - cy) / radius, 1.0)
+    return Image.fromarray(color_ramp(ratio, stops), "RGB")
+
+
+# ---------------------------------------------------------------------------
+# 基准测试
+# ---------------------------------------------------------------------------
+
+def _gradient_by_rows(size, start_color, end_color):
+    """原先逐行画线的实现，仅用于基准对比"""
+    width, height = size
+    image = Image.new("RGB", size)
+    draw = ImageDraw.Draw(image)
+    for y in range(height):
+        ratio = y / height
+        r = int(start_color[0] * (1 - ratio) + end_color[0] * ratio)
+        g = int(start_color[1] * (1 - ratio) + end_color[1] * ratio)
+        b = int(start_color[2] * (1 - ratio) + end_color[2] * ratio)
+        draw.line([(0, y), (width, y)], fill=(r, g, b))
+    return image
+
+
+def _best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def benchmark(sizes=((1200, 600), (1920, 1080)), repeat=20):
+    """对比逐行循环与向量化实现，返回 [{size, loop_ms, numpy_ms, speedup}, ...]"""
+    start_color, end_color = (30, 40, 50), (60, 80, 100)
+    results = []
+    for size in sizes:
+        old = _gradient_by_rows(size, start_color, end_color)
+        new = linear_gradient(size, [start_color, end_color])
+        if old.tobytes() != new.tobytes():
+            raise AssertionError(f"{size} 输出与逐行实现不一致")
+
+        loop = _best_of(lambda: _gradient_by_rows(size, start_color, end_color), repeat)
+        vec = _best_of(lambda: linear_gradient(size, [start_color, end_color]), repeat)
+        results.append({"size": size, "loop_ms": loop * 1000, "numpy_ms": vec * 1000,
+                        "speedup": loop / vec})
+    return results
+
+
+if __name__ == "__main__":
+    print("纵向两色渐变，取多次运行的最快一次:\n")
+    print(f"{'尺寸':<12}{'逐行(ms)':>10}{'NumPy(ms)':>12}{'加速':>8}")
+    for r in benchmark():
+        w, h = r["size"]
+        print(f"{f'{w}x{h}':<12}{r['loop_ms']:>10.2f}{r['numpy_ms']:>12.2f}{r['speedup']:>7.1f}x")
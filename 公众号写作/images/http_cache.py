@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTTP 下载缓存 - 图库照片只下载一次
+
+目录结构:
+    <cache_dir>/entries/<url 的 sha256>.json   URL 元数据（ETag、Last-Modified、过期时间…）
+    <cache_dir>/blobs/<内容的 sha256>           响应体，按内容寻址（相同图片只存一份）
+
+规则:
+    - 仍在有效期内（Cache-Control: max-age / Expires）直接用缓存，不发请求
+    - 过期后带 If-None-Match / If-Modified-Since 重新验证，304 时沿用缓存
+    - Cache-Control: no-store 的响应不缓存
+    - 读取时校验内容哈希，损坏的条目自动丢弃
+    - 大文件可以直接从磁盘入库（store_file）、拷贝到目标位置（copy_to），
+      全程分块读写，不整块读进内存
+    - 总大小超过上限时按最近使用时间淘汰（LRU）
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+import threading
+from pathlib import Path
+from email.utils import parsedate_to_datetime
+
+# 默认缓存目录与上限
+DEFAULT_CACHE_DIR = Path(__file__).parent / ".http_cache"
+DEFAULT_MAX_BYTES = 300 * 1024 * 1024
+
+
+def _atomic_write(path: Path, data: bytes):
+    """写临时文件再替换，进程中途退出也不会留下半个文件"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _atomic_copy(src: Path, dst: Path):
+    """分块拷贝到临时文件再替换"""
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=dst.parent, prefix=".tmp-")
+    os.close(fd)
+    try:
+        shutil.copyfile(src, tmp)
+        os.replace(tmp, dst)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def file_sha256(path: Path, chunk_size: int = 1024 * 1024):
+    """分块计算文件哈希"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _freshness_deadline(headers, now: float):
+    """按响应头算出可以免验证使用到什么时候（时间戳），不能缓存返回 None"""
+    cache_control = {
+        part.split("=", 1)[0].strip().lower(): part.split("=", 1)[1].strip() if "=" in part else ""
+        for part in headers.get("Cache-Control", "").split(",") if part.strip()
+    }
+    if "no-store" in cache_control:
+        return None
+    if "no-cache" in cache_control:
+        return now
+
+    max_age = cache_control.get("max-age", "")
+    if max_age.isdigit():
+        return now + int(max_age)
+
+    expires = headers.get("Expires")
+    if expires:
+        try:
+            return parsedate_to_datetime(expires).timestamp()
+        except (TypeError, ValueError):
+            return now
+    return now
+
+
+class CachedResponse:
+    """缓存中的一条记录；content 用到时才读入内存"""
+
+    def __init__(self, entry: dict, blob: Path):
+        self.entry = entry
+        self.blob = blob
+        self._content = None
+
+    @property
+    def content(self):
+        if self._content is None:
+            self._content = self.blob.read_bytes()
+        return self._content
+
+    def copy_to(self, dest):
+        """把缓存内容原子地拷贝到 dest"""
+        _atomic_copy(self.blob, Path(dest))
+        return self.entry["size"]
+
+    @property
+    def fresh(self):
+        return time.time() < self.entry.get("fresh_until", 0)
+
+    def validators(self):
+        """条件请求头"""
+        headers = {}
+        if self.entry.get("etag"):
+            headers["If-None-Match"] = self.entry["etag"]
+        if self.entry.get("last_modified"):
+            headers["If-Modified-Since"] = self.entry["last_modified"]
+        return headers
+
+
+class HttpCache:
+    """按 URL 缓存响应体（线程安全）"""
+
+    def __init__(self, cache_dir: Path = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.entries_dir = self.cache_dir / "entries"
+        self.blobs_dir = self.cache_dir / "blobs"
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+        self.hits = 0           # 有效期内直接命中
+        self.revalidated = 0    # 304 沿用缓存
+        self.misses = 0
+        self.corrupt = 0
+
+    def _entry_path(self, url: str):
+        return self.entries_dir / f"{hashlib.sha256(url.encode('utf-8')).hexdigest()}.json"
+
+    def lookup(self, url: str):
+        """取缓存记录并校验内容，没有或已损坏返回 None"""
+        path = self._entry_path(url)
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+            blob = self.blobs_dir / entry["sha256"]
+            intact = file_sha256(blob) == entry["sha256"] and entry["url"] == url
+        except (OSError, ValueError, KeyError):
+            return None
+
+        if not intact:
+            with self._lock:
+                self.corrupt += 1
+            self._drop(path)
+            return None
+        return CachedResponse(entry, blob)
+
+    def _drop(self, entry_path: Path):
+        try:
+            entry_path.unlink()
+        except OSError:
+            pass
+
+    def touch(self, cached: CachedResponse, headers=None, revalidated: bool = False):
+        """记录一次使用；304 时按新响应头刷新有效期"""
+        entry = dict(cached.entry)
+        now = time.time()
+        entry["last_used"] = now
+        if headers is not None:
+            fresh_until = _freshness_deadline(headers, now)
+            entry["fresh_until"] = fresh_until if fresh_until is not None else now
+            entry["etag"] = headers.get("ETag") or entry.get("etag")
+            entry["last_modified"] = headers.get("Last-Modified") or entry.get("last_modified")
+        _atomic_write(self._entry_path(entry["url"]),
+                      json.dumps(entry, ensure_ascii=False).encode("utf-8"))
+        with self._lock:
+            if revalidated:
+                self.revalidated += 1
+            else:
+                self.hits += 1
+
+    def store(self, url: str, content: bytes, headers):
+        """保存 200 响应；no-store 或超过缓存上限的不保存"""
+        self._store(url, headers, len(content), lambda: hashlib.sha256(content).hexdigest(),
+                    lambda blob: _atomic_write(blob, content))
+
+    def store_file(self, url: str, path, headers):
+        """保存已经下载到磁盘的响应（分块拷贝，不读进内存）"""
+        path = Path(path)
+        self._store(url, headers, path.stat().st_size, lambda: file_sha256(path),
+                    lambda blob: _atomic_copy(path, blob))
+
+    def _store(self, url: str, headers, size: int, digest_of, write_blob):
+        with self._lock:
+            self.misses += 1
+
+        now = time.time()
+        fresh_until = _freshness_deadline(headers, now)
+        if fresh_until is None or size > self.max_bytes:
+            return
+
+        digest = digest_of()
+        entry = {
+            "url": url,
+            "sha256": digest,
+            "size": size,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "content_type": headers.get("Content-Type"),
+            "fresh_until": fresh_until,
+            "stored_at": now,
+            "last_used": now,
+        }
+        # 持锁写入内容和条目，避免并发淘汰把刚写好、还没有条目引用的内容删掉
+        with self._lock:
+            blob = self.blobs_dir / digest
+            if not blob.exists():
+                write_blob(blob)
+            _atomic_write(self._entry_path(url),
+                          json.dumps(entry, ensure_ascii=False).encode("utf-8"))
+        self.evict()
+
+    def _load_entries(self):
+        entries = []
+        for path in self.entries_dir.glob("*.json"):
+            try:
+                entries.append((path, json.loads(path.read_text(encoding="utf-8"))))
+            except (OSError, ValueError):
+                self._drop(path)
+        return entries
+
+    def evict(self):
+        """按最近使用时间淘汰，直到内容总大小不超过上限；清理无引用的内容文件"""
+        with self._lock:
+            entries = sorted(self._load_entries(), key=lambda e: e[1].get("last_used", 0))
+            sizes = {e["sha256"]: e.get("size", 0) for _, e in entries}
+            refs = {}
+            for _, e in entries:
+                refs[e["sha256"]] = refs.get(e["sha256"], 0) + 1
+
+            total = sum(sizes.values())
+            for path, e in entries:
+                if total <= self.max_bytes:
+                    break
+                self._drop(path)
+                refs[e["sha256"]] -= 1
+                if refs[e["sha256"]] == 0:
+                    total -= sizes[e["sha256"]]
+
+            live = {digest for digest, n in refs.items() if n > 0}
+            if self.blobs_dir.exists():
+                for blob in self.blobs_dir.iterdir():
+                    if blob.name not in live and not blob.name.startswith(".tmp-"):
+                        try:
+                            blob.unlink()
+                        except OSError:
+                            pass
+
+    def stats(self):
+        return {"hits": self.hits, "revalidated": self.revalidated,
+                "misses": self.misses, "corrupt": self.corrupt}
@@ -0,0 +1,533 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+配图性能基准与金标准图片比对 - 改动渲染代码前后跑一遍
+
+两件事:
+    bench   按真实尺寸给每个生成函数计时，记录每秒次数和峰值内存，写入
+            bench/history.jsonl；与本机最近几次记录的中位数相比，变慢或
+            内存增长超过阈值即失败
+    check   渲染每个用例，与 bench/golden/ 下的金标准图片做感知比对
+            （SSIM + pHash），差异超出容差即失败；确认改动无误后用
+            update-golden 更新金标准
+
+全程离线：需要联网的生成函数（照片合成）改用仓库里已有的照片作输入。
+每个用例执行前用用例名重置 random 种子，输出可复现。
+
+计时在独立的子进程中进行，互不影响：先测第一次调用的峰值内存增量
+（Linux 上通过 /proc/self/clear_refs 重置峰值，其它平台用 ru_maxrss 近似），
+再重复调用至少 MIN_SECONDS 秒，以最快一次作为成绩（中位数另外记录），
+比中位数更不容易受机器上其它负载影响。虚拟机上偶尔仍有整体变慢的时候，
+疑似回归的用例会再重测 CONFIRM_RUNS 次并取最好成绩，仍超出阈值才判定为
+回归。
+
+金标准按 GOLDEN_WIDTH 缩小后保存，同时记录渲染时用的字体。字体不同时
+（比如 Windows 与 Linux）文字形状必然不同，默认跳过比对并提示，--strict
+时照常比对。
+
+用法:
+    python image_bench.py list                       # 列出用例
+    python image_bench.py bench                      # 计时并与历史比较
+    python image_bench.py bench tech hybrid-overlay --threshold 0.1
+    python image_bench.py check                      # 金标准比对
+    python image_bench.py update-golden              # 重新生成金标准
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import statistics
+import multiprocessing
+from pathlib import Path
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+IMAGES_DIR = Path(__file__).resolve().parent
+if str(IMAGES_DIR) not in sys.path:
+    sys.path.insert(0, str(IMAGES_DIR))
+
+BENCH_DIR = IMAGES_DIR / "bench"
+GOLDEN_DIR = BENCH_DIR / "golden"
+GOLDEN_INDEX = GOLDEN_DIR / "golden.json"
+HISTORY_FILE = BENCH_DIR / "history.jsonl"
+
+# 照片合成用的本地照片（代替图库下载）
+FIXTURE_PHOTO = IMAGES_DIR / "claude-prompt-guide" / "01-main-image.jpg"
+
+# 计时：每个用例至少重复这么久、这么多次
+MIN_SECONDS = 1.0
+MIN_RUNS = 3
+MAX_RUNS = 1000
+
+# 回归判定：与最近 BASELINE_RUNS 次记录的中位数比较
+BASELINE_RUNS = 5
+DEFAULT_THRESHOLD = 0.25
+CONFIRM_RUNS = 2
+MEMORY_SLACK_MB = 2.0
+
+# 金标准比对：整体 SSIM 与最差局部窗口的 SSIM 都要达标（局部改一行字，
+# 整体 SSIM 几乎不变，只有局部窗口能发现）
+GOLDEN_WIDTH = 400
+SSIM_MIN = 0.99
+SSIM_TILE = 32
+SSIM_TILE_MIN = 0.95
+PHASH_MAX_DISTANCE = 6
+
+
+# ---------------------------------------------------------------------------
+# 用例：每个函数做准备工作（导入、读入输入），返回被计时的无参函数
+# ---------------------------------------------------------------------------
+
+def _load_sleepless():
+    import importlib.util
+    path = IMAGES_DIR / "sleepless-agent" / "generate_images.py"
+    spec = importlib.util.spec_from_file_location("sleepless_agent_images", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _fixture_photo(size=(1200, 600)):
+    from photo_ingest import ingest
+    return ingest(FIXTURE_PHOTO.read_bytes(), size)
+
+
+def case_gradient():
+    from gradients import linear_gradient
+    return lambda: linear_gradient((1920, 1080), [(10, 20, 40), (60, 90, 160)])
+
+
+def _manifest_spec(manifest, template):
+    """清单里第一个用到 template 的条目"""
+    from image_manifest import load_manifest
+    _, specs = load_manifest(manifest)
+    return next(s for s in specs if s["template"] == template)
+
+
+def case_tech():
+    from create_better_images import MANIFEST, render_tech_image
+    cfg = _manifest_spec(MANIFEST, "tech")
+    return lambda: render_tech_image(cfg["title"], cfg["subtitle"])
+
+
+def case_chart():
+    from create_better_images import MANIFEST, render_chart_image
+    cfg = _manifest_spec(MANIFEST, "chart")
+    return lambda: render_chart_image(cfg["title"], cfg["data"])
+
+
+def case_custom():
+    from download_pro_images import render_custom_image
+    return lambda: render_custom_image("Claude Code Agents", "AI驱动的编程革命")
+
+
+def case_placeholder():
+    from download_images import render_placeholder_image
+    return lambda: render_placeholder_image("Claude Code 架构图", (800, 400), "architecture.jpg")
+
+
+def case_photo_ingest():
+    from photo_ingest import ingest
+    data = FIXTURE_PHOTO.read_bytes()
+    return lambda: ingest(data, (1200, 600))
+
+
+def case_hybrid_overlay():
+    from create_hybrid_images import MANIFEST, add_tech_overlay
+    photo = _fixture_photo()
+    spec = _manifest_spec(MANIFEST, "hybrid")
+    info = {k: spec[k] for k in ("title", "subtitle", "code_snippets")}
+    return lambda: add_tech_overlay(photo, info)
+
+
+def case_jpeg_budget():
+    from create_better_images import MANIFEST, render_tech_image
+    from jpeg_budget import fit_jpeg
+    cfg = _manifest_spec(MANIFEST, "tech")
+    img = render_tech_image(cfg["title"], cfg["subtitle"])
+    return lambda: fit_jpeg(img, 150 * 1024)[0]
+
+
+def _sleepless_case(func_name):
+    def case():
+        return getattr(_load_sleepless(), func_name)
+    case.__name__ = f"case_sleepless_{func_name}"
+    return case
+
+
+# 用例名 → (准备函数, 说明)；名字也是金标准图片的文件名
+CASES = {
+    "gradient": (case_gradient, "linear_gradient 1920x1080"),
+    "tech": (case_tech, "render_tech_image 1200x600"),
+    "chart": (case_chart, "render_chart_image 1200x600"),
+    "custom": (case_custom, "render_custom_image 1200x600"),
+    "placeholder": (case_placeholder, "render_placeholder_image 800x400"),
+    "photo-ingest": (case_photo_ingest, "photo_ingest.ingest 1200x630 → 1200x600"),
+    "hybrid-overlay": (case_hybrid_overlay, "add_tech_overlay 1200x600"),
+    "jpeg-budget": (case_jpeg_budget, "fit_jpeg 1200x600 ≤150KB"),
+}
+for _name in ("create_main_cover", "create_multi_agent_workflow", "create_quickstart_guide",
+              "create_scenarios", "create_conclusion"):
+    CASES[f"sleepless-{_name[len('create_'):].replace('_', '-')}"] = (
+        _sleepless_case(_name), f"sleepless-agent {_name} 1920x1080")
+
+
+def _prepare(name: str):
+    random.seed(name)
+    fn = CASES[name][0]()
+
+    def run():
+        random.seed(name)
+        return fn()
+    return run
+
+
+# ---------------------------------------------------------------------------
+# 峰值内存
+# ---------------------------------------------------------------------------
+
+def _proc_status_mb(key: str):
+    try:
+        match = re.search(rf"^{key}:\s+(\d+) kB", Path("/proc/self/status").read_text(), re.M)
+        return int(match.group(1)) / 1024 if match else None
+    except OSError:
+        return None
+
+
+def _reset_peak():
+    """重置本进程的峰值内存记录，成功返回 True（仅 Linux）"""
+    try:
+        Path("/proc/self/clear_refs").write_text("5")
+        return True
+    except OSError:
+        return False
+
+
+def _max_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Linux 单位是 KB，macOS 是字节
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+def _measure_peak_mb(fn):
+    """执行一次 fn，返回 (结果, 峰值内存增量 MB)；取不到为 None"""
+    if _reset_peak():
+        before = _proc_status_mb("VmRSS")
+        value = fn()
+        peak = _proc_status_mb("VmHWM")
+        return value, (peak - before if peak is not None and before is not None else None)
+
+    # 退而求其次：ru_maxrss 只增不减，准备阶段的峰值可能盖过这次调用
+    before = _max_rss_mb()
+    value = fn()
+    after = _max_rss_mb()
+    return value, (after - before if after is not None and before is not None else None)
+
+
+# ---------------------------------------------------------------------------
+# 计时
+# ---------------------------------------------------------------------------
+
+def _bench_case(name: str):
+    """在子进程中执行：准备用例、测峰值内存、重复计时"""
+    run = _prepare(name)
+    _, peak_mb = _measure_peak_mb(run)
+
+    times = []
+    deadline = time.perf_counter() + MIN_SECONDS
+    while len(times) < MIN_RUNS or (time.perf_counter() < deadline and len(times) < MAX_RUNS):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+
+    best = min(times)
+    return {"ms": best * 1000, "median_ms": statistics.median(times) * 1000,
+            "ops_per_sec": 1 / best if best else None, "peak_mb": peak_mb, "runs": len(times)}
+
+
+def _machine():
+    return {"host": platform.node(), "machine": platform.machine(),
+            "cpus": os.cpu_count(), "python": platform.python_version()}
+
+
+def run_bench(names):
+    """逐个用例在新的子进程里计时，返回 {用例: 结果}"""
+    ctx = multiprocessing.get_context("spawn")
+    results = {}
+    for name in names:
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            results[name] = pool.submit(_bench_case, name).result()
+        r = results[name]
+        peak = f"{r['peak_mb']:.1f}MB" if r["peak_mb"] is not None else "-"
+        print(f"   {name:<32}{r['ms']:>9.2f}ms{r['ops_per_sec']:>10.1f}/s{peak:>10}")
+    return results
+
+
+def read_history():
+    try:
+        lines = HISTORY_FILE.read_text(encoding="utf-8").splitlines()
+    except OSError:
+        return []
+    history = []
+    for line in lines:
+        try:
+            history.append(json.loads(line))
+        except ValueError:
+            continue
+    return history
+
+
+def baseline(history, machine: dict, runs: int = BASELINE_RUNS):
+    """本机最近 runs 次记录里每个用例的中位数 {用例: {"ops_per_sec", "peak_mb"}}"""
+    same = [h for h in history
+            if h.get("machine", {}).get("host") == machine["host"]
+            and h.get("machine", {}).get("cpus") == machine["cpus"]]
+    base = {}
+    for name in {n for h in same for n in h.get("cases", {})}:
+        recent = [h["cases"][name] for h in same if name in h.get("cases", {})][-runs:]
+        base[name] = {}
+        for key in ("ops_per_sec", "peak_mb"):
+            values = [r[key] for r in recent if r.get(key) is not None]
+            base[name][key] = statistics.median(values) if values else None
+    return base
+
+
+def find_regressions(results, base, threshold: float):
+    """返回 [(用例, 说明), ...]；速度下降或内存增长超过 threshold（比例）算回归"""
+    problems = []
+    for name, r in results.items():
+        b = base.get(name)
+        if not b:
+            continue
+        if b["ops_per_sec"] and r["ops_per_sec"] < b["ops_per_sec"] * (1 - threshold):
+            problems.append((name, f"{name}: {r['ops_per_sec']:.1f}/s，基线 {b['ops_per_sec']:.1f}/s "
+                                   f"(-{(1 - r['ops_per_sec'] / b['ops_per_sec']) * 100:.0f}%)"))
+        if b["peak_mb"] is not None and r["peak_mb"] is not None and \
+                r["peak_mb"] > b["peak_mb"] * (1 + threshold) + MEMORY_SLACK_MB:
+            problems.append((name, f"{name}: 峰值内存 {r['peak_mb']:.1f}MB，基线 {b['peak_mb']:.1f}MB"))
+    return problems
+
+
+def _best_of(a, b):
+    """同一用例两次测量合并：时间取快的，内存取小的"""
+    merged = min(a, b, key=lambda r: r["ms"])
+    peaks = [r["peak_mb"] for r in (a, b) if r["peak_mb"] is not None]
+    return {**merged, "peak_mb": min(peaks) if peaks else None}
+
+
+def confirm_regressions(results, base, threshold: float, attempts: int = CONFIRM_RUNS):
+    """疑似回归的用例重测，成绩取最好的一次，返回仍然回归的说明"""
+    problems = find_regressions(results, base, threshold)
+    for _ in range(attempts):
+        suspects = sorted({name for name, _ in problems})
+        if not suspects:
+            break
+        print(f"\n🔁 重测疑似回归: {', '.join(suspects)}")
+        for name, r in run_bench(suspects).items():
+            results[name] = _best_of(results[name], r)
+        problems = find_regressions(results, base, threshold)
+    return [message for _, message in problems]
+
+
+def append_history(results, machine: dict):
+    BENCH_DIR.mkdir(parents=True, exist_ok=True)
+    import PIL
+    record = {"time": datetime.now().isoformat(timespec="seconds"), "machine": machine,
+              "pillow": PIL.__version__, "numpy": np.__version__, "cases": results}
+    with open(HISTORY_FILE, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+# ---------------------------------------------------------------------------
+# 感知比对
+# ---------------------------------------------------------------------------
+
+def thumbnail(img, width: int = GOLDEN_WIDTH):
+    """比对用的缩略图（RGB，按宽度等比缩小）"""
+    img = img.convert("RGB")
+    height = max(1, round(img.size[1] * width / img.size[0]))
+    return img.resize((width, height), Image.Resampling.LANCZOS)
+
+
+def _box_mean(a, k: int):
+    """k×k 窗口均值（积分图），输出比输入小 k-1"""
+    s = np.pad(a, ((1, 0), (1, 0))).cumsum(0).cumsum(1)
+    return (s[k:, k:] - s[:-k, k:] - s[k:, :-k] + s[:-k, :-k]) / (k * k)
+
+
+def ssim(a, b, window: int = 7, tile: int = SSIM_TILE):
+    """两张同尺寸图片灰度的 SSIM，返回 (整体均值, 最差的 tile×tile 局部均值)
+
+    1 表示完全相同；局部窗口以半个 tile 为步长滑动
+    """
+    x = np.asarray(a.convert("L"), dtype=np.float64)
+    y = np.asarray(b.convert("L"), dtype=np.float64)
+    c1, c2 = (0.01 * 255) ** 2, (0.03 * 255) ** 2
+
+    mx, my = _box_mean(x, window), _box_mean(y, window)
+    vx = _box_mean(x * x, window) - mx * mx
+    vy = _box_mean(y * y, window) - my * my
+    cov = _box_mean(x * y, window) - mx * my
+    score = ((2 * mx * my + c1) * (2 * cov + c2)) / ((mx * mx + my * my + c1) * (vx + vy + c2))
+
+    h, w = score.shape
+    step = max(1, tile // 2)
+    worst = min((score[i:i + tile, j:j + tile].mean()
+                 for i in range(0, max(1, h - tile + 1), step)
+                 for j in range(0, max(1, w - tile + 1), step)), default=score.mean())
+    return float(score.mean()), float(worst)
+
+
+def _dct_matrix(n: int):
+    k = np.arange(n)
+    m = np.cos(np.pi * (2 * k[None, :] + 1) * k[:, None] / (2 * n))
+    m[0] /= np.sqrt(2)
+    return m
+
+
+def phash(img):
+    """64 位感知哈希（32x32 灰度 DCT 的低频 8x8，去掉直流分量后按中位数二值化）"""
+    pixels = np.asarray(img.convert("L").resize((32, 32), Image.Resampling.LANCZOS),
+                        dtype=np.float64)
+    m = _dct_matrix(32)
+    low = (m @ pixels @ m.T)[:8, :8].flatten()[1:]
+    bits = low > np.median(low)
+    return f"{int(''.join('1' if v else '0' for v in bits), 2):016x}"
+
+
+def phash_distance(h1: str, h2: str):
+    return bin(int(h1, 16) ^ int(h2, 16)).count("1")
+
+
+def _fonts():
+    from render_core import FONT_FACES, find_font
+    return {role: os.path.basename(find_font(role) or "") for role in FONT_FACES}
+
+
+def _golden_names():
+    return [name for name in CASES if name != "jpeg-budget"]
+
+
+def render_case(name: str):
+    return _prepare(name)()
+
+
+def read_golden():
+    try:
+        return json.loads(GOLDEN_INDEX.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {"fonts": None, "cases": {}}
+
+
+def update_golden(names):
+    index = read_golden()
+    fonts = _fonts()
+    if index.get("fonts") and index["fonts"] != fonts:
+        print(f"⚠️ 字体与原金标准不同，全部用例都应重新生成: {index['fonts']} → {fonts}")
+    index["fonts"] = fonts
+    GOLDEN_DIR.mkdir(parents=True, exist_ok=True)
+    for name in names:
+        img = render_case(name)
+        thumb = thumbnail(img)
+        thumb.save(GOLDEN_DIR / f"{name}.png", optimize=True)
+        index["cases"][name] = {"size": list(img.size), "phash": phash(thumb)}
+        print(f"   ✓ {name} {img.size[0]}x{img.size[1]}")
+    GOLDEN_INDEX.write_text(json.dumps(index, ensure_ascii=False, indent=2, sort_keys=True) + "\n",
+                            encoding="utf-8")
+
+
+def check_golden(names, strict: bool = False):
+    """返回 [失败说明, ...]"""
+    index = read_golden()
+    fonts = _fonts()
+    if index.get("fonts") != fonts and not strict:
+        print(f"⚠️ 本机字体 {fonts} 与金标准 {index.get('fonts')} 不同，跳过比对（--strict 强制比对）")
+        return []
+
+    failures = []
+    for name in names:
+        expected = index["cases"].get(name)
+        golden_path = GOLDEN_DIR / f"{name}.png"
+        if not expected or not golden_path.exists():
+            failures.append(f"{name}: 没有金标准，先运行 update-golden")
+            continue
+
+        img = render_case(name)
+        if list(img.size) != expected["size"]:
+            failures.append(f"{name}: 尺寸 {img.size} ≠ {tuple(expected['size'])}")
+            continue
+        thumb = thumbnail(img)
+        score, worst = ssim(thumb, Image.open(golden_path))
+        distance = phash_distance(phash(thumb), expected["phash"])
+        ok = score >= SSIM_MIN and worst >= SSIM_TILE_MIN and distance <= PHASH_MAX_DISTANCE
+        print(f"   {'✓' if ok else '✗'} {name:<32}SSIM {score:.4f}  局部最低 {worst:.4f}"
+              f"  pHash 距离 {distance}")
+        if not ok:
+            failures.append(f"{name}: SSIM {score:.4f}（下限 {SSIM_MIN}），局部最低 {worst:.4f}"
+                            f"（下限 {SSIM_TILE_MIN}），pHash 距离 {distance}（上限 {PHASH_MAX_DISTANCE}）")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="配图生成函数的性能基准与金标准比对")
+    parser.add_argument("command", choices=["list", "bench", "check", "update-golden"])
+    parser.add_argument("cases", nargs="*", help="用例名，默认全部")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"回归阈值（比例，默认 {DEFAULT_THRESHOLD}）")
+    parser.add_argument("--no-record", action="store_true", help="bench 结果不写入历史")
+    parser.add_argument("--strict", action="store_true", help="字体不同时也比对金标准")
+    args = parser.parse_args()
+
+    unknown = [c for c in args.cases if c not in CASES]
+    if unknown:
+        parser.error(f"未知用例: {', '.join(unknown)}")
+
+    if args.command == "list":
+        for name, (_, description) in CASES.items():
+            print(f"{name:<32}{description}")
+        return
+
+    if args.command == "bench":
+        names = args.cases or list(CASES)
+        machine = _machine()
+        print(f"⏱️ {len(names)} 个用例（{machine['host']}，{machine['cpus']} 核）\n")
+        results = run_bench(names)
+        problems = confirm_regressions(results, baseline(read_history(), machine), args.threshold)
+        if not args.no_record:
+            append_history(results, machine)
+        if problems:
+            print(f"\n❌ 性能回归（阈值 {args.threshold:.0%}）:")
+            for p in problems:
+                print(f"   {p}")
+            sys.exit(1)
+        print("\n✅ 没有性能回归")
+        return
+
+    names = args.cases or _golden_names()
+    if args.command == "update-golden":
+        update_golden(names)
+        return
+
+    failures = check_golden(names, args.strict)
+    if failures:
+        print("\n❌ 与金标准不一致:")
+        for f in failures:
+            print(f"   {f}")
+        sys.exit(1)
+    print("\n✅ 与金标准一致")
+
+
+if __name__ == "__main__":
+    main()
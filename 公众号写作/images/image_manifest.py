@@ -0,0 +1,451 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+配图清单与增量构建 - 只重新生成有变化的图片
+
+每个文章配图目录放一个 images.json:
+
+    {
+      "defaults": {"max_kb": 150},
+      "images": [
+        {"output": "main.jpg", "template": "tech",
+         "title": "Claude Code Agents", "subtitle": "AI编程助手"},
+        {"output": "chart.jpg", "template": "chart", "title": "效率对比",
+         "data": [{"label": "传统开发", "value": 432}, {"label": "Claude Code", "value": 1}]},
+        {"output": "cover.jpg", "template": "hybrid", "source": "https://.../photo.jpeg",
+         "title": "Agent Workflow", "subtitle": "并行开发流程", "code_snippets": ["..."],
+         "focal": [0.5, 0.4]},
+        {"output": "photo.jpg", "template": "photo", "source": "raw/photo.jpg"}
+      ]
+    }
+
+    output    输出文件名（相对清单所在目录）
+    template  模板名，见 TEMPLATES；photo 表示原样保存来源图片；
+              也可以是 "脚本:函数"，指清单目录下某个脚本里返回 Image 的函数
+              （比如 "generate_images:create_main_cover"）
+    source    来源照片：URL（经 HTTP 缓存下载）或相对清单目录的本地路径
+    max_kb    JPEG 体积上限（KB），按预算搜索质量，见 jpeg_budget；photo 模板
+              的来源超过上限时重新编码，不超过时原样保存
+    subsampling  配合 max_kb 的色度抽样：4:2:0（默认）、4:4:4、4:2:2、auto
+    quality   不给 max_kb 时的 JPEG/WebP 质量，默认 95
+    variants  额外输出的尺寸/格式，如 {"widths": [600, 1200], "formats": ["webp", "avif"]}，
+              见 variants.save_variants
+    description / keywords  说明、找图关键词，只给人看，不传给模板
+    其余字段原样作为参数传给模板函数
+
+同一目录里有几套风格（输出文件名相同）时，每套一个清单，命名为
+images.<风格>.json，锁文件对应 images.<风格>.lock.json。
+
+构建时为每张图计算四个指纹，写入 images.lock.json:
+    spec    该条目（合并 defaults 后）的内容
+    code    模板函数所在模块及其引用的本目录模块的源码
+    fonts   各字体角色解析到的字体文件（路径、大小、修改时间）
+    source  来源照片内容
+任何一个变化、输出文件缺失或被改动过，才重新生成。锁文件里有本机字体路径，
+不入库（见 .gitignore），新检出的仓库第一次构建会全部重建。
+
+用法:
+    python image_manifest.py claude-skills            # 构建目录下的 images.json
+    python image_manifest.py images.json --dry-run    # 只列出需要重建的图片
+    python image_manifest.py . --force                # 全部重建
+    python image_manifest.py images.tech.json         # 构建同目录的另一套风格
+"""
+
+import os
+import sys
+import json
+import time
+import types
+import hashlib
+import argparse
+import importlib
+import importlib.util
+from io import BytesIO
+from pathlib import Path
+
+IMAGES_DIR = Path(__file__).resolve().parent
+if str(IMAGES_DIR) not in sys.path:
+    sys.path.insert(0, str(IMAGES_DIR))
+
+from render_core import FONT_FACES, find_font
+from render_jobs import RenderTask, run_render_jobs, print_render_report
+from jpeg_budget import fit_jpeg
+from variants import save_variants, sidecar_path
+
+MANIFEST_NAME = "images.json"
+
+DEFAULT_QUALITY = 95
+
+# 模板名 → "模块:函数"，函数返回 PIL Image
+TEMPLATES = {
+    "tech": "create_better_images:render_tech_image",
+    "chart": "create_better_images:render_chart_image",
+    "custom": "download_pro_images:render_custom_image",
+    "placeholder": "download_images:render_placeholder_image",
+    "hybrid": "create_hybrid_images:render_hybrid_image",   # 需要 source
+    "photo": None,                                           # 原样保存 source
+}
+
+# 不传给模板函数的字段
+RESERVED_KEYS = {"output", "template", "source", "quality", "max_kb", "subsampling", "variants",
+                 "description", "keywords"}
+
+
+class ManifestError(Exception):
+    """清单格式错误"""
+
+
+def _sha256(data: bytes):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _json_hash(obj):
+    return _sha256(json.dumps(obj, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+
+
+def _is_local_template(template):
+    """"脚本:函数" 形式的模板，函数在清单目录下的脚本里"""
+    return isinstance(template, str) and template not in TEMPLATES and ":" in template
+
+
+def manifest_file(path):
+    """清单文件路径：传目录时取其中的 images.json"""
+    path = Path(path)
+    return path / MANIFEST_NAME if path.is_dir() else path
+
+
+def lock_file(manifest_path):
+    """清单对应的锁文件：images.json → images.lock.json，images.tech.json → images.tech.lock.json"""
+    return manifest_file(manifest_path).with_suffix(".lock.json")
+
+
+def load_manifest(path: Path):
+    """读取清单，返回 (清单目录, 合并了 defaults 的条目列表)"""
+    path = manifest_file(path)
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as e:
+        raise ManifestError(f"无法读取清单 {path}: {e}")
+
+    defaults = data.get("defaults", {})
+    specs, seen = [], set()
+    for i, item in enumerate(data.get("images", [])):
+        spec = dict(defaults, **item)
+        if not spec.get("output"):
+            raise ManifestError(f"第 {i + 1} 项缺少 output")
+        template = spec.get("template")
+        if _is_local_template(template):
+            script = path.parent / f"{template.split(':', 1)[0]}.py"
+            if not script.is_file():
+                raise ManifestError(f"{spec['output']}: 模板脚本不存在 {script}")
+        elif template not in TEMPLATES:
+            raise ManifestError(f"{spec['output']}: 未知模板 {spec.get('template')!r}，"
+                                f"可选 {', '.join(TEMPLATES)}")
+        if (spec["template"] in ("hybrid", "photo")) and not spec.get("source"):
+            raise ManifestError(f"{spec['output']}: 模板 {spec['template']} 需要 source")
+        if spec["output"] in seen:
+            raise ManifestError(f"{spec['output']}: 输出重复")
+        seen.add(spec["output"])
+        specs.append(spec)
+    return path.parent, specs
+
+
+# ---------------------------------------------------------------------------
+# 指纹
+# ---------------------------------------------------------------------------
+
+def _load_script(path: Path):
+    """按路径导入清单目录下的脚本（同一路径只导入一次）"""
+    path = path.resolve()
+    name = f"_manifest_{hashlib.sha256(str(path).encode('utf-8')).hexdigest()[:12]}_{path.stem}"
+    if name not in sys.modules:
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        try:
+            spec.loader.exec_module(module)
+        except BaseException:
+            del sys.modules[name]
+            raise
+    return sys.modules[name]
+
+
+def _template_function(template: str, manifest_dir=None):
+    if _is_local_template(template):
+        script, func_name = template.split(":", 1)
+        module = _load_script(Path(manifest_dir) / f"{script}.py")
+    else:
+        module_name, func_name = TEMPLATES[template].split(":")
+        module = importlib.import_module(module_name)
+    return module, getattr(module, func_name)
+
+
+def _local_modules(module, seen=None, roots=None):
+    """模块本身及其（递归）引用的、位于本目录（或模板脚本目录）下的模块"""
+    seen = seen if seen is not None else {}
+    path = getattr(module, "__file__", None)
+    if not path or module.__name__ in seen:
+        return seen
+    if roots is None:
+        roots = {IMAGES_DIR, Path(path).resolve().parent}
+    if Path(path).resolve().parent not in roots:
+        return seen
+    seen[module.__name__] = Path(path).resolve()
+
+    for value in vars(module).values():
+        if isinstance(value, types.ModuleType):
+            dep = value
+        else:
+            dep = sys.modules.get(getattr(value, "__module__", None) or "")
+        if dep is not None:
+            _local_modules(dep, seen, roots)
+    return seen
+
+
+_code_hashes = {}
+
+
+def code_fingerprint(template: str, manifest_dir=None):
+    """模板源码指纹（含它用到的 gradients、render_core 等本目录模块）"""
+    key = (template, str(manifest_dir) if _is_local_template(template) else None)
+    if key not in _code_hashes:
+        if template == "photo":
+            _code_hashes[key] = _sha256(b"photo")
+        else:
+            module, _ = _template_function(template, manifest_dir)
+            files = sorted(_local_modules(module).values())
+            digest = hashlib.sha256()
+            for f in files:
+                digest.update(f.name.encode("utf-8"))
+                digest.update(f.read_bytes())
+            _code_hashes[key] = digest.hexdigest()
+    return _code_hashes[key]
+
+
+def fonts_fingerprint():
+    """各字体角色解析结果的指纹；换字体或字体文件更新都会改变"""
+    fonts = {}
+    for role in FONT_FACES:
+        path = find_font(role)
+        if path:
+            st = os.stat(path)
+            fonts[role] = [path, st.st_size, st.st_mtime_ns]
+        else:
+            fonts[role] = None
+    return _json_hash(fonts)
+
+
+def fetch_sources(manifest_dir: Path, specs):
+    """读取全部来源照片，返回 ({source: 字节}, {source: 错误})；URL 经 HTTP 缓存并发下载
+
+    某张来源取不到只影响用到它的条目，不中断整个构建
+    """
+    from downloader import Downloader, DownloadJob
+    from http_cache import HttpCache
+
+    sources, errors, urls = {}, {}, []
+    for spec in specs:
+        source = spec.get("source")
+        if not source or source in sources or source in errors or source in urls:
+            continue
+        if source.startswith(("http://", "https://")):
+            urls.append(source)
+        else:
+            try:
+                sources[source] = (manifest_dir / source).read_bytes()
+            except OSError as e:
+                errors[source] = f"读取来源照片失败: {e}"
+
+    if urls:
+        with Downloader(cache=HttpCache(), log=None) as downloader:
+            for result in downloader.fetch_all(DownloadJob(url, [url]) for url in urls):
+                if result.ok:
+                    sources[result.name] = result.content
+                else:
+                    errors[result.name] = f"下载来源照片失败: {result.error}"
+    return sources, errors
+
+
+def fingerprint(spec: dict, fonts: str, source_bytes: bytes = None, manifest_dir=None):
+    return {
+        "spec": _json_hash(spec),
+        "code": code_fingerprint(spec["template"], manifest_dir),
+        "fonts": fonts if spec["template"] != "photo" else None,
+        "source": _sha256(source_bytes) if source_bytes is not None else None,
+    }
+
+
+# ---------------------------------------------------------------------------
+# 构建
+# ---------------------------------------------------------------------------
+
+def render_spec(manifest_dir: str, spec: dict, source_bytes: bytes = None):
+    """按条目生成一张图并保存（在子进程中运行），返回输出文件的 sha256"""
+    from PIL import Image
+
+    output = Path(manifest_dir) / spec["output"]
+    output.parent.mkdir(parents=True, exist_ok=True)
+
+    img = None
+    fmt = Image.registered_extensions().get(output.suffix.lower(), "JPEG")
+    if spec["template"] == "photo":
+        data = source_bytes
+        max_bytes = int(spec["max_kb"] * 1024) if spec.get("max_kb") else None
+        if fmt == "JPEG" and max_bytes and len(data) > max_bytes:
+            # 超出预算才重新编码，否则原样保存，不做有损的二次压缩
+            img = Image.open(BytesIO(data))
+            data, _ = fit_jpeg(img, max_bytes, subsampling=spec.get("subsampling", "4:2:0"))
+    else:
+        _, func = _template_function(spec["template"], manifest_dir)
+        kwargs = {k: v for k, v in spec.items() if k not in RESERVED_KEYS}
+        if source_bytes is not None:
+            kwargs["photo"] = source_bytes
+        img = func(**kwargs)
+
+        if fmt == "JPEG" and spec.get("max_kb"):
+            data, _ = fit_jpeg(img, int(spec["max_kb"] * 1024),
+                               subsampling=spec.get("subsampling", "4:2:0"))
+        else:
+            buffer = BytesIO()
+            save_kwargs = {}
+            if fmt in ("JPEG", "WEBP"):
+                save_kwargs["quality"] = spec.get("quality", DEFAULT_QUALITY)
+            if fmt == "JPEG" and img.mode not in ("RGB", "L"):
+                img = img.convert("RGB")
+            img.save(buffer, fmt, **save_kwargs)
+            data = buffer.getvalue()
+
+    tmp = output.with_name(f".{output.name}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, output)
+
+    if spec.get("variants"):
+        # 复用内存中的图，不再从刚写的文件解码
+        if img is None:
+            img = Image.open(BytesIO(data))
+        save_variants(img, output, max_kb=spec.get("max_kb"), write_primary=False,
+                      **spec["variants"])
+    return _sha256(data)
+
+
+def _file_hash(path: Path):
+    try:
+        return _sha256(path.read_bytes())
+    except OSError:
+        return None
+
+
+def read_lock(path: Path):
+    try:
+        return json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {"version": 1, "outputs": {}}
+
+
+def write_lock(path: Path, lock: dict):
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_text(json.dumps(lock, ensure_ascii=False, indent=2, sort_keys=True) + "\n",
+                   encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _variants_present(output: Path):
+    try:
+        sidecar = json.loads(sidecar_path(output).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return False
+    return all((output.parent / v["path"]).exists() for v in sidecar["variants"])
+
+
+def stale_reasons(manifest_dir: Path, spec: dict, fp: dict, locked: dict):
+    """需要重建的原因列表，为空表示是最新的"""
+    if not locked:
+        return ["新条目"]
+    reasons = [f"{key} 变化" for key in ("spec", "code", "fonts", "source")
+               if locked.get("inputs", {}).get(key) != fp[key]]
+    output_hash = _file_hash(manifest_dir / spec["output"])
+    if output_hash is None:
+        reasons.append("输出缺失")
+    elif output_hash != locked.get("output_sha256"):
+        reasons.append("输出被改动")
+    if spec.get("variants") and not _variants_present(manifest_dir / spec["output"]):
+        reasons.append("变体缺失")
+    return reasons
+
+
+def build(manifest_path, force: bool = False, dry_run: bool = False, jobs: int = None):
+    """增量构建，返回 {"built": [...], "skipped": [...], "failed": [...]}"""
+    manifest_dir, specs = load_manifest(manifest_path)
+    lock_path = lock_file(manifest_path)
+    lock = read_lock(lock_path)
+    locked_outputs = lock.get("outputs", {})
+
+    sources, source_errors = fetch_sources(manifest_dir, specs)
+    fonts = fonts_fingerprint()
+
+    plan, skipped, unavailable = [], [], []
+    for spec in specs:
+        if spec.get("source") in source_errors:
+            print(f"   ✗ {spec['output']}: {source_errors[spec['source']]}")
+            unavailable.append(spec["output"])
+            continue
+        source_bytes = sources.get(spec.get("source"))
+        fp = fingerprint(spec, fonts, source_bytes, manifest_dir)
+        reasons = ["--force"] if force else stale_reasons(
+            manifest_dir, spec, fp, locked_outputs.get(spec["output"]))
+        if reasons:
+            print(f"   ↻ {spec['output']}: {', '.join(reasons)}")
+            plan.append((spec, fp, source_bytes))
+        else:
+            skipped.append(spec["output"])
+
+    print(f"📋 {len(specs)} 张图片，需要重建 {len(plan)} 张，已是最新 {len(skipped)} 张"
+          + (f"，来源不可用 {len(unavailable)} 张" if unavailable else ""))
+    if dry_run or not plan:
+        return {"built": [], "skipped": skipped, "failed": unavailable}
+
+    start = time.perf_counter()
+    results = run_render_jobs(
+        [RenderTask(spec["output"], render_spec, (str(manifest_dir), spec, source_bytes))
+         for spec, _, source_bytes in plan],
+        workers=jobs,
+    )
+    print_render_report(results, time.perf_counter() - start)
+
+    built, failed = [], list(unavailable)
+    for (spec, fp, _), result in zip(plan, results):
+        if result["ok"]:
+            locked_outputs[spec["output"]] = {"inputs": fp, "output_sha256": result["result"]}
+            built.append(spec["output"])
+        else:
+            failed.append(spec["output"])
+
+    # 清单里已删除的条目不再记录（输出文件保留）
+    current = {spec["output"] for spec in specs}
+    lock["outputs"] = {k: v for k, v in locked_outputs.items() if k in current}
+    lock["version"] = 1
+    write_lock(lock_path, lock)
+    return {"built": built, "skipped": skipped, "failed": failed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="按 images.json 增量生成文章配图")
+    parser.add_argument("manifest", nargs="?", default=".",
+                        help=f"{MANIFEST_NAME} 或其所在目录 (默认: 当前目录)")
+    parser.add_argument("--force", action="store_true", help="忽略锁文件，全部重建")
+    parser.add_argument("--dry-run", action="store_true", help="只列出需要重建的图片")
+    parser.add_argument("--jobs", type=int, help="并行进程数 (默认: CPU 核数)")
+    args = parser.parse_args()
+
+    try:
+        result = build(args.manifest, args.force, args.dry_run, args.jobs)
+    except (ManifestError, OSError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    if result["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+按体积预算保存 JPEG - 在内存里二分查找质量，保证不超过指定 KB
+
+公众号文章图片在手机上加载，体积比极限画质更重要。各脚本不再写死
+quality=95，而是给出体积上限，由这里找出不超限的最高质量:
+
+    - 全程在内存编码，找到结果后才落盘（临时文件 + 替换），
+      超限的文件永远不会写出来
+    - 默认开启 optimize（优化哈夫曼表）和 progressive（渐进式加载）
+    - 色度抽样可选：4:2:0 体积最小；4:4:4 彩色小字更清晰；
+      auto 优先 4:4:4，质量不够时退回 4:2:0
+    - 最低质量仍超限时抛出 BudgetExceeded
+
+用法:
+    from jpeg_budget import save_jpeg
+
+    info = save_jpeg(img, "cover.jpg", max_kb=100)
+    print(info["quality"], info["bytes"])
+
+    data, info = fit_jpeg(img, 100 * 1024, subsampling="auto")   # 只编码不保存
+"""
+
+import os
+from io import BytesIO
+
+from PIL import Image
+
+# 默认体积上限与质量搜索区间
+DEFAULT_MAX_KB = 200
+MIN_QUALITY = 40
+MAX_QUALITY = 95
+
+# auto 模式下 4:4:4 至少要达到的质量，否则改用 4:2:0
+AUTO_444_MIN_QUALITY = 85
+
+SUBSAMPLING = {"4:4:4": 0, "4:2:2": 1, "4:2:0": 2}
+
+
+class BudgetExceeded(ValueError):
+    """最低质量编码后仍超出体积上限"""
+
+
+def _rgb(img):
+    """JPEG 只支持 RGB / L，透明通道铺在白底上"""
+    if img.mode in ("RGB", "L"):
+        return img
+    if img.mode in ("RGBA", "LA", "P"):
+        img = img.convert("RGBA")
+        background = Image.new("RGB", img.size, (255, 255, 255))
+        background.paste(img, mask=img.getchannel("A"))
+        return background
+    return img.convert("RGB")
+
+
+def encode_jpeg(img, quality: int, subsampling: str = "4:2:0",
+                optimize: bool = True, progressive: bool = True):
+    """按指定质量编码，返回字节"""
+    buffer = BytesIO()
+    _rgb(img).save(buffer, "JPEG", quality=quality, subsampling=SUBSAMPLING[subsampling],
+                   optimize=optimize, progressive=progressive)
+    return buffer.getvalue()
+
+
+def _search(img, max_bytes: int, min_quality: int, max_quality: int, subsampling: str, **kwargs):
+    """不超过 max_bytes 的最高质量，返回 (字节, 质量, 编码次数)，做不到返回 (None, None, 次数)"""
+    tried = {}
+
+    def size_at(q):
+        if q not in tried:
+            tried[q] = encode_jpeg(img, q, subsampling, **kwargs)
+        return len(tried[q])
+
+    if size_at(max_quality) <= max_bytes:
+        return tried[max_quality], max_quality, len(tried)
+    if size_at(min_quality) > max_bytes:
+        return None, None, len(tried)
+
+    # 不变式：lo 满足预算，hi 不满足
+    lo, hi = min_quality, max_quality
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if size_at(mid) <= max_bytes:
+            lo = mid
+        else:
+            hi = mid
+    return tried[lo], lo, len(tried)
+
+
+def fit_jpeg(img, max_bytes: int, min_quality: int = MIN_QUALITY,
+             max_quality: int = MAX_QUALITY, subsampling: str = "4:2:0", **kwargs):
+    """找出不超过 max_bytes 的最高质量编码
+
+    返回 (字节, {"quality", "subsampling", "bytes", "encodes"})；
+    subsampling 可以是 SUBSAMPLING 中的任一项或 "auto"
+    """
+    if subsampling != "auto" and subsampling not in SUBSAMPLING:
+        raise ValueError(f"不支持的色度抽样 {subsampling!r}，可选 {', '.join(SUBSAMPLING)}、auto")
+
+    img = _rgb(img)
+    # 同一质量下 4:2:0 总比 4:4:4 小，auto 先试 4:4:4，质量不够再换
+    candidates = ["4:4:4", "4:2:0"] if subsampling == "auto" else [subsampling]
+    encodes = 0
+    for mode in candidates:
+        data, quality, n = _search(img, max_bytes, min_quality, max_quality, mode, **kwargs)
+        encodes += n
+        if data is not None and (mode == candidates[-1] or quality >= AUTO_444_MIN_QUALITY):
+            return data, {"quality": quality, "subsampling": mode,
+                          "bytes": len(data), "encodes": encodes}
+
+    raise BudgetExceeded(f"{img.size[0]}x{img.size[1]} 的图片在质量 {min_quality} 时"
+                         f"仍超过 {max_bytes / 1024:.0f}KB")
+
+
+def save_jpeg(img, path, max_kb: float = DEFAULT_MAX_KB, **kwargs):
+    """按体积预算保存 JPEG，返回 fit_jpeg 的信息（含 path）；超限时不写文件"""
+    data, info = fit_jpeg(img, int(max_kb * 1024), **kwargs)
+
+    path = os.fspath(path)
+    tmp = os.path.join(os.path.dirname(os.path.abspath(path)), f".{os.path.basename(path)}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    info["path"] = path
+    return info
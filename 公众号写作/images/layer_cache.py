@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+静态图层缓存 - 每张图都一样的暗角、网格、装饰只画一次
+
+图层按 (名称, 尺寸, 参数) 缓存：
+    - 内存：同一进程内直接复用（返回的是缓存本身，使用方需要 copy() 后再改），
+      按最近使用淘汰，总像素字节数不超过 MAX_MEMORY_BYTES
+    - 磁盘（可选）：设置环境变量 LAYER_CACHE_DIR 或传 cache_dir，以 .npy
+      原始数组保存，读取只是一次内存拷贝，比重新绘制或解码 PNG 都快；
+      多进程渲染时各子进程不必各自重画。每次写入后按最近使用时间（文件
+      mtime，命中时刷新）淘汰，目录总大小不超过 max_disk_bytes
+
+参数里任何一项变化都会得到新的缓存键，改了绘制代码时同时改一下参数里的
+版本号即可让旧缓存失效。
+
+用法:
+    from layer_cache import cached_layer
+
+    def build_grid(size, spacing):
+        ...
+        return Image.new("RGBA", size)
+
+    layer = cached_layer("grid", (1200, 600), build_grid, spacing=50)
+    overlay = layer.copy()
+"""
+
+import os
+import json
+import hashlib
+import threading
+from pathlib import Path
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image
+
+LAYER_CACHE_ENV = "LAYER_CACHE_DIR"
+
+# 内存缓存上限（图层像素字节数之和）与磁盘缓存目录默认上限
+MAX_MEMORY_BYTES = 128 * 1024 * 1024
+DEFAULT_MAX_DISK_BYTES = 200 * 1024 * 1024
+
+_layers = OrderedDict()
+_layers_bytes = 0
+_lock = threading.Lock()
+
+
+def _cache_key(name: str, size, params: dict):
+    raw = json.dumps([name, list(size), params], sort_keys=True, default=str)
+    return f"{name}-{size[0]}x{size[1]}-{hashlib.sha256(raw.encode('utf-8')).hexdigest()[:16]}"
+
+
+def _nbytes(layer):
+    return layer.size[0] * layer.size[1] * len(layer.getbands())
+
+
+def _remember(key: str, layer):
+    """放进内存缓存，超出 MAX_MEMORY_BYTES 时淘汰最久未用的"""
+    global _layers_bytes
+    with _lock:
+        if key in _layers:
+            _layers_bytes -= _nbytes(_layers.pop(key))
+        _layers[key] = layer
+        _layers_bytes += _nbytes(layer)
+        while _layers_bytes > MAX_MEMORY_BYTES and len(_layers) > 1:
+            _, old = _layers.popitem(last=False)
+            _layers_bytes -= _nbytes(old)
+
+
+def _load(path: Path):
+    try:
+        layer = Image.fromarray(np.load(path, allow_pickle=False))
+    except (OSError, ValueError):
+        return None
+    try:
+        os.utime(path)   # 记录使用时间，供淘汰参考
+    except OSError:
+        pass
+    return layer
+
+
+def _save(path: Path, layer):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        np.save(f, np.asarray(layer), allow_pickle=False)
+    os.replace(tmp, path)
+
+
+def evict_dir(cache_dir, max_bytes: int = DEFAULT_MAX_DISK_BYTES):
+    """按最近使用时间淘汰目录里的 .npy，直到总大小不超过 max_bytes"""
+    files = []
+    for path in Path(cache_dir).glob("*.npy"):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        files.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in files)
+    for _, size, path in sorted(files):
+        if total <= max_bytes:
+            break
+        try:
+            path.unlink()
+        except OSError:
+            continue
+        total -= size
+
+
+def cached_layer(name: str, size, build, cache_dir=None,
+                 max_disk_bytes: int = DEFAULT_MAX_DISK_BYTES, **params):
+    """取 build(size, **params) 画出的图层，先查内存再查磁盘，都没有才绘制
+
+    返回的 Image 是共享的缓存，不要原地修改
+    """
+    size = tuple(size)
+    key = _cache_key(name, size, params)
+    with _lock:
+        if key in _layers:
+            _layers.move_to_end(key)
+            return _layers[key]
+
+    cache_dir = cache_dir or os.environ.get(LAYER_CACHE_ENV)
+    path = Path(cache_dir) / f"{key}.npy" if cache_dir else None
+
+    layer = _load(path) if path and path.exists() else None
+    if layer is None or layer.size != size:
+        layer = build(size, **params)
+        if path:
+            _save(path, layer)
+            evict_dir(cache_dir, max_disk_bytes)
+    _remember(key, layer)
+    return layer
+
+
+def clear_memory():
+    """清空进程内缓存（测试或换参数对比时用）"""
+    global _layers_bytes
+    with _lock:
+        _layers.clear()
+        _layers_bytes = 0
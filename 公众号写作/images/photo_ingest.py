@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+照片导入 - 按目标尺寸解码、等比裁剪、缓存缩放结果
+
+图库原图动辄 4000x3000，整张解码再 LANCZOS 缩到 1200x600 既慢又占内存。
+这里分三步:
+
+    1. JPEG 用 draft 模式解码：libjpeg 在解码时直接按 1/2、1/4、1/8 缩小，
+       只解出不小于所需尺寸的像素
+    2. 按目标宽高比算出裁剪框（cover：铺满画布、多余部分裁掉，不拉伸变形），
+       可以给焦点让主体留在画面里
+    3. 只对裁剪框做缩放，先用 Image.reduce 整数倍缩小，最后一小段再 LANCZOS
+
+结果按 (照片内容, 尺寸, 焦点, INGEST_VERSION) 缓存：进程内复用，同时以
+.npy 保存在 images/.photo_cache/，下次运行直接读取。磁盘缓存按最近使用
+淘汰，总大小不超过 PHOTO_CACHE_MAX_BYTES（每张 1200x600 约 2MB）。
+修改解码或裁剪逻辑时把 INGEST_VERSION 加一，旧缓存自然失效。
+
+用法:
+    from photo_ingest import load_photo
+
+    photo = load_photo(photo_bytes, (1200, 600))                 # 居中裁剪
+    photo = load_photo("raw/team.jpg", (1200, 600), focal=(0.5, 0.3))   # 偏上
+"""
+
+import os
+import hashlib
+from io import BytesIO
+from pathlib import Path
+
+from PIL import Image
+
+from layer_cache import cached_layer
+
+DEFAULT_CACHE_DIR = Path(__file__).parent / ".photo_cache"
+PHOTO_CACHE_ENV = "PHOTO_CACHE_DIR"
+PHOTO_CACHE_MAX_BYTES = 200 * 1024 * 1024
+
+# 解码/裁剪算法的版本，改了 ingest 的输出就加一
+INGEST_VERSION = 1
+
+# 最后一次 LANCZOS 之前，reduce 缩到不小于目标尺寸的这么多倍
+REDUCING_GAP = 3.0
+
+
+def cover_box(src_size, dst_size, focal=(0.5, 0.5)):
+    """源图上与目标宽高比一致的最大裁剪框，尽量以焦点为中心
+
+    focal 是相对坐标 (0~1, 0~1)，默认画面中心
+    """
+    src_w, src_h = src_size
+    dst_w, dst_h = dst_size
+    scale = max(dst_w / src_w, dst_h / src_h)
+    crop_w, crop_h = dst_w / scale, dst_h / scale
+
+    fx, fy = focal
+    left = min(max(fx * src_w - crop_w / 2, 0), src_w - crop_w)
+    top = min(max(fy * src_h - crop_h / 2, 0), src_h - crop_h)
+    return (left, top, left + crop_w, top + crop_h)
+
+
+def _open(source):
+    if isinstance(source, Image.Image):
+        return source
+    if isinstance(source, (bytes, bytearray)):
+        return Image.open(BytesIO(source))
+    return Image.open(source)
+
+
+def ingest(source, size, focal=(0.5, 0.5)):
+    """不缓存：解码并裁剪缩放到 size，返回 RGB Image"""
+    img = _open(source)
+    size = tuple(size)
+
+    if img.format == "JPEG":
+        # draft 只能按整数倍缩小，保证解出来的图仍能铺满目标尺寸
+        box = cover_box(img.size, size, focal)
+        scale = min((box[2] - box[0]) / size[0], (box[3] - box[1]) / size[1])
+        img.draft("RGB", (int(img.size[0] / scale) + 1, int(img.size[1] / scale) + 1))
+
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+
+    box = cover_box(img.size, size, focal)
+    return img.resize(size, Image.Resampling.LANCZOS, box=box, reducing_gap=REDUCING_GAP)
+
+
+def _digest(source):
+    """照片内容的哈希，作为缓存键"""
+    if isinstance(source, Image.Image):
+        return hashlib.sha256(source.tobytes() + repr((source.mode, source.size)).encode()).hexdigest()
+    if isinstance(source, (bytes, bytearray)):
+        return hashlib.sha256(source).hexdigest()
+    return hashlib.sha256(Path(source).read_bytes()).hexdigest()
+
+
+def load_photo(source, size, focal=None, cache_dir=None):
+    """照片（字节、路径或 Image）→ 铺满 size 的 RGB Image，结果带缓存
+
+    返回的 Image 可能是缓存共享的，不要原地修改
+    """
+    focal = tuple(focal) if focal else (0.5, 0.5)
+    cache_dir = cache_dir or os.environ.get(PHOTO_CACHE_ENV) or DEFAULT_CACHE_DIR
+
+    def build(size, digest, focal, version):
+        return ingest(source, size, focal)
+
+    return cached_layer("photo", size, build, cache_dir=cache_dir,
+                        max_disk_bytes=PHOTO_CACHE_MAX_BYTES,
+                        digest=_digest(source), focal=list(focal), version=INGEST_VERSION)
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+绘图公共部分 - 字体查找与缓存、文字排版缓存、居中/多行文字
+
+字体:
+    get_font("cjk", 56) 按角色查找字体，也可以直接传文件名或路径。
+    角色对应一组候选字体（Windows / macOS / Linux 常见字体），在搜索路径
+    中找到的第一个生效；都找不到时退回 Pillow 内置字体（同样支持字号）。
+
+    搜索路径: 环境变量 IMAGE_FONT_PATH（用 os.pathsep 分隔）优先，其次
+    是各平台的系统字体目录。目录只扫描一次，FreeTypeFont 按 (字体, 字号)
+    缓存，同一进程内不会重复解析字体文件。
+
+文字:
+    同一段文字、同一字体只排版和栅格化一次（text_layout，按 (文字, 字体,
+    模式) 缓存），之后量宽度、在不同位置用不同颜色盖印都直接复用字形位图。
+    发光、阴影、描边这类多次偏移绘制的效果只是几次位图拷贝，不再每次都
+    让 FreeType 重新栅格化；结果与 draw.text 逐像素相同（走的是同一个
+    draw_bitmap）。
+
+用法:
+    from render_core import get_font, text_layout, draw_text
+
+    font = get_font("cjk", 56)
+    layout = text_layout("Claude Code", font)
+    for dx, color in [(3, (0, 0, 0, 10)), (2, (0, 0, 0, 40))]:    # 阴影
+        layout.draw(draw, (x + dx, y + dx), color)
+    layout.draw(draw, (x, y), (100, 255, 218))
+
+    draw_text(draw, (50, 100), "def main():", get_font("mono", 20), "white")
+"""
+
+import os
+import sys
+from functools import lru_cache
+
+from PIL import Image, ImageFont
+
+FONT_PATH_ENV = "IMAGE_FONT_PATH"
+
+# 角色 → 候选字体文件名（按优先级）
+FONT_FACES = {
+    "sans": [
+        "arial.ttf", "Arial.ttf", "Helvetica.ttc", "HelveticaNeue.ttc",
+        "DejaVuSans.ttf", "LiberationSans-Regular.ttf", "NotoSans-Regular.ttf",
+    ],
+    "mono": [
+        "consola.ttf", "consolas.ttf", "Menlo.ttc", "Monaco.ttf",
+        "DejaVuSansMono.ttf", "LiberationMono-Regular.ttf", "NotoSansMono-Regular.ttf",
+    ],
+    # 标题、副标题里常有中文，拉丁字体会显示成方框
+    "cjk": [
+        "msyh.ttc", "msyh.ttf", "simhei.ttf", "PingFang.ttc", "Hiragino Sans GB.ttc",
+        "STHeiti Medium.ttc", "NotoSansCJK-Regular.ttc", "NotoSansCJKsc-Regular.otf",
+        "NotoSansSC-Regular.otf", "SourceHanSansSC-Regular.otf", "wqy-microhei.ttc",
+        "wqy-zenhei.ttc", "DroidSansFallbackFull.ttf",
+    ],
+}
+
+_FONT_EXTENSIONS = (".ttf", ".ttc", ".otf")
+
+
+def font_dirs():
+    """字体搜索目录，按优先级"""
+    dirs = [d for d in os.environ.get(FONT_PATH_ENV, "").split(os.pathsep) if d]
+
+    if sys.platform == "win32":
+        windir = os.environ.get("WINDIR", r"C:\Windows")
+        dirs += [os.path.join(windir, "Fonts"),
+                 os.path.join(os.environ.get("LOCALAPPDATA", ""), "Microsoft", "Windows", "Fonts")]
+    elif sys.platform == "darwin":
+        dirs += ["/System/Library/Fonts", "/System/Library/Fonts/Supplemental",
+                 "/Library/Fonts", os.path.expanduser("~/Library/Fonts")]
+    else:
+        dirs += ["/usr/share/fonts", "/usr/local/share/fonts",
+                 os.path.expanduser("~/.local/share/fonts"), os.path.expanduser("~/.fonts")]
+    return dirs
+
+
+@lru_cache(maxsize=1)
+def _font_index():
+    """{小写文件名: 路径}，先出现的目录优先"""
+    index = {}
+    for root_dir in font_dirs():
+        for dirpath, _, filenames in os.walk(root_dir):
+            for name in filenames:
+                if name.lower().endswith(_FONT_EXTENSIONS):
+                    index.setdefault(name.lower(), os.path.join(dirpath, name))
+    return index
+
+
+@lru_cache(maxsize=None)
+def find_font(face: str):
+    """角色名、文件名或路径 → 字体文件路径，找不到返回 None"""
+    if os.path.isfile(face):
+        return face
+
+    candidates = FONT_FACES.get(face, [face])
+    # 找不到中文字体时至少用上普通无衬线字体
+    if face == "cjk":
+        candidates = candidates + FONT_FACES["sans"]
+
+    index = _font_index()
+    for name in candidates:
+        path = index.get(name.lower())
+        if path:
+            return path
+    return None
+
+
+@lru_cache(maxsize=64)
+def get_font(face: str, size: int):
+    """按 (字体, 字号) 缓存的 FreeTypeFont；找不到字体时用 Pillow 内置字体"""
+    path = find_font(face)
+    if path:
+        try:
+            return ImageFont.truetype(path, size)
+        except OSError:
+            pass
+    return ImageFont.load_default(size)
+
+
+class TextLayout:
+    """单行文字按某个字体排版、栅格化一次的结果：字形位图 + 度量"""
+
+    def __init__(self, text: str, font, mode: str = "L"):
+        self.text = text
+        self.font = font
+        self.bbox = font.getbbox(text, mode)     # 与 draw.textbbox((0, 0), ...) 相同
+        if hasattr(font, "getmask2"):
+            mask, self.offset = font.getmask2(text, mode, anchor="la")
+        else:
+            # 内置位图字体没有 getmask2，draw.text 也是不加偏移直接盖印
+            mask, self.offset = font.getmask(text, mode), (0, 0)
+        self.mask = Image.Image()._new(mask)
+
+    @property
+    def width(self):
+        return self.bbox[2] - self.bbox[0]
+
+    @property
+    def height(self):
+        return self.bbox[3] - self.bbox[1]
+
+    def box(self, xy):
+        """在 xy 盖印时实际涂到的像素区域 (left, top, right, bottom)"""
+        left, top = int(xy[0]) + self.offset[0], int(xy[1]) + self.offset[1]
+        return (left, top, left + self.mask.size[0], top + self.mask.size[1])
+
+    def draw(self, draw, xy, fill):
+        """在 xy（整数坐标，等同 draw.text 的左上角）用 fill 盖印字形"""
+        if self.mask.size[0] and self.mask.size[1]:
+            draw.bitmap((int(xy[0]) + self.offset[0], int(xy[1]) + self.offset[1]),
+                        self.mask, fill=fill)
+
+
+@lru_cache(maxsize=512)
+def text_layout(text: str, font, mode: str = "L"):
+    """按 (文字, 字体, 模式) 缓存的 TextLayout；字体请用 get_font 取，保证是同一对象
+
+    只处理单行文字，多行请逐行调用
+    """
+    return TextLayout(text, font, mode)
+
+
+def draw_text(draw, xy, text: str, font, fill):
+    """draw.text 的缓存版：同样的文字和字体只栅格化一次；含换行时交给 draw.text"""
+    if "\n" in text:
+        draw.text(xy, text, fill=fill, font=font)
+    else:
+        text_layout(text, font, draw.fontmode).draw(draw, xy, fill)
+
+
+def text_width(draw, text: str, font):
+    if "\n" in text:
+        bbox = draw.textbbox((0, 0), text, font=font)
+        return bbox[2] - bbox[0]
+    return text_layout(text, font, draw.fontmode).width
+
+
+def draw_centered_text(draw, text: str, y: int, font, fill, width: int = None, left: int = 0):
+    """在 [left, left + width) 内水平居中绘制一行文字，width 默认画布宽度"""
+    if width is None:
+        width = draw.im.size[0]
+    x = left + (width - text_width(draw, text, font)) // 2
+    draw_text(draw, (x, y), text, font, fill)
+    return x
+
+
+def draw_centered_lines(draw, lines, y: int, font, fill, line_height: int,
+                        width: int = None, left: int = 0):
+    """逐行水平居中绘制，lines 可以是列表或含换行的字符串；返回下一行的 y"""
+    if isinstance(lines, str):
+        lines = lines.split("\n")
+    for line in lines:
+        draw_centered_text(draw, line, y, font, fill, width, left)
+        y += line_height
+    return y
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+配图并行渲染 - 把一组渲染任务分给多个进程
+
+用法:
+    from render_jobs import RenderTask, run_render_jobs, print_render_report
+
+    tasks = [
+        RenderTask("01-main.jpg", create_main_cover,
+                   output="out/01-main.jpg", save_kwargs={"max_kb": 200}),
+        RenderTask("chart", create_chart_image, args=("chart.jpg", "标题", data)),
+    ]
+    results = run_render_jobs(tasks)
+    print_render_report(results)
+
+任务函数必须定义在模块顶层（子进程按名字导入）。函数返回 Image 且
+指定了 output 时，在子进程里直接保存，不把像素传回主进程；save_kwargs
+里有 max_kb 时按体积预算保存 JPEG（见 jpeg_budget），有 variants 时同时
+输出多尺寸、多格式变体（见 variants）:
+
+    RenderTask("01-main.jpg", create_main_cover, output="out/01-main.jpg",
+               save_kwargs={"max_kb": 200,
+                            "variants": {"widths": [960], "formats": ["webp", "avif"]}})
+
+每个任务执行前用任务名重置 random 种子，串行和并行的输出逐字节相同。
+环境变量 RENDER_JOBS 指定进程数，RENDER_JOBS=1 时在当前进程串行执行。
+"""
+
+import os
+import time
+import random
+import traceback
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from jpeg_budget import save_jpeg
+from variants import save_variants
+
+RENDER_JOBS_ENV = "RENDER_JOBS"
+
+RenderTask = namedtuple("RenderTask", "name fn args kwargs output save_kwargs",
+                        defaults=((), None, None, None))
+
+
+def default_workers(task_count: int):
+    """进程数：RENDER_JOBS，否则 CPU 核数；不超过任务数"""
+    env = os.environ.get(RENDER_JOBS_ENV, "")
+    workers = int(env) if env.isdigit() and int(env) > 0 else (os.cpu_count() or 1)
+    return max(1, min(workers, task_count))
+
+
+def _run_task(task: RenderTask):
+    """执行单个任务，异常收敛为失败结果（在子进程或当前进程中运行）"""
+    start = time.perf_counter()
+    random.seed(task.name)
+    try:
+        value = task.fn(*task.args, **(task.kwargs or {}))
+        if task.output and hasattr(value, "save"):
+            save_kwargs = dict(task.save_kwargs or {})
+            variants = save_kwargs.pop("variants", None)
+            if variants is not None:
+                save_variants(value, task.output, max_kb=save_kwargs.get("max_kb"), **variants)
+            elif "max_kb" in save_kwargs:
+                save_jpeg(value, task.output, **save_kwargs)
+            else:
+                value.save(task.output, **save_kwargs)
+            value = task.output
+        elif hasattr(value, "save"):
+            value = None   # 不把整张图传回主进程
+        return {"name": task.name, "ok": True, "result": value, "error": "",
+                "seconds": time.perf_counter() - start, "pid": os.getpid()}
+    except Exception as e:
+        return {"name": task.name, "ok": False, "result": None,
+                "error": f"{type(e).__name__}: {e}", "traceback": traceback.format_exc(),
+                "seconds": time.perf_counter() - start, "pid": os.getpid()}
+
+
+def run_render_jobs(tasks, workers: int = None, progress=print):
+    """执行全部任务，按任务顺序返回结果列表
+
+    每个结果: {"name", "ok", "result", "error", "seconds", "pid"}
+    workers: 进程数，默认见 default_workers；为 1 时不启动子进程
+    """
+    tasks = list(tasks)
+    if not tasks:
+        return []
+    workers = workers or default_workers(len(tasks))
+
+    if workers == 1:
+        results = []
+        for task in tasks:
+            results.append(_run_task(task))
+            _report_one(results[-1], len(results), len(tasks), progress)
+        return results
+
+    results = [None] * len(tasks)
+    done = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_run_task, task): i for i, task in enumerate(tasks)}
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                results[i] = future.result()
+            except Exception as e:
+                # 子进程崩溃或任务不可序列化
+                results[i] = {"name": tasks[i].name, "ok": False, "result": None,
+                              "error": f"{type(e).__name__}: {e}", "seconds": 0.0, "pid": None}
+            done += 1
+            _report_one(results[i], done, len(tasks), progress)
+    return results
+
+
+def _report_one(result, done: int, total: int, progress):
+    if not progress:
+        return
+    status = "✓" if result["ok"] else "✗"
+    suffix = "" if result["ok"] else f" - {result['error']}"
+    progress(f"   [{done}/{total}] {status} {result['name']} ({result['seconds']:.2f}s){suffix}")
+
+
+def print_render_report(results, elapsed: float = None):
+    """打印每张图的耗时和失败项"""
+    failed = [r for r in results if not r["ok"]]
+    busy = sum(r["seconds"] for r in results)
+    line = f"\n🖼️ 渲染 {len(results) - len(failed)}/{len(results)} 张，累计 {busy:.2f}s"
+    if elapsed:
+        line += f"，实际 {elapsed:.2f}s（并行加速 {busy / elapsed:.1f}x）"
+    print(line)
+    for r in failed:
+        print(f"   ✗ {r['name']}: {r['error']}")
+    return not failed
@@ -4,22 +4,17 @@
 使用 PIL 创建风格化的示意图
 """
 
-from PIL import Image, ImageDraw, ImageFont
+from PIL import ImageDraw
 import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from gradients import linear_gradient
+from render_core import get_font
 
 def create_gradient(width, height, color1, color2):
     """创建渐变背景"""
-    img = Image.new('RGB', (width, height))
-    draw = ImageDraw.Draw(img)
-
-    for y in range(height):
-        ratio = y / height
-        r = int(color1[0] * (1 - ratio) + color2[0] * ratio)
-        g = int(color1[1] * (1 - ratio) + color2[1] * ratio)
-        b = int(color1[2] * (1 - ratio) + color2[2] * ratio)
-        draw.rectangle([(0, y), (width, y + 1)], fill=(r, g, b))
-
-    return img
+    return linear_gradient((width, height), [color1, color2])
 
 def create_main_cover():
     """生成封面图 - Sleepless Agent 概念"""
@@ -60,12 +55,8 @@ def create_main_cover():
                               fill=(0, 200, 255, alpha))
 
     # 底部文字区域
-    try:
-        title_font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 80)
-        subtitle_font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 40)
-    except:
-        title_font = ImageFont.load_default()
-        subtitle_font = ImageFont.load_default()
+    title_font = get_font("sans", 80)
+    subtitle_font = get_font("sans", 40)
 
     draw.text((960, 700), "Sleepless Agent", fill=(255, 255, 255), anchor="mm", font=title_font)
     draw.text((960, 800), "24/7 AI Development Team", fill=(100, 200, 255), anchor="mm", font=subtitle_font)
@@ -80,12 +71,8 @@ def create_multi_agent_workflow():
     draw = ImageDraw.Draw(img)
 
     # 标题
-    try:
-        title_font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 60)
-        label_font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 36)
-    except:
-        title_font = ImageFont.load_default()
-        label_font = ImageFont.load_default()
+    title_font = get_font("sans", 60)
+    label_font = get_font("sans", 36)
 
     draw.text((960, 80), "Three-Agent Workflow", fill=(255, 255, 255), anchor="mm", font=title_font)
 
@@ -139,12 +126,8 @@ def create_quickstart_guide():
     img = create_gradient(width, height, (12, 18, 32), (6, 10, 24))
     draw = ImageDraw.Draw(img)
 
-    try:
-        title_font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 60)
-        step_font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 28)
-    except:
-        title_font = ImageFont.load_default()
-        step_font = ImageFont.load_default()
+    title_font = get_font("sans", 60)
+    step_font = get_font("sans", 28)
 
     draw.text((960, 80), "Quick Start Guide", fill=(255, 255, 255), anchor="mm", font=title_font)
 
@@ -208,14 +191,9 @@ def create_scenarios():
     img = create_gradient(width, height, (10, 16, 30), (5, 10, 25))
     draw = ImageDraw.Draw(img)
 
-    try:
-        title_font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 60)
-        header_font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 40)
-        item_font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 28)
-    except:
-        title_font = ImageFont.load_default()
-        header_font = ImageFont.load_default()
-        item_font = ImageFont.load_default()
+    title_font = get_font("sans", 60)
+    header_font = get_font("sans", 40)
+    item_font = get_font("sans", 28)
 
     draw.text((960, 60), "When to Use Sleepless Agent", fill=(255, 255, 255), anchor="mm", font=title_font)
 
@@ -293,14 +271,9 @@ def create_conclusion():
         alpha = random.randint(20, 80)
         draw.ellipse([(x, y), (x + size, y + size)], fill=(100, 180, 255, alpha))
 
-    try:
-        title_font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 70)
-        text_font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 36)
-        small_font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 28)
-    except:
-        title_font = ImageFont.load_default()
-        text_font = ImageFont.load_default()
-        small_font = ImageFont.load_default()
+    title_font = get_font("sans", 70)
+    text_font = get_font("sans", 36)
+    small_font = get_font("sans", 28)
 
     # 主标题
     draw.text((960, 300), "The Future of Development", fill=(255, 255, 255), anchor="mm", font=title_font)
@@ -327,35 +300,13 @@ def create_conclusion():
 
     return img
 
-# 生成所有图片
+# 生成所有图片：输出文件名、体积上限见同目录的 images.json，只重新生成有变化的图片
 if __name__ == "__main__":
-    output_dir = "/Users/victoryx/code/document/公众号写作/images/sleepless-agent"
+    from image_manifest import build
 
     print("Generating images...")
 
-    print("1. Creating main cover...")
-    img1 = create_main_cover()
-    img1.save(f"{output_dir}/01-main.jpg", quality=95)
-    print("   ✓ Saved 01-main.jpg")
-
-    print("2. Creating multi-agent workflow...")
-    img2 = create_multi_agent_workflow()
-    img2.save(f"{output_dir}/02-multi-agent.jpg", quality=95)
-    print("   ✓ Saved 02-multi-agent.jpg")
-
-    print("3. Creating quickstart guide...")
-    img3 = create_quickstart_guide()
-    img3.save(f"{output_dir}/03.5-quickstart.jpg", quality=95)
-    print("   ✓ Saved 03.5-quickstart.jpg")
-
-    print("4. Creating scenarios...")
-    img4 = create_scenarios()
-    img4.save(f"{output_dir}/03-scenarios.jpg", quality=95)
-    print("   ✓ Saved 03-scenarios.jpg")
-
-    print("5. Creating conclusion...")
-    img5 = create_conclusion()
-    img5.save(f"{output_dir}/04-conclusion.jpg", quality=95)
-    print("   ✓ Saved 04-conclusion.jpg")
-
+    result = build(os.path.dirname(os.path.abspath(__file__)))
+    if result["failed"]:
+        sys.exit(1)
     print("\n✅ All images generated successfully!")
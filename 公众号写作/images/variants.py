@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多尺寸、多格式配图 - 一次解码，输出 1x/2x 宽度和 JPEG/WebP/AVIF
+
+保存时按配置输出一组变体，并在旁边写一个清单 <名称>.variants.json，
+列出每个变体的路径、格式、尺寸和字节数，下游生成 HTML 时按浏览器支持
+的格式和需要的宽度挑最小的一个（见 pick_variant）。
+
+    - 原图只解码一次，每个宽度只缩放一次，各格式共用缩放结果
+    - 不放大：比原图宽的宽度自动跳过
+    - 当前 Pillow 不支持的格式（常见是 AVIF）跳过并记在清单的 skipped 里
+    - JPEG 可以给体积预算（max_kb，见 jpeg_budget）
+    - 所有文件都是内存编码后原子写入
+
+用法:
+    from variants import save_variants
+
+    save_variants(img, "cover.jpg", widths=[600, 1200], formats=["jpeg", "webp", "avif"])
+    # → cover.jpg（原图）、cover@600w.jpg、cover@600w.webp、cover@1200w.webp、
+    #   cover@600w.avif、cover@1200w.avif、cover.variants.json
+
+    python variants.py ../../教程截图/*.PNG --widths 750 1500 --formats jpeg webp
+"""
+
+import os
+import sys
+import json
+import argparse
+from io import BytesIO
+from pathlib import Path
+
+from PIL import Image, features
+
+from jpeg_budget import fit_jpeg, encode_jpeg
+
+# 默认：公众号正文宽度约 375pt，1x/2x 分别是 600/1200 像素宽
+DEFAULT_WIDTHS = (600, 1200)
+DEFAULT_FORMATS = ("jpeg", "webp", "avif")
+
+# 格式 → (扩展名, MIME, Pillow 编码参数)
+FORMATS = {
+    "jpeg": (".jpg", "image/jpeg", {"quality": 85}),
+    "webp": (".webp", "image/webp", {"quality": 80, "method": 4}),
+    "avif": (".avif", "image/avif", {"quality": 60}),
+    "png": (".png", "image/png", {"optimize": True}),
+}
+
+SIDECAR_SUFFIX = ".variants.json"
+
+
+def format_supported(fmt: str):
+    """当前 Pillow 能否编码该格式"""
+    if fmt in ("webp", "avif"):
+        return bool(features.check(fmt))
+    return fmt in FORMATS
+
+
+def _atomic_write(path: Path, data: bytes):
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def _encode(img, fmt: str, max_kb: float = None):
+    if fmt == "jpeg":
+        if max_kb:
+            data, _ = fit_jpeg(img, int(max_kb * 1024))
+            return data
+        return encode_jpeg(img, FORMATS["jpeg"][2]["quality"])
+
+    buffer = BytesIO()
+    if fmt != "png" and img.mode not in ("RGB", "RGBA", "L"):
+        img = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+    img.save(buffer, fmt.upper(), **FORMATS[fmt][2])
+    return buffer.getvalue()
+
+
+def variant_path(path: Path, width: int, fmt: str):
+    """cover.jpg + 600 + webp → cover@600w.webp"""
+    return path.with_name(f"{path.stem}@{width}w{FORMATS[fmt][0]}")
+
+
+def sidecar_path(path):
+    path = Path(path)
+    return path.with_name(path.stem + SIDECAR_SUFFIX)
+
+
+def _format_of(path: Path):
+    ext = {".jpeg": ".jpg"}.get(path.suffix.lower(), path.suffix.lower())
+    for fmt, spec in FORMATS.items():
+        if spec[0] == ext:
+            return fmt
+    raise ValueError(f"不支持的图片格式: {path.suffix}")
+
+
+def save_variants(img, path, widths=DEFAULT_WIDTHS, formats=DEFAULT_FORMATS,
+                  max_kb: float = None, write_primary: bool = True):
+    """保存原图 path（原宽，格式按扩展名）及全部变体，写旁路清单并返回清单内容
+
+    widths 里比原图宽的跳过，原宽总会包含；max_kb 只作用于 JPEG。
+    write_primary=False 时 path 已存在（比如已有截图），只登记不重写。
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    img.load()
+
+    full_width, full_height = img.size
+    primary_fmt = _format_of(path)
+
+    # 原宽 + 不超过原宽的目标宽度，从大到小
+    sizes = sorted({full_width} | {w for w in (widths or ()) if w < full_width}, reverse=True)
+
+    manifest = {
+        "source": path.name,
+        "width": full_width,
+        "height": full_height,
+        "variants": [],
+        "skipped": [],
+    }
+    supported = []
+    for fmt in formats:
+        if fmt not in FORMATS:
+            raise ValueError(f"未知格式 {fmt!r}，可选 {', '.join(FORMATS)}")
+        if format_supported(fmt):
+            supported.append(fmt)
+        else:
+            manifest["skipped"].append(fmt)
+
+    def record(out: Path, fmt: str, size, nbytes: int):
+        manifest["variants"].append({
+            "path": out.name, "format": fmt, "mime": FORMATS[fmt][1],
+            "width": size[0], "height": size[1], "bytes": nbytes,
+        })
+
+    if write_primary:
+        data = _encode(img, primary_fmt, max_kb)
+        _atomic_write(path, data)
+        record(path, primary_fmt, img.size, len(data))
+    else:
+        record(path, primary_fmt, img.size, path.stat().st_size)
+
+    for width in sizes:
+        if width == full_width:
+            scaled = img
+        else:
+            height = max(1, round(full_height * width / full_width))
+            scaled = img.resize((width, height), Image.Resampling.LANCZOS)
+
+        for fmt in supported:
+            if width == full_width and fmt == primary_fmt:
+                continue   # 就是原图
+            out = variant_path(path, width, fmt)
+            data = _encode(scaled, fmt, max_kb)
+            _atomic_write(out, data)
+            record(out, fmt, scaled.size, len(data))
+
+    manifest["variants"].sort(key=lambda v: (v["width"], v["bytes"]))
+    _atomic_write(sidecar_path(path),
+                  (json.dumps(manifest, ensure_ascii=False, indent=2) + "\n").encode("utf-8"))
+    return manifest
+
+
+def pick_variant(manifest, min_width: int = 0, accept=("jpeg",)):
+    """按浏览器支持的格式挑宽度不小于 min_width 的最小文件
+
+    manifest 可以是 save_variants 的返回值或旁路清单路径；没有满足宽度的
+    时退回最宽的可用变体
+    """
+    if not isinstance(manifest, dict):
+        manifest = json.loads(Path(manifest).read_text(encoding="utf-8"))
+    usable = [v for v in manifest["variants"] if v["format"] in accept]
+    if not usable:
+        return None
+    wide_enough = [v for v in usable if v["width"] >= min_width]
+    if wide_enough:
+        return min(wide_enough, key=lambda v: v["bytes"])
+    return max(usable, key=lambda v: (v["width"], -v["bytes"]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="为已有图片生成多尺寸、多格式变体")
+    parser.add_argument("images", nargs="+", help="图片文件（原文件不动，变体写在旁边）")
+    parser.add_argument("--widths", type=int, nargs="*", default=list(DEFAULT_WIDTHS))
+    parser.add_argument("--formats", nargs="*", default=list(DEFAULT_FORMATS),
+                        choices=list(FORMATS))
+    parser.add_argument("--max-kb", type=float, help="JPEG 变体体积上限（KB）")
+    args = parser.parse_args()
+
+    failed = 0
+    for name in args.images:
+        source = Path(name)
+        try:
+            with Image.open(source) as img:
+                manifest = save_variants(img, source, args.widths, args.formats,
+                                         args.max_kb, write_primary=False)
+        except (OSError, ValueError) as e:
+            print(f"✗ {source}: {e}")
+            failed += 1
+            continue
+        total = sum(v["bytes"] for v in manifest["variants"])
+        print(f"✓ {source.name}: {len(manifest['variants'])} 个变体，共 {total / 1024:.1f}KB"
+              + (f"（跳过 {', '.join(manifest['skipped'])}）" if manifest["skipped"] else ""))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+润色输出清单 - 记录每次润色任务的产物
+
+目录结构:
+    manifest/
+    ├── manifest.jsonl      # 追加写的任务日志（一行一条，永不改写）
+    └── jobs/
+        └── <job_id>.json   # 按任务 ID 建的索引，查询时直接读取，O(1)
+
+每条记录包含: job_id, input_hash, title, output_path, started_at,
+finished_at, seconds, resolved_by（输出路径是怎么确定的）。靠目录扫描
+（resolved_by="scan"）找到、但期间有其它任务同时运行的，output_path 为空，
+另记 ambiguous=true 和 candidate_path（扫描到的文件，需人工确认）
+"""
+
+import os
+import json
+import time
+import uuid
+import hashlib
+from pathlib import Path
+from datetime import datetime
+from contextlib import contextmanager
+
+# 锁文件超过这个时间仍未释放，视为上一个进程异常退出留下的
+LOCK_STALE_SECONDS = 30
+
+
+def new_job_id():
+    """生成任务 ID：时间戳 + 随机后缀，便于人工排序查看"""
+    return f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+
+
+def hash_content(content: str):
+    """计算输入内容的哈希"""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+@contextmanager
+def _locked(manifest_dir: Path):
+    """跨进程互斥锁（基于 O_EXCL 创建锁文件，Windows/Linux 通用）"""
+    lock_path = manifest_dir / ".lock"
+    while True:
+        try:
+            fd = os.open(str(lock_path), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - lock_path.stat().st_mtime > LOCK_STALE_SECONDS:
+                    lock_path.unlink()
+                    continue
+            except FileNotFoundError:
+                continue
+            time.sleep(0.05)
+
+    try:
+        yield
+    finally:
+        os.close(fd)
+        try:
+            lock_path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def record_job(manifest_dir: Path, entry: dict):
+    """写入一条任务记录：先落 jobs/<job_id>.json，再追加到日志"""
+    manifest_dir = Path(manifest_dir)
+    jobs_dir = manifest_dir / "jobs"
+    jobs_dir.mkdir(parents=True, exist_ok=True)
+
+    data = json.dumps(entry, ensure_ascii=False)
+
+    # 单任务索引：先写临时文件再原子替换，读到的永远是完整 JSON
+    job_file = jobs_dir / f"{entry['job_id']}.json"
+    tmp_file = job_file.with_suffix(f".{os.getpid()}.tmp")
+    tmp_file.write_text(data, encoding="utf-8")
+    os.replace(tmp_file, job_file)
+
+    with _locked(manifest_dir):
+        with open(manifest_dir / "manifest.jsonl", "a", encoding="utf-8") as f:
+            f.write(data + "\n")
+
+
+def lookup_job(manifest_dir: Path, job_id: str):
+    """按任务 ID 查询记录，不存在返回 None"""
+    job_file = Path(manifest_dir) / "jobs" / f"{job_id}.json"
+    try:
+        return json.loads(job_file.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
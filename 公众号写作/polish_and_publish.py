@@ -20,37 +20,222 @@
 
     # 指定公众号账号
     python polish_and_publish.py input.md --publish --account 0
+
+    # 批量润色目录（4 个并发）
+    python polish_and_publish.py --batch _协作文档 --jobs 4
+
+    # 监听草稿目录，保存后自动重新润色
+    python polish_and_publish.py --watch
 """
 
 import os
 import sys
+import glob
 import json
+import time
+import asyncio
 import argparse
-import subprocess
+import threading
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
 from pathlib import Path
 from datetime import datetime
 
+from output_manifest import new_job_id, hash_content, record_job, lookup_job
+from polish_cache import PolishCache
+from aiwritex_worker import WorkerPool
+from aiwritex_client import get_client
+from process_supervisor import run_supervised, terminate_all
+import stage_profiler
+from stage_profiler import stage
+
 # 路径配置
 DOCUMENT_ROOT = Path(__file__).parent
 AIWRITEX_ROOT = Path("I:/ai/AIWrite")
 OUTPUT_DIR = AIWRITEX_ROOT / "output" / "article"
 TEMP_DIR = AIWRITEX_ROOT / "temp"
+MANIFEST_DIR = AIWRITEX_ROOT / "output" / "manifest"
+CACHE_DIR = DOCUMENT_ROOT / ".polish_cache"
+LOG_DIR = AIWRITEX_ROOT / "output" / "logs"
+PLATFORMS_CACHE_FILE = DOCUMENT_ROOT / ".platforms_cache.json"
+
+# 平台/账号列表缓存有效期（秒）
+PLATFORMS_CACHE_TTL = 3600
+
+# 润色超时：按文章长度放宽总时长；长时间无输出单独判定为卡死
+POLISH_BASE_TIMEOUT = 180
+POLISH_SECONDS_PER_KCHAR = 20
+POLISH_MAX_TIMEOUT = 1800
+POLISH_STALL_TIMEOUT = 90
 
 # API 配置
 AIWRITEX_API = "http://127.0.0.1:8000"
 
+# API 调用截止时间（秒，含重试）
+PUBLISH_DEADLINE = 60
+PLATFORMS_DEADLINE = 10
+
+# 批量发布：每个请求最多带几篇文章、失败项最多重试几轮
+BULK_CHUNK_SIZE = 10
+BULK_MAX_ROUNDS = 3
+
+# 匹配 AIWriteX 日志中的 html 输出路径
+_HTML_PATH_RE = re.compile(r"([^\s'\"]+\.html)\b")
+
+# 批量模式默认并发数
+DEFAULT_JOBS = 2
+
+# --watch 默认监听的草稿目录
+DRAFTS_DIR = DOCUMENT_ROOT / "_协作文档"
+
+# 批量模式下多线程同时打印，加锁避免输出交错
+_print_lock = threading.Lock()
+
+# 正在润色的任务，及运行期间与其它任务重叠过的任务（目录扫描结果不可信）
+_running_jobs = set()
+_overlapped_jobs = set()
+_running_lock = threading.Lock()
+
+
+def log(message: str):
+    """线程安全的打印"""
+    with _print_lock:
+        print(message, flush=True)
+
+
+def _job_started(job_id: str):
+    with _running_lock:
+        _running_jobs.add(job_id)
+        if len(_running_jobs) > 1:
+            _overlapped_jobs.update(_running_jobs)
+
+
+def _job_finished(job_id: str):
+    """任务结束，返回运行期间是否有其它任务在同时运行"""
+    with _running_lock:
+        _running_jobs.discard(job_id)
+        overlapped = job_id in _overlapped_jobs
+        _overlapped_jobs.discard(job_id)
+        return overlapped
+
+
+def polish_timeout(content: str):
+    """按文章长度计算润色总超时（秒）"""
+    timeout = POLISH_BASE_TIMEOUT + len(content) / 1000 * POLISH_SECONDS_PER_KCHAR
+    return min(timeout, POLISH_MAX_TIMEOUT)
+
+
+def call_aiwritex_polish(title: str, content: str, job_id: str = None,
+                         cache: PolishCache = None, refresh: bool = False,
+                         worker: WorkerPool = None, cancel: threading.Event = None):
+    """调用 AIWriteX 进行润色和配图，结果记入输出清单
+
+    cache: 润色缓存，为 None 时不读也不写
+    refresh: 跳过缓存读取，强制重新润色（结果仍会写回缓存）
+    worker: 常驻 worker 池，为 None 时每篇文章单独启动 main.py
+    cancel: 置位后终止正在运行的 AIWriteX 进程（仅独立进程模式）
+    """
+    job_id = job_id or new_job_id()
+
+    if cache and not refresh:
+        with stage("cache_lookup"):
+            cached = cache.get(title, content)
+        if cached:
+            print(f"⚡ 命中润色缓存: {title}")
+            record_job(MANIFEST_DIR, {
+                "job_id": job_id,
+                "input_hash": hash_content(content),
+                "title": title,
+                "output_path": str(cached),
+                "resolved_by": "cache",
+                "started_at": datetime.now().isoformat(timespec="seconds"),
+                "finished_at": datetime.now().isoformat(timespec="seconds"),
+                "seconds": 0.0,
+            })
+            return cached
 
-def call_aiwritex_polish(title: str, content: str):
-    """调用 AIWriteX 进行润色和配图"""
     print(f"🎨 正在调用 AIWriteX 润色文章...")
     print(f"   标题: {title}")
+    print(f"   任务: {job_id}")
+
+    # 告诉 AIWriteX 本次任务的 ID 和期望的输出路径；不认识这两个变量也不影响运行
+    expected_output = OUTPUT_DIR / f"{job_id}.html"
+    job_env = {
+        "AIWRITEX_JOB_ID": job_id,
+        "AIWRITEX_OUTPUT_FILE": str(expected_output),
+    }
+
+    started_at = datetime.now()
+    start = time.time()
+    _job_started(job_id)
 
+    try:
+        if worker:
+            # 正文直接通过连接交给常驻 worker，不再为每篇文章生成临时文件
+            with stage("worker"):
+                returncode, stdout, stderr = worker.polish(title, content, job_env,
+                                                           timeout=polish_timeout(content))
+        else:
+            returncode, stdout, stderr = run_main_subprocess(title, content, job_id, job_env,
+                                                             cancel)
+
+        if returncode == 0:
+            print("✅ AIWriteX 处理完成")
+            with stage("output_search"):
+                output_path, resolved_by = resolve_output_path(
+                    expected_output, stdout, title, start)
+            overlapped = _job_finished(job_id)
+
+            # 目录扫描只能按时间和标题猜，期间有其它任务在跑时可能拿到别人的
+            # 产物：记为 ambiguous 并判定任务失败，不发布、不写缓存
+            ambiguous = resolved_by == "scan" and output_path is not None and overlapped
+            entry = {
+                "job_id": job_id,
+                "input_hash": hash_content(content),
+                "title": title,
+                "output_path": None if ambiguous else (str(output_path) if output_path else None),
+                "resolved_by": resolved_by,
+                "started_at": started_at.isoformat(timespec="seconds"),
+                "finished_at": datetime.now().isoformat(timespec="seconds"),
+                "seconds": round(time.time() - start, 2),
+                "log_path": None if worker else str(LOG_DIR / f"{job_id}.jsonl"),
+            }
+            if ambiguous:
+                entry["ambiguous"] = True
+                entry["candidate_path"] = str(output_path)
+            record_job(MANIFEST_DIR, entry)
+
+            if ambiguous:
+                print(f"❌ 无法确定输出文件: 扫描到 {output_path}，但期间有其它润色任务"
+                      f"同时运行，可能是别的文章的产物，请人工确认")
+                return None
+
+            if cache and output_path:
+                with stage("cache_store"):
+                    cache.put(title, content, output_path)
+            return output_path
+        else:
+            print(f"❌ AIWriteX 处理失败: {stderr}")
+            return None
+
+    except Exception as e:
+        print(f"❌ 调用 AIWriteX 出错: {e}")
+        return None
+    finally:
+        _job_finished(job_id)
+
+
+def run_main_subprocess(title: str, content: str, job_id: str, job_env: dict,
+                        cancel: threading.Event = None):
+    """单独启动一次 AIWriteX main.py，返回 (returncode, stdout, stderr)"""
     TEMP_DIR.mkdir(parents=True, exist_ok=True)
 
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    temp_file = TEMP_DIR / f"input_{timestamp}.md"
+    # 以任务 ID 命名，并发任务的临时文件互不覆盖
+    temp_file = TEMP_DIR / f"input_{job_id}.md"
 
-    temp_file.write_text(content, encoding="utf-8")
+    with stage("temp_write"):
+        temp_file.write_text(content, encoding="utf-8")
     print(f"📝 临时文件: {temp_file}")
 
     cmd = [
@@ -60,43 +245,74 @@ def call_aiwritex_polish(title: str, content: str):
         "--title", title,
     ]
 
-    try:
-        result = subprocess.run(
+    timeout = polish_timeout(content)
+    with stage("subprocess"):
+        returncode, stdout, stderr, reason = run_supervised(
             cmd,
             cwd=str(AIWRITEX_ROOT),
-            capture_output=True,
-            text=True,
-            timeout=300,
+            # 关闭子进程输出缓冲，否则管道里迟迟看不到输出会被误判为卡死
+            env=dict(os.environ, PYTHONUNBUFFERED="1", **job_env),
+            log_path=LOG_DIR / f"{job_id}.jsonl",
+            total_timeout=timeout,
+            stall_timeout=POLISH_STALL_TIMEOUT,
+            label=title,
+            heartbeat=log,
+            cancel=cancel,
         )
 
-        if result.returncode == 0:
-            print("✅ AIWriteX 处理完成")
-            temp_file.unlink()
-            return find_output_file(title)
-        else:
-            print(f"❌ AIWriteX 处理失败: {result.stderr}")
-            return None
+    if reason == "stall":
+        stderr = f"{POLISH_STALL_TIMEOUT}s 无任何输出，判定为卡死并已终止\n{stderr}"
+    elif reason == "timeout":
+        stderr = f"超过总时长 {timeout:.0f}s，已终止\n{stderr}"
+    elif reason == "cancelled":
+        stderr = "已取消"
 
-    except Exception as e:
-        print(f"❌ 调用 AIWriteX 出错: {e}")
-        return None
+    if returncode == 0:
+        temp_file.unlink()
+    return returncode, stdout, stderr
+
+
+def terminate_active_processes():
+    """终止所有正在运行的 AIWriteX 子进程（Ctrl-C 时调用）"""
+    terminate_all()
 
 
-def publish_to_wechat(article_path: str, account_index: int = 0):
+def resolve_output_path(expected_output: Path, stdout: str, title: str, since: float):
+    """确定本次任务的输出文件，返回 (路径, 确定方式)
+
+    依次尝试:
+        1. AIWriteX 按 AIWRITEX_OUTPUT_FILE 写出的文件
+        2. AIWriteX 标准输出里打印的 .html 路径（取最后一个存在的）
+        3. 旧的目录扫描，只看本任务开始之后写出的文件
+    """
+    if expected_output.exists():
+        return expected_output, "env"
+
+    for match in reversed(_HTML_PATH_RE.findall(stdout or "")):
+        path = Path(match)
+        if not path.is_absolute():
+            path = AIWRITEX_ROOT / path
+        if path.exists():
+            return path, "stdout"
+
+    return find_output_file(title, since=since), "scan"
+
+
+def publish_to_wechat(article_path: str, account_index: int = 0,
+                      deadline: float = PUBLISH_DEADLINE):
     """一键发布到微信公众号"""
     print(f"\n📤 正在发布到公众号...")
 
     try:
-        import requests
-
-        url = f"{AIWRITEX_API}/api/articles/publish"
         payload = {
             "article_paths": [article_path],
             "account_indices": [account_index],
             "platform": "wechat"
         }
 
-        response = requests.post(url, json=payload, timeout=60)
+        with stage("publish_http"):
+            response = get_client(AIWRITEX_API).post(
+                "/api/articles/publish", json=payload, deadline=deadline)
 
         if response.status_code == 200:
             result = response.json()
@@ -118,34 +334,216 @@ def publish_to_wechat(article_path: str, account_index: int = 0):
         return False, str(e)
 
 
-def get_wechat_accounts():
-    """获取已配置的微信公众号账号列表"""
+def _basename(path: str):
+    """文件名部分，/ 和 \\ 都当作分隔符（服务端可能是 Windows 路径）"""
+    return re.split(r"[\\/]", path)[-1]
+
+
+def _paths_in_message(message: str, paths):
+    """字符串错误信息里提到的文章：按路径/文件名整词匹配，a.html 不会匹配到 aa.html"""
+    tokens = [t for t in re.split(r"[\s'\"`，,:：;；()（）\[\]【】<>《》]+", message) if t]
+    names = {_basename(t) for t in tokens}
+    return [p for p in paths if p in tokens or _basename(p) in names]
+
+
+def _failed_items_from_details(details, paths, accounts):
+    """从 error_details 中定位失败的 (文章, 账号)，定位不到的返回 None
+
+    error_details 可能是字典（带 article_path/account_index）或字符串（包含文件名）
+    """
+    failed = {}
+    for detail in details:
+        if isinstance(detail, dict):
+            path = detail.get("article_path") or detail.get("path") or detail.get("article")
+            message = detail.get("error") or detail.get("message") or str(detail)
+            matched = [p for p in paths if path and (p == path or _basename(p) == _basename(path))]
+            account = detail.get("account_index")
+            targets = [account] if account is not None else accounts
+        else:
+            message = str(detail)
+            matched = _paths_in_message(message, paths)
+            targets = accounts
+
+        if not matched:
+            return None
+        for p in matched:
+            for a in targets:
+                failed[(p, a)] = message
+
+    return failed
+
+
+def _publish_chunk(paths, accounts, deadline: float):
+    """发送一个批量发布请求，返回 (失败项 {(文章, 账号): 原因}, 可重试的失败项集合)"""
+    items = [(p, a) for p in paths for a in accounts]
+    payload = {
+        "article_paths": list(paths),
+        "account_indices": list(accounts),
+        "platform": "wechat"
+    }
+
     try:
-        import requests
+        with stage("publish_http"):
+            # retries=0：客户端内部也不重放，失败项由 publish_bulk 按结果重试
+            response = get_client(AIWRITEX_API).post(
+                "/api/articles/publish", json=payload, deadline=deadline, retries=0)
+    except Exception as e:
+        # 请求结果未知（可能已部分发布），不自动重试
+        return {item: str(e) for item in items}, set()
+
+    if response.status_code != 200:
+        try:
+            error = response.json().get("detail", "API 调用失败")
+        except ValueError:
+            error = f"HTTP {response.status_code}"
+        return {item: error for item in items}, set()
 
-        url = f"{AIWRITEX_API}/api/articles/platforms"
-        response = requests.get(url, timeout=10)
+    result = response.json()
+    success_count = result.get("success_count", 0)
+    details = result.get("error_details") or []
 
-        if response.status_code == 200:
-            result = response.json()
-            platforms = result.get("data", [])
+    if success_count >= len(items):
+        return {}, set()
+    if success_count == 0:
+        message = "; ".join(map(str, details)) or "未知错误"
+        return {item: message for item in items}, set(items)
 
-            for platform in platforms:
-                if platform["id"] == "wechat":
-                    return platform.get("accounts", [])
+    failed = _failed_items_from_details(details, paths, accounts)
+    if failed is None or len(failed) != len(items) - success_count:
+        # 部分成功但无法确定是哪几篇，重试可能重复发布，只报告不重试
+        message = "部分失败，无法定位: " + "; ".join(map(str, details))
+        return {item: message for item in items}, set()
 
-        return []
+    return failed, set(failed)
 
+
+def publish_bulk(article_paths, account_indices, chunk_size: int = BULK_CHUNK_SIZE,
+                 deadline: float = PUBLISH_DEADLINE, max_rounds: int = BULK_MAX_ROUNDS):
+    """批量发布多篇文章到多个账号，只重试明确失败的子集
+
+    返回 {(文章路径, 账号索引): (是否成功, 说明)}
+    """
+    article_paths = [str(p) for p in article_paths]
+    accounts = list(account_indices)
+    pending = [(p, a) for p in article_paths for a in accounts]
+    results = {}
+    requests_sent = 0
+
+    print(f"\n📤 批量发布: {len(article_paths)} 篇 × {len(accounts)} 个账号")
+
+    for round_no in range(1, max_rounds + 1):
+        if not pending:
+            break
+
+        # 待发账号相同的文章合并到同一个请求里，再按 chunk_size 切块
+        by_path = {}
+        for p, a in pending:
+            by_path.setdefault(p, []).append(a)
+        groups = {}
+        for p, accs in by_path.items():
+            groups.setdefault(tuple(sorted(accs)), []).append(p)
+
+        retry = []
+        for accs, paths in groups.items():
+            for i in range(0, len(paths), chunk_size):
+                chunk = paths[i:i + chunk_size]
+                failed, retryable = _publish_chunk(chunk, accs, deadline)
+                requests_sent += 1
+
+                for item in ((p, a) for p in chunk for a in accs):
+                    if item in failed:
+                        results[item] = (False, failed[item])
+                        if item in retryable:
+                            retry.append(item)
+                    else:
+                        results[item] = (True, "发布成功")
+
+        if retry and round_no < max_rounds:
+            print(f"   第 {round_no} 轮失败 {len(retry)} 项，重试失败子集...")
+        pending = retry
+
+    ok_count = sum(1 for ok, _ in results.values() if ok)
+    print(f"   成功: {ok_count}/{len(results)}, 请求数: {requests_sent}")
+    for (p, a), (ok, message) in results.items():
+        if not ok:
+            print(f"   ❌ [{a}] {Path(p).name}: {message}")
+
+    return results
+
+
+def get_platforms(refresh: bool = False):
+    """获取 AIWriteX 平台及账号列表，优先读本地缓存（有效期 PLATFORMS_CACHE_TTL）
+
+    refresh: 忽略缓存，重新请求并更新缓存
+    获取失败返回 None（与“没有平台”区分开）
+    """
+    if not refresh:
+        try:
+            cached = json.loads(PLATFORMS_CACHE_FILE.read_text(encoding="utf-8"))
+            if time.time() - cached["fetched_at"] < PLATFORMS_CACHE_TTL:
+                return cached["data"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+    try:
+        with stage("platforms_http"):
+            response = get_client(AIWRITEX_API).get(
+                "/api/articles/platforms", deadline=PLATFORMS_DEADLINE)
+        if response.status_code != 200:
+            return None
+        platforms = response.json().get("data", [])
     except Exception:
-        return []
+        return None
 
+    PLATFORMS_CACHE_FILE.write_text(
+        json.dumps({"fetched_at": time.time(), "data": platforms}, ensure_ascii=False),
+        encoding="utf-8")
+    return platforms
+
+
+def invalidate_platforms_cache():
+    """删除平台/账号列表缓存"""
+    try:
+        PLATFORMS_CACHE_FILE.unlink()
+    except FileNotFoundError:
+        pass
+
+
+def get_wechat_accounts(refresh: bool = False):
+    """获取已配置的微信公众号账号列表"""
+    for platform in get_platforms(refresh) or []:
+        if platform["id"] == "wechat":
+            return platform.get("accounts", [])
 
-def find_output_file(title: str):
-    """查找 AIWriteX 生成的输出文件"""
+    return []
+
+
+def check_account_indices(indices):
+    """发布前在本地校验账号索引，返回错误信息；无法获取账号列表时跳过校验"""
+    platforms = get_platforms()
+    if platforms is None:
+        print("⚠️ 无法获取账号列表，跳过账号校验")
+        return None
+
+    valid = {acc["index"] for acc in get_wechat_accounts()}
+    invalid = [i for i in indices if i not in valid]
+    if invalid:
+        return (f"账号索引不存在: {invalid}，可用: {sorted(valid)}"
+                f"（账号有变动可用 --refresh-accounts 刷新缓存）")
+    return None
+
+
+def find_output_file(title: str, since: float = None):
+    """扫描目录查找 AIWriteX 生成的输出文件（无法精确定位时的兜底）
+
+    since: 只考虑该时间戳之后修改的文件，避免拿到其他任务的旧产物
+    """
     if not OUTPUT_DIR.exists():
         return None
 
     html_files = list(OUTPUT_DIR.glob("*.html"))
+    if since is not None:
+        html_files = [f for f in html_files if f.stat().st_mtime >= since]
     if not html_files:
         return None
 
@@ -160,17 +558,205 @@ def find_output_file(title: str):
 def parse_markdown_file(file_path: Path):
     """解析 Markdown 文件，提取标题和内容"""
     content = file_path.read_text(encoding="utf-8")
+    return extract_title(content), content
 
-    lines = content.split("\n")
-    title = "无标题"
 
-    for line in lines:
+def extract_title(content: str):
+    """取 Markdown 第一个一级标题作为文章标题"""
+    for line in content.split("\n"):
         line = line.strip()
         if line.startswith("# "):
-            title = line[2:].strip()
-            break
+            return line[2:].strip()
+
+    return "无标题"
+
+
+def load_article(file_path: Path, title: str = None):
+    """读取文章，返回 (标题, 内容)"""
+    with stage("parse"):
+        if file_path.suffix.lower() == ".md":
+            parsed_title, content = parse_markdown_file(file_path)
+        else:
+            parsed_title = file_path.stem.replace("_", "|")
+            content = file_path.read_text(encoding="utf-8")
+
+    return title or parsed_title, content
+
+
+def collect_batch_inputs(pattern: str, suffix: str = ".md"):
+    """展开 --batch 参数：目录取其中全部 suffix 文件，否则按 glob 匹配"""
+    path = Path(pattern)
+    if path.is_dir():
+        files = path.glob(f"*{suffix}")
+    else:
+        files = (Path(f) for f in glob.glob(pattern, recursive=True))
+
+    return sorted(f for f in files if f.is_file())
+
+
+def polish_one(file_path: Path, publish: bool = False, account_index: int = 0,
+               cache: PolishCache = None, refresh: bool = False,
+               worker: WorkerPool = None, deadline: float = PUBLISH_DEADLINE):
+    """批量模式下处理单篇文章，任何异常都收敛为失败结果"""
+    result = {
+        "file": file_path,
+        "job_id": new_job_id(),
+        "title": file_path.stem,
+        "output": None,
+        "published": False,
+        "ok": False,
+        "error": "",
+        "seconds": 0.0,
+    }
+    start = time.perf_counter()
+
+    try:
+        title, content = load_article(file_path)
+        result["title"] = title
+
+        output_path = call_aiwritex_polish(title, content, result["job_id"], cache, refresh, worker)
+        if not output_path:
+            result["error"] = "润色失败"
+            return result
+        result["output"] = output_path
+
+        if publish:
+            success, message = publish_to_wechat(str(output_path), account_index, deadline)
+            if not success:
+                result["error"] = f"发布失败: {message}"
+                return result
+            result["published"] = True
+
+        result["ok"] = True
+        return result
+
+    except Exception as e:
+        result["error"] = str(e)
+        return result
+
+    finally:
+        result["seconds"] = time.perf_counter() - start
+
+
+def print_batch_summary(results, elapsed: float):
+    """打印批量处理汇总表和吞吐量"""
+    print("\n📊 批量处理汇总:")
+    print(f"   {'状态':<4} {'耗时':>8}  {'文件':<40} 结果")
+    for r in results:
+        status = "✅" if r["ok"] else "❌"
+        detail = str(r["output"]) if r["ok"] else r["error"]
+        print(f"   {status:<4} {r['seconds']:>7.1f}s  {r['file'].name:<40} {detail}")
+
+    ok_count = sum(1 for r in results if r["ok"])
+    minutes = elapsed / 60 if elapsed > 0 else 0
+    throughput = ok_count / minutes if minutes else 0.0
+
+    print(f"\n   成功: {ok_count}/{len(results)}")
+    print(f"   总耗时: {elapsed:.1f}s")
+    print(f"   吞吐量: {throughput:.2f} 篇/分钟")
+
+
+def print_cache_stats(cache: PolishCache):
+    """打印本次运行和累计的缓存命中情况"""
+    total = cache.stats()
+    print(f"   缓存: 本次命中 {cache.hits} / 未命中 {cache.misses}, "
+          f"累计命中 {total['hits']} / 未命中 {total['misses']}")
+
+
+def print_api_latency():
+    """打印 AIWriteX API 各接口的延迟分布"""
+    for name, buckets in get_client(AIWRITEX_API).latency_report().items():
+        dist = ", ".join(f"{label}: {n}" for label, n in buckets.items())
+        print(f"   API {name}: {dist}")
+
+
+def print_worker_latency(worker: WorkerPool):
+    """打印常驻 worker 的冷/热启动耗时"""
+    report = worker.latency_report()
+    print(f"   Worker: 冷启动 {report['cold_count']} 次, 平均 {report['cold_avg_seconds']:.1f}s; "
+          f"热运行 {report['warm_count']} 次, 平均 {report['warm_avg_seconds']:.1f}s")
+    for note in report["warmup"]:
+        print(f"   Worker 预热: {note}")
+
+
+def run_batch(files, jobs: int = DEFAULT_JOBS, publish: bool = False, account_index: int = 0,
+              cache: PolishCache = None, refresh: bool = False,
+              worker: WorkerPool = None, deadline: float = PUBLISH_DEADLINE):
+    """并发润色一批文章，单篇失败不影响其他文章"""
+    jobs = max(1, min(jobs, len(files)))
+    print(f"\n📚 批量模式: {len(files)} 篇文章, 并发 {jobs}")
+
+    start = time.perf_counter()
+    results = []
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = {
+            pool.submit(polish_one, f, publish, account_index, cache, refresh,
+                        worker, deadline): f
+            for f in files
+        }
+        for future in as_completed(futures):
+            r = future.result()
+            results.append(r)
+            status = "✅" if r["ok"] else "❌"
+            log(f"{status} [{len(results)}/{len(files)}] {r['file'].name} ({r['seconds']:.1f}s)")
+
+    finish_batch(results, files, time.perf_counter() - start, cache, worker, publish)
+    return results
+
+
+def finish_batch(results, files, elapsed: float, cache: PolishCache = None,
+                 worker: WorkerPool = None, publish: bool = False):
+    """按输入顺序整理结果并打印汇总"""
+    order = {f: i for i, f in enumerate(files)}
+    results.sort(key=lambda r: order[r["file"]])
+    print_batch_summary(results, elapsed)
+    if cache:
+        print_cache_stats(cache)
+    if worker:
+        print_worker_latency(worker)
+    if publish:
+        print_api_latency()
+
+
+def watch_drafts(directory: Path, jobs: int = DEFAULT_JOBS, cache: PolishCache = None,
+                 polling: bool = False):
+    """监听草稿目录，内容变化后重新润色（直到 Ctrl-C）"""
+    from draft_watcher import DraftWatcher
 
-    return title, content
+    def polish(path: Path, content: str, cancel: threading.Event):
+        return call_aiwritex_polish(extract_title(content), content, cache=cache,
+                                    cancel=cancel)
+
+    watcher = DraftWatcher(directory, polish, jobs=jobs, polling=polling, log=log)
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        terminate_active_processes()
+    log(f"\n👋 已停止监听: 润色 {watcher.polished} 次, "
+        f"内容未变跳过 {watcher.skipped} 次, 取消过期任务 {watcher.cancelled} 次")
+
+
+def enable_profiling(report_path: str = None, cprofile_path: str = None):
+    """开启分阶段采样和/或 cProfile，进程退出时（含 sys.exit）写出结果"""
+    import atexit
+
+    if report_path:
+        stage_profiler.enable()
+        atexit.register(stage_profiler.write_report, Path(report_path))
+
+    if cprofile_path:
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+        def dump():
+            profiler.disable()
+            profiler.dump_stats(cprofile_path)
+            print(f"   cProfile: {cprofile_path}")
+
+        atexit.register(dump)
 
 
 def main():
@@ -190,6 +776,21 @@ def main():
 
   # 查看可用账号
   python polish_and_publish.py --list-accounts
+
+  # 批量润色目录下所有草稿（4 个并发）
+  python polish_and_publish.py --batch _协作文档 --jobs 4
+
+  # 批量润色后合并成少量请求发布到多个账号
+  python polish_and_publish.py --batch _协作文档 --publish --bulk-publish --accounts 0 1
+
+  # 流水线模式：润色和发布在不同文章间重叠执行
+  python polish_and_publish.py --batch _协作文档 --publish --pipeline --jobs 3
+
+  # 批量发布已有 HTML
+  python polish_and_publish.py --batch output/ --publish-only --accounts 0
+
+  # 监听草稿目录，保存后自动重新润色（默认 _协作文档）
+  python polish_and_publish.py --watch
         """
     )
 
@@ -199,12 +800,62 @@ def main():
     parser.add_argument("--account", type=int, default=0, help="公众号账号索引 (默认: 0)")
     parser.add_argument("--title", help="指定标题")
     parser.add_argument("--list-accounts", action="store_true", help="列出可用账号")
+    parser.add_argument("--refresh-accounts", action="store_true",
+                        help="忽略本地缓存，重新获取账号列表")
+    parser.add_argument("--invalidate-accounts", action="store_true",
+                        help="清除本地账号列表缓存")
+    parser.add_argument("--job-id", help="指定润色任务 ID（默认自动生成）")
+    parser.add_argument("--show-job", metavar="JOB_ID", help="查询润色任务的输出记录")
+    parser.add_argument("--no-cache", action="store_true", help="不读写润色缓存")
+    parser.add_argument("--refresh", action="store_true", help="忽略已有缓存，重新润色并更新缓存")
+    parser.add_argument("--cache-stats", action="store_true", help="查看润色缓存命中统计")
+    parser.add_argument("--api-deadline", type=float, default=PUBLISH_DEADLINE,
+                        help=f"发布 API 调用的总截止时间，含重试 (默认: {PUBLISH_DEADLINE}s)")
+    parser.add_argument("--worker", action="store_true",
+                        help="使用常驻 AIWriteX worker，避免每篇文章冷启动")
+    parser.add_argument("--worker-max-jobs", type=int, default=20,
+                        help="worker 处理多少篇后回收重启 (默认: 20)")
+    parser.add_argument("--worker-max-rss-mb", type=float, default=2048,
+                        help="worker 内存超过多少 MB 后回收重启 (默认: 2048)")
+    parser.add_argument("--profile", action="store_true",
+                        help="记录各阶段耗时/CPU/内存/读写量，结束时输出 JSON 报告")
+    parser.add_argument("--profile-out", default="polish_profile.json",
+                        help="--profile 报告路径 (默认: polish_profile.json)")
+    parser.add_argument("--cprofile", metavar="FILE",
+                        help="同时把主线程的 cProfile 结果写到 FILE（可用 snakeviz 等查看）")
+    parser.add_argument("--batch", metavar="DIR|GLOB", help="批量润色目录或 glob 匹配的文章")
+    parser.add_argument("--jobs", type=int, default=DEFAULT_JOBS,
+                        help=f"批量模式并发数 (默认: {DEFAULT_JOBS})")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="批量模式下用流水线调度，润色与发布在不同文章间重叠")
+    parser.add_argument("--publish-jobs", type=int, default=1,
+                        help="流水线模式的发布并发数 (默认: 1)")
+    parser.add_argument("--queue-size", type=int,
+                        help="流水线阶段间队列长度 (默认: 润色并发数 × 2)")
+    parser.add_argument("--bulk-publish", action="store_true",
+                        help="批量模式下全部润色完成后合并发布，而不是逐篇发布")
+    parser.add_argument("--accounts", type=int, nargs="+",
+                        help="批量发布的账号索引列表 (默认: --account)")
+    parser.add_argument("--chunk-size", type=int, default=BULK_CHUNK_SIZE,
+                        help=f"批量发布每个请求的文章数 (默认: {BULK_CHUNK_SIZE})")
+    parser.add_argument("--watch", metavar="DIR", nargs="?", const=str(DRAFTS_DIR),
+                        help="监听草稿目录，保存后自动重新润色 (默认: _协作文档)")
+    parser.add_argument("--poll", action="store_true",
+                        help="--watch 使用轮询而不是系统文件事件（网络盘等场景）")
 
     args = parser.parse_args()
 
+    if args.profile or args.cprofile:
+        enable_profiling(args.profile_out if args.profile else None, args.cprofile)
+
+    if args.invalidate_accounts:
+        invalidate_platforms_cache()
+        print("🗑️ 已清除账号列表缓存")
+        return
+
     # 列出账号
     if args.list_accounts:
-        accounts = get_wechat_accounts()
+        accounts = get_wechat_accounts(args.refresh_accounts)
         if accounts:
             print("\n📱 已配置的公众号账号:")
             for acc in accounts:
@@ -214,6 +865,117 @@ def main():
             print("   请在 AIWriteX 中配置微信公众号 credentials")
         return
 
+    cache = None if args.no_cache else PolishCache(CACHE_DIR, AIWRITEX_ROOT)
+
+    if args.cache_stats:
+        stats = PolishCache(CACHE_DIR, AIWRITEX_ROOT).stats()
+        print(f"\n⚡ 润色缓存: 命中 {stats['hits']} / 未命中 {stats['misses']}")
+        return
+
+    # 查询任务记录
+    if args.show_job:
+        entry = lookup_job(MANIFEST_DIR, args.show_job)
+        if not entry:
+            print(f"❌ 未找到任务: {args.show_job}")
+            sys.exit(1)
+        print(json.dumps(entry, ensure_ascii=False, indent=2))
+        return
+
+    if args.watch:
+        directory = Path(args.watch)
+        if not directory.is_dir():
+            print(f"❌ 目录不存在: {directory}")
+            sys.exit(1)
+        watch_drafts(directory, args.jobs, cache, args.poll)
+        return
+
+    accounts = args.accounts or [args.account]
+
+    # 发布前先校验账号，避免润色几分钟后才发现索引写错
+    if args.publish or args.publish_only:
+        if args.refresh_accounts:
+            get_platforms(refresh=True)
+        error = check_account_indices(accounts)
+        if error:
+            print(f"❌ {error}")
+            sys.exit(1)
+
+    # 批量发布已有 HTML
+    if args.batch and args.publish_only:
+        files = collect_batch_inputs(args.batch, ".html")
+        if not files:
+            print(f"❌ 没有匹配的文章: {args.batch}")
+            sys.exit(1)
+
+        results = publish_bulk([f.absolute() for f in files], accounts,
+                               args.chunk_size, args.api_deadline)
+        if not all(ok for ok, _ in results.values()):
+            sys.exit(1)
+        return
+
+    # 批量模式
+    if args.batch:
+        files = collect_batch_inputs(args.batch)
+        if not files:
+            print(f"❌ 没有匹配的文章: {args.batch}")
+            sys.exit(1)
+
+        # 合并发布时，润色阶段不逐篇发布
+        publish_each = args.publish and not args.bulk_publish
+
+        worker = None
+        if args.worker:
+            worker = WorkerPool(min(args.jobs, len(files)), AIWRITEX_ROOT,
+                                max_jobs=args.worker_max_jobs,
+                                max_rss_mb=args.worker_max_rss_mb)
+        try:
+            if args.pipeline:
+                from polish_pipeline import run_pipeline
+
+                def on_cancel():
+                    terminate_active_processes()
+                    if worker:
+                        worker.close(kill=True)
+
+                start = time.perf_counter()
+                results = asyncio.run(run_pipeline(
+                    files, load_article,
+                    partial(call_aiwritex_polish, cache=cache, refresh=args.refresh,
+                            worker=worker),
+                    partial(publish_to_wechat, account_index=args.account,
+                            deadline=args.api_deadline) if publish_each else None,
+                    polish_jobs=args.jobs, publish_jobs=args.publish_jobs, log=log,
+                    on_cancel=on_cancel, queue_size=args.queue_size))
+                finish_batch(results, files, time.perf_counter() - start,
+                             cache, worker, publish_each)
+            else:
+                results = run_batch(files, args.jobs, publish_each, args.account,
+                                    cache, args.refresh, worker, args.api_deadline)
+        except KeyboardInterrupt:
+            print("\n⛔ 已取消")
+            if worker:
+                # worker 在独立进程组里收不到 Ctrl-C，直接整组结束
+                worker.close(kill=True)
+            sys.exit(130)
+        finally:
+            if worker:
+                worker.close()
+
+        if args.publish and args.bulk_publish:
+            polished = [r for r in results if r["ok"]]
+            published = publish_bulk([r["output"] for r in polished], accounts,
+                                     args.chunk_size, args.api_deadline)
+            for r in polished:
+                outcomes = [published[(str(r["output"]), a)] for a in accounts]
+                r["published"] = all(ok for ok, _ in outcomes)
+                if not r["published"]:
+                    r["ok"] = False
+                    r["error"] = "发布失败: " + "; ".join(m for ok, m in outcomes if not ok)
+
+        if not all(r["ok"] for r in results):
+            sys.exit(1)
+        return
+
     # 检查输入
     if not args.input:
         parser.print_help()
@@ -225,14 +987,7 @@ def main():
         sys.exit(1)
 
     # 获取标题
-    if file_path.suffix.lower() == ".md":
-        title, content = parse_markdown_file(file_path)
-    else:
-        title = file_path.stem.replace("_", "|")
-        content = file_path.read_text(encoding="utf-8")
-
-    if args.title:
-        title = args.title
+    title, content = load_article(file_path, args.title)
 
     print(f"\n📄 文章信息:")
     print(f"   标题: {title}")
@@ -243,7 +998,17 @@ def main():
     if args.publish_only:
         article_path = str(file_path.absolute())
     else:
-        output_path = call_aiwritex_polish(title, content)
+        worker = WorkerPool(1, AIWRITEX_ROOT) if args.worker else None
+        try:
+            output_path = call_aiwritex_polish(title, content, args.job_id, cache,
+                                               args.refresh, worker)
+        except KeyboardInterrupt:
+            if worker:
+                worker.close(kill=True)
+            raise
+        finally:
+            if worker:
+                worker.close()
         if not output_path:
             print(f"\n❌ 润色失败")
             sys.exit(1)
@@ -252,7 +1017,7 @@ def main():
 
     # 发布
     if args.publish or args.publish_only:
-        success, message = publish_to_wechat(article_path, args.account)
+        success, message = publish_to_wechat(article_path, args.account, args.api_deadline)
 
         if success:
             print(f"\n🎉 完成! 文章已发布到公众号")
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+润色结果缓存 - 内容没变就不再调用 AIWriteX
+
+缓存键 = sha256(规范化后的 Markdown + 标题 + AIWriteX 版本/配置指纹)
+
+目录结构:
+    polish_cache/
+    ├── stats.json            # 累计命中/未命中次数
+    └── <key>/
+        ├── meta.json         # 标题、创建/访问时间、大小
+        ├── <article>.html    # 润色产物
+        └── ...               # HTML 中以相对路径引用的图片等资源
+"""
+
+import os
+import re
+import json
+import time
+import shutil
+import hashlib
+import threading
+from pathlib import Path
+
+# 默认上限：500MB、30 天
+DEFAULT_MAX_BYTES = 500 * 1024 * 1024
+DEFAULT_MAX_AGE_DAYS = 30
+
+# 参与 AIWriteX 指纹计算的文件（存在才计入）
+FINGERPRINT_FILES = ["main.py", "config.yaml", "config.json", "version.txt", ".git/HEAD"]
+
+# HTML 中引用的本地资源
+_ASSET_RE = re.compile(r'''(?:src|href)\s*=\s*["']([^"'#?]+)["']''', re.IGNORECASE)
+
+
+def normalize_markdown(content: str):
+    """规范化 Markdown：统一换行、去掉行尾空白和末尾空行"""
+    lines = content.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip("\n")
+
+
+def aiwritex_fingerprint(aiwritex_root: Path):
+    """AIWriteX 代码/配置指纹，升级或改配置后缓存自动失效"""
+    digest = hashlib.sha256()
+    for name in FINGERPRINT_FILES:
+        path = Path(aiwritex_root) / name
+        if path.is_file():
+            digest.update(name.encode("utf-8"))
+            digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def _local_assets(html_path: Path):
+    """找出 HTML 以相对路径引用、且确实存在的本地文件"""
+    try:
+        html = html_path.read_text(encoding="utf-8", errors="ignore")
+    except OSError:
+        return []
+
+    assets = []
+    for ref in set(_ASSET_RE.findall(html)):
+        if "://" in ref or ref.startswith(("/", "data:", "mailto:")):
+            continue
+        path = (html_path.parent / ref).resolve()
+        if path.is_file():
+            assets.append((ref, path))
+    return assets
+
+
+def _write_json(path: Path, data: dict):
+    """先写临时文件再原子替换，并发读到的永远是完整 JSON"""
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _dir_size(path: Path):
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+
+class PolishCache:
+    """内容寻址的润色结果缓存"""
+
+    def __init__(self, cache_dir: Path, aiwritex_root: Path,
+                 max_bytes: int = DEFAULT_MAX_BYTES,
+                 max_age_days: float = DEFAULT_MAX_AGE_DAYS):
+        self.cache_dir = Path(cache_dir)
+        self.fingerprint = aiwritex_fingerprint(aiwritex_root)
+        self.max_bytes = max_bytes
+        self.max_age = max_age_days * 86400
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def key(self, title: str, content: str):
+        """计算缓存键"""
+        digest = hashlib.sha256()
+        for part in (normalize_markdown(content), title, self.fingerprint):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get(self, title: str, content: str):
+        """命中返回缓存中的 HTML 路径，否则返回 None
+
+        meta.json 损坏、缺字段，或条目正被其它进程淘汰（文件读到一半消失）
+        都按未命中处理，之后 put 会整个重写该条目
+        """
+        entry = self.cache_dir / self.key(title, content)
+        meta_file = entry / "meta.json"
+
+        try:
+            meta = json.loads(meta_file.read_text(encoding="utf-8"))
+            if time.time() - meta["created_at"] > self.max_age:
+                shutil.rmtree(entry, ignore_errors=True)
+                meta = None
+            elif not (entry / meta["html"]).is_file():
+                meta = None
+            else:
+                meta["accessed_at"] = time.time()
+                _write_json(meta_file, meta)
+        except (OSError, ValueError, KeyError, TypeError):
+            # OSError 含 FileNotFoundError，ValueError 含 JSONDecodeError
+            meta = None
+
+        if meta is None:
+            self._count(hit=False)
+            return None
+
+        self._count(hit=True)
+        return entry / meta["html"]
+
+    def put(self, title: str, content: str, html_path: Path):
+        """把润色产物（HTML + 相对路径引用的资源）存入缓存，返回缓存中的 HTML 路径"""
+        html_path = Path(html_path)
+        key = self.key(title, content)
+        entry = self.cache_dir / key
+
+        # 先写到临时目录再整体改名，并发写同一个键时不会出现半成品
+        staging = self.cache_dir / f".{key}.{os.getpid()}.{threading.get_ident()}"
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir(parents=True)
+
+        shutil.copy2(html_path, staging / html_path.name)
+        for ref, src in _local_assets(html_path):
+            dest = (staging / ref).resolve()
+            if staging.resolve() not in dest.parents:
+                continue
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(src, dest)
+
+        now = time.time()
+        meta = {
+            "title": title,
+            "html": html_path.name,
+            "source": str(html_path),
+            "created_at": now,
+            "accessed_at": now,
+            "bytes": _dir_size(staging),
+        }
+        (staging / "meta.json").write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+
+        shutil.rmtree(entry, ignore_errors=True)
+        try:
+            os.replace(staging, entry)
+        except OSError:
+            # 另一个进程抢先写入了同一个键，内容相同，用它的即可
+            shutil.rmtree(staging, ignore_errors=True)
+
+        self.evict()
+        return entry / html_path.name
+
+    def evict(self):
+        """淘汰过期条目，再按最近访问时间淘汰到容量以内"""
+        if not self.cache_dir.exists():
+            return
+
+        entries = []
+        now = time.time()
+        for meta_file in self.cache_dir.glob("*/meta.json"):
+            try:
+                meta = json.loads(meta_file.read_text(encoding="utf-8"))
+                created_at, accessed_at, size = meta["created_at"], meta["accessed_at"], meta["bytes"]
+            except (OSError, ValueError, KeyError, TypeError):
+                continue
+            if now - created_at > self.max_age:
+                shutil.rmtree(meta_file.parent, ignore_errors=True)
+                continue
+            entries.append((accessed_at, size, meta_file.parent))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+
+    def _count(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+            stats_file = self.cache_dir / "stats.json"
+            stats = self.stats()
+            stats["hits"] += 1 if hit else 0
+            stats["misses"] += 0 if hit else 1
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            stats_file.write_text(json.dumps(stats), encoding="utf-8")
+
+    def stats(self):
+        """累计命中/未命中次数（跨运行）"""
+        try:
+            return json.loads((self.cache_dir / "stats.json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {"hits": 0, "misses": 0}
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+润色→发布流水线 - 让不同文章的各阶段重叠执行
+
+    解析 ──[队列]──▶ 润色 ×N ──[队列]──▶ 发布 ×M
+
+每个阶段有独立的并发上限，阶段之间是有界队列：下游处理不过来时上游
+自然阻塞（背压），不会把所有文章一次性读进内存。第 N 篇在发布时，第
+N+1 篇已经在润色。
+
+Ctrl-C 时取消所有阶段，并调用 on_cancel 终止正在运行的 AIWriteX 进程。
+
+各阶段做什么由调用方传入（本模块不依赖 polish_and_publish，后者作为
+脚本运行时再 import 它会加载出第二份模块，全局状态互不相通）:
+
+    results = asyncio.run(run_pipeline(
+        files, load_article,
+        partial(call_aiwritex_polish, cache=cache, worker=worker),
+        partial(publish_to_wechat, account_index=0),
+        polish_jobs=2, log=log, on_cancel=terminate_active_processes))
+"""
+
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from output_manifest import new_job_id
+
+# 实时进度的打印间隔（秒）
+REPORT_INTERVAL = 5.0
+
+_DONE = object()
+
+
+class StageStats:
+    """单个阶段的运行统计"""
+
+    def __init__(self, name: str, limit: int):
+        self.name = name
+        self.limit = limit
+        self.busy = 0
+        self.done = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self._since = {}
+
+    def start(self, key):
+        self.busy += 1
+        self._since[key] = time.perf_counter()
+
+    def finish(self, key, ok: bool):
+        self.busy -= 1
+        self.busy_seconds += time.perf_counter() - self._since.pop(key)
+        if ok:
+            self.done += 1
+        else:
+            self.failed += 1
+
+    def utilization(self, elapsed: float):
+        """已用并发槽位时间 / 总槽位时间（含正在进行的任务）"""
+        now = time.perf_counter()
+        in_flight = sum(now - t for t in self._since.values())
+        capacity = self.limit * elapsed
+        return (self.busy_seconds + in_flight) / capacity if capacity else 0.0
+
+
+def _format_stats(stages, queues, elapsed: float):
+    parts = []
+    for stage in stages:
+        q = queues.get(stage.name)
+        depth = f" 队列 {q.qsize()}/{q.maxsize}" if q is not None else ""
+        parts.append(f"{stage.name} {stage.busy}/{stage.limit}{depth} "
+                     f"完成 {stage.done} 失败 {stage.failed} "
+                     f"利用率 {stage.utilization(elapsed):.0%}")
+    return " | ".join(parts)
+
+
+async def run_pipeline(files, load, polish, publish=None, polish_jobs: int = 2,
+                       publish_jobs: int = 1, log=print, on_cancel=None,
+                       queue_size: int = None, report_interval: float = REPORT_INTERVAL):
+    """运行流水线，返回与 run_batch 相同格式的结果列表
+
+    load(文件路径) -> (标题, 正文)
+    polish(标题, 正文, 任务ID) -> 输出文件路径，失败返回 None
+    publish(输出文件路径) -> (是否成功, 说明)；为 None 时只润色不发布
+    log: 线程安全的打印函数
+    on_cancel: 被取消（Ctrl-C）时调用，负责终止进行中的润色
+    """
+    queue_size = queue_size or polish_jobs * 2
+    publish_jobs = publish_jobs if publish else 0
+
+    parse_stage = StageStats("解析", 1)
+    polish_stage = StageStats("润色", polish_jobs)
+    publish_stage = StageStats("发布", publish_jobs)
+    stages = [parse_stage, polish_stage] + ([publish_stage] if publish else [])
+
+    polish_q = asyncio.Queue(maxsize=queue_size)
+    publish_q = asyncio.Queue(maxsize=queue_size)
+    queues = {"润色": polish_q, "发布": publish_q}
+
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=1 + polish_jobs + publish_jobs)
+    run = lambda fn, *args: loop.run_in_executor(executor, fn, *args)
+
+    results = []
+    start = time.perf_counter()
+
+    def new_result(file_path):
+        return {"file": file_path, "job_id": new_job_id(), "title": file_path.stem,
+                "output": None, "published": False, "ok": False, "error": "",
+                "seconds": 0.0, "_start": time.perf_counter()}
+
+    def finish(r, error: str = ""):
+        r["error"] = error
+        r["ok"] = not error
+        r["seconds"] = time.perf_counter() - r.pop("_start")
+        results.append(r)
+        status = "✅" if r["ok"] else "❌"
+        log(f"{status} [{len(results)}/{len(files)}] {r['file'].name} ({r['seconds']:.1f}s)")
+
+    async def parser():
+        for f in files:
+            r = new_result(f)
+            parse_stage.start(r["job_id"])
+            try:
+                r["title"], r["content"] = await run(load, f)
+            except Exception as e:
+                parse_stage.finish(r["job_id"], False)
+                finish(r, f"读取失败: {e}")
+                continue
+            parse_stage.finish(r["job_id"], True)
+            await polish_q.put(r)   # 队列满时在这里等待（背压）
+
+        for _ in range(polish_jobs):
+            await polish_q.put(_DONE)
+
+    async def polisher():
+        while (r := await polish_q.get()) is not _DONE:
+            polish_stage.start(r["job_id"])
+            try:
+                output = await run(polish, r["title"], r.pop("content"), r["job_id"])
+            except Exception as e:
+                output, error = None, str(e)
+            else:
+                error = "" if output else "润色失败"
+            polish_stage.finish(r["job_id"], bool(output))
+
+            if not output:
+                finish(r, error)
+            elif publish:
+                r["output"] = output
+                await publish_q.put(r)
+            else:
+                r["output"] = output
+                finish(r)
+
+    async def publisher():
+        while (r := await publish_q.get()) is not _DONE:
+            publish_stage.start(r["job_id"])
+            try:
+                success, message = await run(publish, str(r["output"]))
+            except Exception as e:
+                success, message = False, str(e)
+            publish_stage.finish(r["job_id"], success)
+            r["published"] = success
+            finish(r, "" if success else f"发布失败: {message}")
+
+    async def reporter():
+        while True:
+            await asyncio.sleep(report_interval)
+            log(f"📈 {_format_stats(stages, queues, time.perf_counter() - start)}")
+
+    async def polishers_then_close():
+        await asyncio.gather(*(polisher() for _ in range(polish_jobs)))
+        for _ in range(publish_jobs):
+            await publish_q.put(_DONE)
+
+    report_task = asyncio.create_task(reporter())
+    try:
+        await asyncio.gather(
+            parser(),
+            polishers_then_close(),
+            *(publisher() for _ in range(publish_jobs)),
+        )
+    except asyncio.CancelledError:
+        log("\n⛔ 已中断，正在终止进行中的润色任务...")
+        if on_cancel:
+            on_cancel()
+        raise
+    finally:
+        report_task.cancel()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    log(f"📈 {_format_stats(stages, queues, time.perf_counter() - start)}")
+    return results
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+子进程监管 - 流式读取输出、区分卡死与超时、整组终止
+
+与 subprocess.run(capture_output=True, timeout=...) 的区别:
+    - stdout/stderr 逐行读取，实时写入结构化日志（JSONL）；内存里只保留最后
+      OUTPUT_TAIL_LINES 行用于返回和报错，完整输出以日志为准
+    - 长时间没有任何输出判定为卡死（stall），与总运行时长分开计时
+    - 超时或卡死时终止整个进程组，AIWriteX 拉起的子进程一并结束
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import signal
+import threading
+import subprocess
+from collections import deque
+from pathlib import Path
+
+# 多久打印一次心跳（秒）
+HEARTBEAT_INTERVAL = 30
+
+# 每个输出流在内存里保留的行数（只留末尾）
+OUTPUT_TAIL_LINES = 500
+
+# 正在运行的进程，中断时统一终止
+_active = set()
+_active_lock = threading.Lock()
+
+
+def _popen_group_kwargs():
+    """让子进程自成一个进程组，便于整组终止"""
+    if sys.platform == "win32":
+        return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {"start_new_session": True}
+
+
+def kill_group(process: subprocess.Popen):
+    """终止进程及其全部子进程"""
+    if process.poll() is not None:
+        return
+    try:
+        if sys.platform == "win32":
+            subprocess.run(["taskkill", "/T", "/F", "/PID", str(process.pid)],
+                           capture_output=True)
+        else:
+            os.killpg(process.pid, signal.SIGKILL)
+    except (OSError, ProcessLookupError):
+        process.kill()
+
+
+def terminate_all():
+    """终止所有受监管的进程组（Ctrl-C 时调用）"""
+    with _active_lock:
+        processes = list(_active)
+    for process in processes:
+        kill_group(process)
+
+
+def _pump(stream, name: str, lines: queue.Queue):
+    for line in iter(stream.readline, ""):
+        lines.put((name, line.rstrip("\n")))
+    stream.close()
+    lines.put((name, None))
+
+
+def run_supervised(cmd, cwd=None, env=None, log_path: Path = None,
+                   total_timeout: float = 300, stall_timeout: float = 90,
+                   label: str = "", heartbeat=print, cancel: threading.Event = None):
+    """运行命令并监管，返回 (returncode, stdout, stderr, reason)
+
+    stdout/stderr 只含各自最后 OUTPUT_TAIL_LINES 行
+
+    reason: "ok" / "failed" / "stall" / "timeout" / "cancelled"
+    log_path: 逐行写入 {"t": 秒, "stream": "stdout|stderr", "line": ...}
+    heartbeat: 每隔 HEARTBEAT_INTERVAL 秒报告一次进度，传 None 关闭
+    cancel: 置位后立即终止进程组
+    """
+    process = subprocess.Popen(
+        cmd, cwd=cwd, env=env, text=True, encoding="utf-8", errors="replace",
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=1,
+        **_popen_group_kwargs(),
+    )
+    with _active_lock:
+        _active.add(process)
+
+    lines = queue.Queue()
+    for stream, name in ((process.stdout, "stdout"), (process.stderr, "stderr")):
+        threading.Thread(target=_pump, args=(stream, name, lines), daemon=True).start()
+
+    log_file = None
+    if log_path:
+        Path(log_path).parent.mkdir(parents=True, exist_ok=True)
+        log_file = open(log_path, "a", encoding="utf-8")
+
+    output = {"stdout": deque(maxlen=OUTPUT_TAIL_LINES),
+              "stderr": deque(maxlen=OUTPUT_TAIL_LINES)}
+    start = last_output = last_beat = time.monotonic()
+    open_streams = 2
+    reason = None
+
+    try:
+        while open_streams:
+            now = time.monotonic()
+            if cancel is not None and cancel.is_set():
+                reason = "cancelled"
+                break
+            if now - start > total_timeout:
+                reason = "timeout"
+                break
+            if now - last_output > stall_timeout:
+                reason = "stall"
+                break
+
+            if heartbeat and now - last_beat >= HEARTBEAT_INTERVAL:
+                last_line = (output["stdout"] or output["stderr"] or [""])[-1]
+                heartbeat(f"⏳ {label} 已运行 {now - start:.0f}s, 最近输出: {last_line[:60]}")
+                last_beat = now
+
+            try:
+                name, line = lines.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            if line is None:
+                open_streams -= 1
+                continue
+
+            last_output = time.monotonic()
+            output[name].append(line)
+            if log_file:
+                log_file.write(json.dumps(
+                    {"t": round(last_output - start, 3), "stream": name, "line": line},
+                    ensure_ascii=False) + "\n")
+                log_file.flush()
+
+        if reason:
+            kill_group(process)
+        process.wait()
+    finally:
+        with _active_lock:
+            _active.discard(process)
+        if log_file:
+            if reason:
+                log_file.write(json.dumps(
+                    {"t": round(time.monotonic() - start, 3), "event": reason}) + "\n")
+            log_file.close()
+
+    if reason is None:
+        reason = "ok" if process.returncode == 0 else "failed"
+    return process.returncode, "\n".join(output["stdout"]), "\n".join(output["stderr"]), reason
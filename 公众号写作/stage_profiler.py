@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+分阶段性能采样 - 配合 polish_and_publish.py --profile 使用
+
+用法:
+    from stage_profiler import stage
+
+    with stage("parse"):
+        ...
+
+未启用时 stage() 几乎没有开销；启用后按阶段累计:
+    - 调用次数、墙钟时间（总计/最大）
+    - 本进程 CPU 时间、子进程 CPU 时间（AIWriteX 的耗时在这里）
+    - 阶段内本进程常驻内存相对开始时的最大增长（后台线程定时采样）
+    - 本进程读/写字节数
+另外报告整个进程（及子进程）生命周期内的峰值内存，不分阶段。
+
+注意: CPU、读写字节和内存都是进程级计数，批量模式下多篇文章的阶段并发
+运行时，各阶段的增量会互相重叠（同一段读写/内存增长会计入多个阶段），
+只能看趋势，不能相加。
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+
+_enabled = False
+_stats = {}
+_lock = threading.Lock()
+_started = None
+
+# 内存采样间隔（秒）
+RSS_SAMPLE_INTERVAL = 0.05
+
+# 正在进行的阶段: id → [开始时 RSS, 期间最大 RSS]
+_active = {}
+
+
+def enable():
+    """开始采样"""
+    global _enabled, _started
+    _enabled = True
+    _started = time.perf_counter()
+    threading.Thread(target=_sample_rss, daemon=True).start()
+
+
+def _children_cpu():
+    t = os.times()
+    return t.children_user + t.children_system
+
+
+def _rss_mb():
+    """本进程当前常驻内存（MB），取不到为 None"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 1024 / 1024
+    except ImportError:
+        pass
+
+    try:
+        # Linux：第二列是当前常驻页数
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def _observe_rss():
+    """采样一次，更新所有进行中阶段的最大 RSS"""
+    rss = _rss_mb()
+    if rss is None:
+        return
+    with _lock:
+        for sample in _active.values():
+            sample[1] = max(sample[1], rss)
+
+
+def _sample_rss():
+    while _enabled:
+        time.sleep(RSS_SAMPLE_INTERVAL)
+        if _active:
+            _observe_rss()
+
+
+def _peak_rss_mb():
+    """整个进程生命周期的 (本进程峰值, 子进程峰值)，单位 MB；取不到为 None"""
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset / 1024 / 1024, None
+        except (ImportError, AttributeError):
+            return None, None
+
+    # Linux 单位是 KB，macOS 是字节
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale,
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale)
+
+
+def _io_bytes():
+    """本进程累计 (读字节, 写字节)，取不到为 (None, None)"""
+    try:
+        import psutil
+        io = psutil.Process().io_counters()
+        return (getattr(io, "read_chars", io.read_bytes),
+                getattr(io, "write_chars", io.write_bytes))
+    except (ImportError, AttributeError, OSError):
+        pass
+
+    try:
+        fields = dict(line.split(": ") for line in
+                      Path("/proc/self/io").read_text().splitlines())
+        return int(fields["rchar"]), int(fields["wchar"])
+    except (OSError, KeyError, ValueError):
+        return None, None
+
+
+def _delta(after, before):
+    return after - before if after is not None and before is not None else None
+
+
+@contextmanager
+def stage(name: str):
+    """记录一个阶段的耗时与资源占用"""
+    if not _enabled:
+        yield
+        return
+
+    wall0 = time.perf_counter()
+    cpu0 = time.process_time()
+    child0 = _children_cpu()
+    read0, write0 = _io_bytes()
+    rss0 = _rss_mb()
+    token = object()
+    if rss0 is not None:
+        with _lock:
+            _active[id(token)] = [rss0, rss0]
+    try:
+        yield
+    finally:
+        wall = time.perf_counter() - wall0
+        cpu = time.process_time() - cpu0
+        child = _children_cpu() - child0
+        read1, write1 = _io_bytes()
+        _observe_rss()
+
+        with _lock:
+            sample = _active.pop(id(token), None)
+            growth = sample[1] - sample[0] if sample else None
+            s = _stats.setdefault(name, {
+                "calls": 0, "wall_seconds": 0.0, "wall_max_seconds": 0.0,
+                "cpu_seconds": 0.0, "children_cpu_seconds": 0.0,
+                "rss_growth_max_mb": None,
+                "read_bytes": None, "write_bytes": None,
+            })
+            s["calls"] += 1
+            s["wall_seconds"] += wall
+            s["wall_max_seconds"] = max(s["wall_max_seconds"], wall)
+            s["cpu_seconds"] += cpu
+            s["children_cpu_seconds"] += child
+            if growth is not None:
+                s["rss_growth_max_mb"] = max(s["rss_growth_max_mb"] or 0.0, growth)
+            for key, value in (("read_bytes", _delta(read1, read0)),
+                               ("write_bytes", _delta(write1, write0))):
+                if value is not None:
+                    s[key] = (s[key] or 0) + value
+
+
+def report():
+    """当前采样结果"""
+    with _lock:
+        stages = {name: dict(s) for name, s in _stats.items()}
+    rss, child_rss = _peak_rss_mb()
+    return {
+        "total_wall_seconds": time.perf_counter() - _started if _started else 0.0,
+        "process_peak_rss_mb": rss,
+        "children_peak_rss_mb": child_rss,
+        "stages": stages,
+    }
+
+
+def write_report(path: Path):
+    """写出 JSON 报告并打印摘要"""
+    data = report()
+    Path(path).write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    print(f"\n⏱️ 阶段耗时 (总计 {data['total_wall_seconds']:.2f}s):")
+    print(f"   {'阶段':<16}{'次数':>6}{'墙钟(s)':>10}{'CPU(s)':>9}{'子进程CPU':>11}{'RSS增长(MB)':>13}")
+    for name, s in data["stages"].items():
+        growth = s["rss_growth_max_mb"]
+        growth = f"{growth:+.1f}" if growth is not None else "-"
+        print(f"   {name:<16}{s['calls']:>6}{s['wall_seconds']:>10.2f}"
+              f"{s['cpu_seconds']:>9.2f}{s['children_cpu_seconds']:>11.2f}{growth:>13}")
+
+    peaks = [f"{label} {value:.0f}MB" for label, value in
+             (("本进程", data["process_peak_rss_mb"]), ("子进程", data["children_peak_rss_mb"]))
+             if value is not None]
+    if peaks:
+        print(f"   峰值内存（整个运行期间）: {', '.join(peaks)}")
+    print("   注: CPU/读写/内存是进程级计数，阶段并发运行时会互相重叠")
+    print(f"   报告: {path}")